@@ -11,14 +11,17 @@ PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from staging.config import GLOBAL_STYLES, FONTS_HTML
+from staging.config import (
+    GLOBAL_STYLES, FONTS_HTML, PORTAL_HTML_TOP,
+    PORTAL_CARD_VISITOR, PORTAL_CARD_TEAM, PORTAL_CARD_ADMIN
+)
 from staging.db import (
-    get_conn, ensure_base_schema, ensure_upgrade_schema, 
+    pooled_write_conn, ensure_base_schema, ensure_upgrade_schema, 
     init_admin_table, init_session_activity_table, init_match_stats_map_table
 )
 from staging.auth import (
     authenticate, track_user_activity, ensure_seed_admins, 
-    get_active_admin_session, admin_exists
+    get_active_admin_session_cached, admin_exists
 )
 from staging.utils import get_visitor_ip, get_secret
 
@@ -75,38 +78,25 @@ main_container = st.empty()
 
 if st.session_state['app_mode'] == 'portal':
     with main_container.container():
-        st.markdown("""<div class="portal-container">
-<h1 class="portal-header">VALORANT S23 PORTAL</h1>
-<p class="portal-subtitle">System Status & Access Terminal</p>
-<div class="status-grid">
-<div class="status-indicator status-online">● VISITOR ACCESS: LIVE</div>
-<div class="status-indicator status-offline">● TEAM PANEL: STAGING</div>
-<div class="status-indicator status-online">● ADMIN CORE: SECURE</div>
-</div>
-<div class="portal-options">""", unsafe_allow_html=True)
+        st.markdown(PORTAL_HTML_TOP, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.markdown('<div class="portal-card-wrapper"><div class="portal-card-content"><h3>VISITOR</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Browse tournament statistics, match history, and player standings.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_VISITOR, unsafe_allow_html=True)
             if st.button("ENTER PORTAL", key="enter_visitor", use_container_width=True, type="primary"):
                 st.session_state['app_mode'] = 'visitor'
                 st.rerun()
-            st.markdown('</div></div>', unsafe_allow_html=True)
             
         with col2:
-            st.markdown('<div class="portal-card-wrapper disabled"><div class="portal-card-content"><h3>TEAM LEADER</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Manage your team roster, submit scores, and track performance.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_TEAM, unsafe_allow_html=True)
             st.button("LOCKED", key="enter_team", use_container_width=True, disabled=True)
-            st.markdown('</div></div>', unsafe_allow_html=True)
             
         with col3:
-            st.markdown('<div class="portal-card-wrapper"><div class="portal-card-content"><h3>ADMIN</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Full system administration, data management, and tournament control.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_ADMIN, unsafe_allow_html=True)
             if st.button("ADMIN LOGIN", key="enter_admin", use_container_width=True):
                 st.session_state['app_mode'] = 'admin'
                 st.rerun()
-            st.markdown('</div></div>', unsafe_allow_html=True)
-            
-        st.markdown('</div></div>', unsafe_allow_html=True)
     st.stop()
 
 # Admin Login Screen Logic
@@ -122,7 +112,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
         st.info("Please enter your administrator credentials to proceed.")
         
         # Check for active admin sessions first
-        active_admin = get_active_admin_session()
+        active_admin = get_active_admin_session_cached()
         
         if active_admin:
             st.error(f"Access Denied: Someone is actively working on the admin panel.")
@@ -136,10 +126,9 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                 st.write("### Option 1: Unlock your specific ID")
                 if st.button("🔓 UNLOCK MY ID", use_container_width=True):
                     try:
-                        conn = get_conn()
-                        conn.execute("DELETE FROM session_activity WHERE ip_address = ? AND (role = 'admin' OR role = 'dev')", (curr_ip,))
-                        conn.commit()
-                        conn.close()
+                        with pooled_write_conn() as conn:
+                            conn.execute("DELETE FROM session_activity WHERE ip_address = ? AND (role = 'admin' OR role = 'dev')", (curr_ip,))
+                        st.session_state.pop('_active_admin_cache', None)
                         st.success("Your ID has been cleared. Try logging in below.")
                         time.sleep(1)
                         st.rerun()
@@ -157,10 +146,9 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                         
                     if env_tok and hmac.compare_digest(force_token or "", env_tok):
                         try:
-                            conn = get_conn()
-                            conn.execute("DELETE FROM session_activity WHERE role = 'admin' OR role = 'dev'")
-                            conn.commit()
-                            conn.close()
+                            with pooled_write_conn() as conn:
+                                conn.execute("DELETE FROM session_activity WHERE role = 'admin' OR role = 'dev'")
+                            st.session_state.pop('_active_admin_cache', None)
                             st.success("ALL admin sessions cleared. You can now login.")
                             time.sleep(1)
                             st.rerun()
@@ -197,7 +185,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
             
             if st.form_submit_button("LOGIN TO ADMIN PANEL", use_container_width=True):
                 # Check for active admin sessions first
-                active_admin = get_active_admin_session()
+                active_admin = get_active_admin_session_cached()
                 if active_admin:
                     st.error(f"Access Denied: Someone is actively working on the admin panel.")
                     st.warning(f"Active User: {active_admin[0]} ({active_admin[1]})")
@@ -225,6 +213,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                         st.session_state['login_attempts'] = 0
                         # Update activity immediately with new role
                         track_user_activity()
+                        st.session_state.pop('_active_admin_cache', None)
                         st.success("Access Granted")
                         st.rerun()
                     else:
@@ -256,9 +245,13 @@ if st.session_state['is_admin']:
         pages.append("⚙️ ADMIN PANEL")
 
 # Top Navigation Bar
+NAV_ACTIVE_BAR_HTML = '<div style="height: 3px; background: var(--primary-red); margin-top: -8px; box-shadow: 0 0 10px var(--primary-red); border-radius: 2px;"></div>'
 st.markdown('<div class="nav-wrapper"><div class="nav-logo">VALORANT S23 • PORTAL</div></div>', unsafe_allow_html=True)
 
 # Navigation Layout
+# The sub-nav-wrapper element draws the fixed band behind the nav row (see its CSS).
+# Inside the columns only real widgets go: per-button <div> wrappers were separate
+# elements that never wrapped anything; the active page is marked by type="primary".
 st.markdown('<div class="sub-nav-wrapper">', unsafe_allow_html=True)
 
 # Define columns based on whether admin is logged in (to add logout button)
@@ -269,35 +262,29 @@ if st.session_state['is_admin']:
 cols = st.columns(nav_cols_spec)
 
 with cols[0]:
-    st.markdown('<div class="exit-btn">', unsafe_allow_html=True)
     if st.button("🏠 EXIT", key="exit_portal", use_container_width=True):
         st.session_state['app_mode'] = 'portal'
         st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
     
 for i, p in enumerate(pages):
     with cols[i+1]:
         is_active = st.session_state['page'] == p
-        st.markdown(f'<div class="{"active-nav" if is_active else ""}">', unsafe_allow_html=True)
         if st.button(p, key=f"nav_{p}", use_container_width=True, 
                      type="primary" if is_active else "secondary"):
             st.session_state['page'] = p
             st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
         
         if is_active:
-            st.markdown('<div style="height: 3px; background: var(--primary-red); margin-top: -8px; box-shadow: 0 0 10px var(--primary-red); border-radius: 2px;"></div>', unsafe_allow_html=True)
+            st.markdown(NAV_ACTIVE_BAR_HTML, unsafe_allow_html=True)
 
 # Add Logout button if admin
 if st.session_state['is_admin']:
     with cols[-1]:
-        st.markdown('<div class="exit-btn">', unsafe_allow_html=True)
         if st.button(f"🚪 LOGOUT ({st.session_state['username']})", key="logout_btn", use_container_width=True):
             st.session_state['is_admin'] = False
             st.session_state['username'] = None
             st.session_state['app_mode'] = 'portal'
             st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
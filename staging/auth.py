@@ -3,90 +3,131 @@ import streamlit as st
 import secrets
 import hashlib
 import hmac
-from .db import get_conn
+from concurrent.futures import ThreadPoolExecutor
+from .db import get_conn, get_thread_conn, release_thread_conn
 from .utils import get_visitor_ip, get_secret
 
+# Small pool so independent key derivations (admin seeding) can overlap
+_hash_pool = ThreadPoolExecutor(max_workers=2)
+
+# New hashes use scrypt where OpenSSL provides it; existing PBKDF2 rows keep verifying
+HASH_SCHEME = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+
+def _derive_key(password, salt, scheme):
+    pw = password.encode('utf-8')
+    if scheme == "scrypt":
+        return hashlib.scrypt(pw, salt=salt, n=2**14, r=8, p=1, dklen=32)
+    return hashlib.pbkdf2_hmac('sha256', pw, salt, 200000, dklen=32)
+
 def hash_password(password, salt=None):
     if salt is None:
         salt = secrets.token_bytes(16)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200000)
-    return salt, hashed
+    return salt, _derive_key(password, salt, HASH_SCHEME)
 
-def verify_password(password, salt, stored_hash):
-    calc = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200000)
+def verify_password(password, salt, stored_hash, scheme="pbkdf2"):
+    calc = _derive_key(password, salt, scheme or "pbkdf2")
     return hmac.compare_digest(calc, stored_hash)
 
 def admin_exists():
-    conn = get_conn()
-    cur = conn.execute("SELECT COUNT(*) FROM admins WHERE is_active=1")
-    count = cur.fetchone()[0]
-    conn.close()
+    conn = get_thread_conn()
+    try:
+        count = conn.execute("SELECT COUNT(*) FROM admins WHERE is_active=1").fetchone()[0]
+    finally:
+        release_thread_conn(conn)
     return count > 0
 
 def create_admin(username, password):
     salt, ph = hash_password(password)
-    conn = get_conn()
+    conn = get_thread_conn()
     role = get_secret("ADMIN_SEED_ROLE", "admin") if not admin_exists() else "admin"
-    conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)", (username, ph, salt, role))
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)", (username, ph, salt, role, HASH_SCHEME))
+        conn.commit()
+    except Exception:
+        # Don't leave the shared connection holding an open write transaction
+        conn.rollback()
+        raise
+    finally:
+        release_thread_conn(conn)
 
 def create_admin_with_role(username, password, role):
     salt, ph = hash_password(password)
-    conn = get_conn()
-    conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)", (username, ph, salt, role))
-    conn.commit()
-    conn.close()
+    conn = get_thread_conn()
+    try:
+        conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)", (username, ph, salt, role, HASH_SCHEME))
+        conn.commit()
+    except Exception:
+        # Don't leave the shared connection holding an open write transaction
+        conn.rollback()
+        raise
+    finally:
+        release_thread_conn(conn)
 
 def ensure_seed_admins(conn=None):
     su = get_secret("ADMIN_SEED_USER")
     sp = get_secret("ADMIN_SEED_PWD")
     sr = get_secret("ADMIN_SEED_ROLE", "admin")
     
-    should_close = False
+    owns_conn = False
     if conn is None:
-        conn = get_conn()
-        should_close = True
+        conn = get_thread_conn()
+        owns_conn = True
     
     c = conn.cursor()
-    if su and sp:
-        row = c.execute("SELECT id, role FROM admins WHERE username=?", (su,)).fetchone()
-        if not row:
-            salt, ph = hash_password(sp)
-            c.execute(
-                "INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)",
-                (su, ph, salt, sr)
-            )
-        else:
-            # Always update password and role to match secrets.toml
-            salt, ph = hash_password(sp)
-            c.execute("UPDATE admins SET role=?, password_hash=?, salt=? WHERE id=?", (sr, ph, salt, int(row[0])))
     su2 = get_secret("ADMIN2_USER")
     sp2 = get_secret("ADMIN2_PWD")
     sr2 = get_secret("ADMIN2_ROLE", "admin")
+    # Derive both seed hashes concurrently; hashlib drops the GIL while hashing
+    fut = _hash_pool.submit(hash_password, sp) if su and sp else None
+    fut2 = None
     if su2 and sp2:
         row2 = c.execute("SELECT id FROM admins WHERE username=?", (su2,)).fetchone()
         if not row2:
-            salt2, ph2 = hash_password(sp2)
+            fut2 = _hash_pool.submit(hash_password, sp2)
+    if fut is not None:
+        row = c.execute("SELECT id, role FROM admins WHERE username=?", (su,)).fetchone()
+        salt, ph = fut.result()
+        if not row:
             c.execute(
-                "INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)",
-                (su2, ph2, salt2, sr2)
+                "INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)",
+                (su, ph, salt, sr, HASH_SCHEME)
             )
+        else:
+            # Always update password and role to match secrets.toml
+            c.execute("UPDATE admins SET role=?, password_hash=?, salt=?, hash_scheme=? WHERE id=?", (sr, ph, salt, HASH_SCHEME, int(row[0])))
+    if fut2 is not None:
+        salt2, ph2 = fut2.result()
+        c.execute(
+            "INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)",
+            (su2, ph2, salt2, sr2, HASH_SCHEME)
+        )
     
-    if should_close:
-        conn.commit()
-        conn.close()
+    if owns_conn:
+        try:
+            conn.commit()
+        finally:
+            release_thread_conn(conn)
 
 def authenticate(username, password):
-    conn = get_conn()
-    row = conn.execute("SELECT username, password_hash, salt, role FROM admins WHERE username=? AND is_active=1", (username,)).fetchone()
-    conn.close()
-    if not row:
-        return None
-    u, ph, salt, role = row
-    if verify_password(password, salt, ph):
+    conn = get_thread_conn()
+    try:
+        row = conn.execute("SELECT id, username, password_hash, salt, role, hash_scheme FROM admins WHERE username=? AND is_active=1", (username,)).fetchone()
+        if not row:
+            return None
+        aid, u, ph, salt, role, scheme = row
+        if not verify_password(password, salt, ph, scheme):
+            return None
+        if (scheme or "pbkdf2") != HASH_SCHEME:
+            # Re-hash legacy PBKDF2 passwords with the current scheme on successful login
+            new_salt, new_ph = hash_password(password)
+            try:
+                conn.execute("UPDATE admins SET password_hash=?, salt=?, hash_scheme=? WHERE id=?", (new_ph, new_salt, HASH_SCHEME, int(aid)))
+                conn.commit()
+            except Exception:
+                conn.rollback()
         return {"username": u, "role": role}
-    return None
+    finally:
+        release_thread_conn(conn)
 
 def track_user_activity():
     try:
@@ -130,6 +171,8 @@ def track_user_activity():
     except Exception:
         pass
 
+# Shared across sessions; the live-users card tolerates ~30s of lag
+@st.cache_data(ttl=30, show_spinner=False)
 def get_active_user_count():
     conn = get_conn()
     # Count distinct IPs active in last 5 minutes
@@ -155,3 +198,13 @@ def get_active_admin_session():
             return row # Return the first session that isn't us
             
     return None
+
+def get_active_admin_session_cached(ttl=5):
+    # Reuse the lock check within one interaction (render + submit) instead of querying twice
+    now = time.time()
+    cached = st.session_state.get('_active_admin_cache')
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+    res = get_active_admin_session()
+    st.session_state['_active_admin_cache'] = (now, res)
+    return res
@@ -10,6 +10,9 @@ if CURRENT_DIR not in sys.path:
 # Valorant Map Catalog
 MAPS_CATALOG = ["Abyss", "Ascent", "Bind", "Breeze", "Fracture", "Haven", "Icebox", "Lotus", "Pearl", "Split", "Sunset", "Corrode"]
 
+# Display headers for the per-map scoreboards
+SCOREBOARD_COLS = {'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}
+
 # CSS Styles
 GLOBAL_STYLES = """
 <style>
@@ -363,6 +366,20 @@ to { opacity: 1; transform: translateY(0); }
 </style>
 """
 
+# Static portal markup; only the three buttons between these blocks are live widgets
+PORTAL_HTML_TOP = """<div class="portal-container">
+<h1 class="portal-header">VALORANT S23 PORTAL</h1>
+<p class="portal-subtitle">System Status & Access Terminal</p>
+<div class="status-grid">
+<div class="status-indicator status-online">● VISITOR ACCESS: LIVE</div>
+<div class="status-indicator status-offline">● TEAM PANEL: STAGING</div>
+<div class="status-indicator status-online">● ADMIN CORE: SECURE</div>
+</div>
+<div class="portal-options">"""
+PORTAL_CARD_VISITOR = '<div class="portal-card-wrapper"><div class="portal-card-content"><h3>VISITOR</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Browse tournament statistics, match history, and player standings.</p></div><div class="portal-card-footer">'
+PORTAL_CARD_TEAM = '<div class="portal-card-wrapper disabled"><div class="portal-card-content"><h3>TEAM LEADER</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Manage your team roster, submit scores, and track performance.</p></div><div class="portal-card-footer">'
+PORTAL_CARD_ADMIN = '<div class="portal-card-wrapper"><div class="portal-card-content"><h3>ADMIN</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Full system administration, data management, and tournament control.</p></div><div class="portal-card-footer">'
+
 FONTS_HTML = """<link href='https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&family=Rajdhani:wght@400;600&family=Inter:wght@400;700&display=swap' rel='stylesheet'>"""
 
 def apply_plotly_theme(fig):
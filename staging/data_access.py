@@ -2,106 +2,147 @@ import pandas as pd
 import numpy as np
 import os
 import streamlit as st
+from contextlib import contextmanager
 from .db import (
-    get_conn, DB_PATH, ensure_base_schema, init_admin_table, 
+    get_conn, get_pooled_conn, reader_conn, DB_POOL_LOCK, DB_WRITE_LOCK, DB_PATH, ensure_base_schema, init_admin_table, 
     init_session_activity_table, init_match_stats_map_table, 
     ensure_upgrade_schema, import_sqlite_db, export_db_bytes, reset_db
 )
 from .auth import ensure_seed_admins
+from .config import ROOT_DIR
+from .utils import get_secret
+
+def _fmt_with_riot(name_col, riot_col):
+    # Vectorized "Name (RiotID)" formatting; falls back to the bare name when no Riot ID
+    s = riot_col.fillna('').astype(str).str.strip()
+    return name_col.where(s == '', name_col.astype(str) + ' (' + s + ')')
+
+@contextmanager
+def _dbconn():
+    # Read helpers share one pooled SQLite connection; cloud backends keep per-call connections
+    if get_secret("CLOUD_DB_TYPE"):
+        conn = get_conn()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    if not os.path.exists(DB_PATH):
+        # Nothing to open read-only until the schema bootstrap creates the file
+        with DB_POOL_LOCK:
+            yield get_pooled_conn()
+        return
+    with reader_conn() as conn:
+        yield conn
+
+def _fast_read(conn, sql, params=(), dtypes=None):
+    # Thin read_sql for small fixed-schema queries: cursor rows straight into from_records
+    cur = conn.execute(sql, params)
+    cols = [d[0] for d in cur.description]
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=cols, coerce_float=True)
+    if dtypes:
+        df = df.astype(dtypes, copy=False)
+    return df
+
+_SCORE_INT_COLS = ('score_t1', 'score_t2', 'team1_rounds', 'team2_rounds', 'map_index', 'is_forfeit', 'winner_id')
+
+def _downcast_ints(df, cols=_SCORE_INT_COLS):
+    # Cached frames keep small counters at the narrowest int width; NULL-bearing columns stay float
+    for c in cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], downcast='integer')
+    return df
+
+_STAT_INT_COLS = ('map_index', 'acs', 'kills', 'deaths', 'assists', 'is_sub')
 
 @st.cache_data(ttl=300)
 def get_substitutions_log():
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
-            """
-            SELECT msm.match_id, msm.map_index, m.week, m.group_name,
-                   t.name AS team, p.name AS player, p.riot_id AS player_riot,
-                   sp.name AS subbed_for, sp.riot_id AS sub_riot,
-                   msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            LEFT JOIN teams t ON msm.team_id = t.id
-            LEFT JOIN players p ON msm.player_id = p.id
-            LEFT JOIN players sp ON msm.subbed_for_id = sp.id
-            WHERE msm.is_sub = 1 AND m.status = 'completed'
-            ORDER BY m.week, msm.match_id, msm.map_index
-            """,
-            conn,
-        )
-        if not df.empty:
-            df['player'] = df.apply(lambda r: f"{r['player']} ({r['player_riot']})" if r['player_riot'] and str(r['player_riot']).strip() else r['player'], axis=1)
-            df['subbed_for'] = df.apply(lambda r: f"{r['subbed_for']} ({r['sub_riot']})" if r['sub_riot'] and str(r['sub_riot']).strip() else r['subbed_for'], axis=1)
-            df = df.drop(columns=['player_riot', 'sub_riot'])
-    except Exception:
-        conn.close()
-        return pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                """
+                SELECT msm.match_id, msm.map_index, m.week, m.group_name,
+                       t.name AS team, p.name AS player, p.riot_id AS player_riot,
+                       sp.name AS subbed_for, sp.riot_id AS sub_riot,
+                       msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists
+                FROM match_stats_map msm
+                JOIN matches m ON msm.match_id = m.id
+                LEFT JOIN teams t ON msm.team_id = t.id
+                LEFT JOIN players p ON msm.player_id = p.id
+                LEFT JOIN players sp ON msm.subbed_for_id = sp.id
+                WHERE msm.is_sub = 1 AND m.status = 'completed'
+                ORDER BY m.week, msm.match_id, msm.map_index
+                """,
+                conn,
+            )
+            if not df.empty:
+                df['player'] = _fmt_with_riot(df['player'], df['player_riot'])
+                df['subbed_for'] = _fmt_with_riot(df['subbed_for'], df['sub_riot'])
+                df = df.drop(columns=['player_riot', 'sub_riot'])
+        except Exception:
+            return pd.DataFrame()
     return df
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, show_spinner=False)
 def get_player_profile(player_id):
-    conn = get_conn()
-    try:
-        info = pd.read_sql(
-            "SELECT p.id, p.name, p.riot_id, p.rank, t.tag as team FROM players p LEFT JOIN teams t ON p.default_team_id=t.id WHERE p.id=?",
-            conn,
-            params=(int(player_id),),
-        )
-        if info.empty:
-            conn.close()
-            return {}
+    with _dbconn() as conn:
+        try:
+            info = pd.read_sql(
+                "SELECT p.id, p.name, p.riot_id, p.rank, t.tag as team FROM players p LEFT JOIN teams t ON p.default_team_id=t.id WHERE p.id=?",
+                conn,
+                params=(int(player_id),),
+            )
+            if info.empty:
+                return {}
+                
+            # Format name to include Riot ID if available
+            p_name = info.iloc[0]['name']
+            p_riot = info.iloc[0]['riot_id']
+            display_name = f"{p_name} ({p_riot})" if p_riot and str(p_riot).strip() else p_name
             
-        # Format name to include Riot ID if available
-        p_name = info.iloc[0]['name']
-        p_riot = info.iloc[0]['riot_id']
-        display_name = f"{p_name} ({p_riot})" if p_riot and str(p_riot).strip() else p_name
-        
-        rank_val = info.iloc[0]['rank']
-        
-        # Stats with match metadata in one go
-        stats = pd.read_sql(
-            """
-            SELECT msm.match_id, msm.map_index, msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists, msm.is_sub, m.week, mm.map_name
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            LEFT JOIN match_maps mm ON msm.match_id = mm.match_id AND msm.map_index = mm.map_index
-            WHERE msm.player_id=? AND m.status = 'completed'
-            """,
-            conn,
-            params=(int(player_id),),
-        )
-        
-        # Combined Benchmarks
-        bench = pd.read_sql(
-            """
-            SELECT 
-                AVG(msm.acs) as lg_acs, AVG(msm.kills) as lg_k, AVG(msm.deaths) as lg_d, AVG(msm.assists) as lg_a,
-                AVG(CASE WHEN p.rank = ? THEN msm.acs ELSE NULL END) as r_acs,
-                AVG(CASE WHEN p.rank = ? THEN msm.kills ELSE NULL END) as r_k,
-                AVG(CASE WHEN p.rank = ? THEN msm.deaths ELSE NULL END) as r_d,
-                AVG(CASE WHEN p.rank = ? THEN msm.assists ELSE NULL END) as r_a
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            JOIN players p ON msm.player_id = p.id
-            WHERE m.status = 'completed'
-            """,
-            conn,
-            params=(rank_val, rank_val, rank_val, rank_val)
-        ).iloc[0]
-        
-        trend = pd.DataFrame()
-        if not stats.empty:
-            agg = stats.groupby('match_id').agg({'acs':'mean','kills':'sum','deaths':'sum','week':'first'}).reset_index()
-            agg['kda'] = agg['kills'] / agg['deaths'].replace(0, 1)
-            agg['label'] = 'W' + agg['week'].fillna(0).astype(int).astype(str) + '-M' + agg['match_id'].astype(int).astype(str)
-            agg = agg.rename(columns={'acs':'avg_acs'})
-            trend = agg[['label','avg_acs','kda']]
+            rank_val = info.iloc[0]['rank']
             
-        conn.close()
-    except Exception:
-        if 'conn' in locals(): conn.close()
-        return {}
+            # Player stats and league/rank benchmarks in one round-trip: the one-row
+            # bench CTE is LEFT JOINed to the player's completed map rows
+            combined = pd.read_sql(
+                """
+                WITH done AS (
+                    SELECT msm.*, m.week
+                    FROM match_stats_map msm
+                    JOIN matches m ON msm.match_id = m.id
+                    WHERE m.status = 'completed'
+                ),
+                bench AS (
+                    SELECT 
+                        AVG(d.acs) as lg_acs, AVG(d.kills) as lg_k, AVG(d.deaths) as lg_d, AVG(d.assists) as lg_a,
+                        AVG(CASE WHEN p.rank = ? THEN d.acs ELSE NULL END) as r_acs,
+                        AVG(CASE WHEN p.rank = ? THEN d.kills ELSE NULL END) as r_k,
+                        AVG(CASE WHEN p.rank = ? THEN d.deaths ELSE NULL END) as r_d,
+                        AVG(CASE WHEN p.rank = ? THEN d.assists ELSE NULL END) as r_a
+                    FROM done d
+                    JOIN players p ON d.player_id = p.id
+                )
+                SELECT b.*, s.match_id, s.map_index, s.agent, s.acs, s.kills, s.deaths, s.assists, s.is_sub, s.week, mm.map_name
+                FROM bench b
+                LEFT JOIN done s ON s.player_id = ?
+                LEFT JOIN match_maps mm ON s.match_id = mm.match_id AND s.map_index = mm.map_index
+                """,
+                conn,
+                params=(rank_val, rank_val, rank_val, rank_val, int(player_id))
+            )
+            bench = combined.iloc[0][['lg_acs', 'lg_k', 'lg_d', 'lg_a', 'r_acs', 'r_k', 'r_d', 'r_a']]
+            stats = combined.loc[combined['match_id'].notna(), ['match_id', 'map_index', 'agent', 'acs', 'kills', 'deaths', 'assists', 'is_sub', 'week', 'map_name']].reset_index(drop=True)
+            
+            trend = pd.DataFrame()
+            if not stats.empty:
+                agg = stats.groupby('match_id').agg({'acs':'mean','kills':'sum','deaths':'sum','week':'first'}).reset_index()
+                agg['kda'] = agg['kills'] / agg['deaths'].replace(0, 1)
+                agg['label'] = 'W' + agg['week'].fillna(0).astype(int).astype(str) + '-M' + agg['match_id'].astype(int).astype(str)
+                agg = agg.rename(columns={'acs':'avg_acs'})
+                trend = agg[['label','avg_acs','kda']]
+                
+        except Exception:
+            return {}
         
     games = stats['match_id'].nunique() if not stats.empty else 0
     avg_acs = float(stats['acs'].mean()) if not stats.empty else 0.0
@@ -129,6 +170,10 @@ def get_player_profile(player_id):
         'total_kills': total_k,
         'total_deaths': total_d,
         'total_assists': total_a,
+        # Per-game averages for the benchmark table/chart, computed once with the cached profile
+        'kpg': total_k / max(games, 1),
+        'dpg': total_d / max(games, 1),
+        'apg': total_a / max(games, 1),
         'kd_ratio': round(kd, 2),
         'sr_avg_acs': round(float(bench['r_acs'] or 0), 1),
         'sr_k': round(float(bench['r_k'] or 0), 1),
@@ -144,290 +189,345 @@ def get_player_profile(player_id):
     }
 
 def upsert_match_maps(match_id, maps_data):
+    rows = [
+        (match_id, m['map_index'], m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0))
+        for m in maps_data
+    ]
     conn = get_conn()
-    c = conn.cursor()
-    for m in maps_data:
-        c.execute("SELECT id FROM match_maps WHERE match_id=? AND map_index=?", (match_id, m['map_index']))
-        ex = c.fetchone()
-        if ex:
-            c.execute(
-                "UPDATE match_maps SET map_name=?, team1_rounds=?, team2_rounds=?, winner_id=?, is_forfeit=? WHERE id=?",
-                (m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0), ex[0])
-            )
-        else:
-            c.execute(
-                "INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (match_id, m['map_index'], m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0))
-            )
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("BEGIN")
+        conn.executemany(
+            """
+            INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(match_id, map_index) DO UPDATE SET
+                map_name=excluded.map_name,
+                team1_rounds=excluded.team1_rounds,
+                team2_rounds=excluded.team2_rounds,
+                winner_id=excluded.winner_id,
+                is_forfeit=excluded.is_forfeit
+            """,
+            rows
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    get_match_ids_with_maps.clear()
 
-@st.cache_data(ttl=300)
+# Logo paths already found on disk; misses aren't remembered, so a logo uploaded later shows on the next rebuild
+_logo_hits = set()
+
+def safe_logo_path(p):
+    # Logo validation: rejects traversal/absolute paths; found files skip the stat() on later standings rebuilds
+    if not isinstance(p, str) or not p:
+        return None
+    if ".." in p or p.startswith("/") or p.startswith("\\"):
+        return None
+    if p in _logo_hits:
+        return p
+    if os.path.exists(os.path.join(ROOT_DIR, p)):
+        _logo_hits.add(p)
+        return p
+    return None
+
+def clear_logo_cache():
+    _logo_hits.clear()
+
+# The larger read-mostly frames are cached as shared resources to skip cache_data's
+# hash + copy on every hit; callers must .copy() before mutating them.
+@st.cache_resource(ttl=300)
 def get_standings():
-    conn = get_conn()
-    try:
-        # Optimized SQL Query to replace Pandas aggregation
-        query = """
-        WITH team_matches AS (
-            -- Matches where team is team1
-            SELECT 
-                team1_id as team_id,
-                CASE WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 1 ELSE 0 END as win,
-                CASE WHEN COALESCE(mm.team1_rounds, m.score_t1) < COALESCE(mm.team2_rounds, m.score_t2) THEN 1 ELSE 0 END as loss,
-                CASE 
-                    WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 15 
-                    ELSE MIN(COALESCE(mm.team1_rounds, m.score_t1), 12) 
-                END as points,
-                CASE 
-                    WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 15 
-                    ELSE MIN(COALESCE(mm.team2_rounds, m.score_t2), 12) 
-                END as points_against
-            FROM matches m
-            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-            WHERE m.status = 'completed' AND m.match_type = 'regular' AND (m.format IS NULL OR UPPER(m.format)='BO1')
+    with _dbconn() as conn:
+        try:
+            # Optimized SQL Query to replace Pandas aggregation
+            query = """
+            WITH team_matches AS (
+                -- Matches where team is team1
+                SELECT 
+                    team1_id as team_id,
+                    CASE WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 1 ELSE 0 END as win,
+                    CASE WHEN COALESCE(mm.team1_rounds, m.score_t1) < COALESCE(mm.team2_rounds, m.score_t2) THEN 1 ELSE 0 END as loss,
+                    CASE 
+                        WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 15 
+                        ELSE MIN(COALESCE(mm.team1_rounds, m.score_t1), 12) 
+                    END as points,
+                    CASE 
+                        WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 15 
+                        ELSE MIN(COALESCE(mm.team2_rounds, m.score_t2), 12) 
+                    END as points_against
+                FROM matches m
+                LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+                WHERE m.status = 'completed' AND m.match_type = 'regular' AND (m.format IS NULL OR UPPER(m.format)='BO1')
 
-            UNION ALL
+                UNION ALL
 
-            -- Matches where team is team2
+                -- Matches where team is team2
+                SELECT 
+                    team2_id as team_id,
+                    CASE WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 1 ELSE 0 END as win,
+                    CASE WHEN COALESCE(mm.team2_rounds, m.score_t2) < COALESCE(mm.team1_rounds, m.score_t1) THEN 1 ELSE 0 END as loss,
+                    CASE 
+                        WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 15 
+                        ELSE MIN(COALESCE(mm.team2_rounds, m.score_t2), 12) 
+                    END as points,
+                    CASE 
+                        WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 15 
+                        ELSE MIN(COALESCE(mm.team1_rounds, m.score_t1), 12) 
+                    END as points_against
+                FROM matches m
+                LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+                WHERE m.status = 'completed' AND m.match_type = 'regular' AND (m.format IS NULL OR UPPER(m.format)='BO1')
+            )
             SELECT 
-                team2_id as team_id,
-                CASE WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 1 ELSE 0 END as win,
-                CASE WHEN COALESCE(mm.team2_rounds, m.score_t2) < COALESCE(mm.team1_rounds, m.score_t1) THEN 1 ELSE 0 END as loss,
-                CASE 
-                    WHEN COALESCE(mm.team2_rounds, m.score_t2) > COALESCE(mm.team1_rounds, m.score_t1) THEN 15 
-                    ELSE MIN(COALESCE(mm.team2_rounds, m.score_t2), 12) 
-                END as points,
-                CASE 
-                    WHEN COALESCE(mm.team1_rounds, m.score_t1) > COALESCE(mm.team2_rounds, m.score_t2) THEN 15 
-                    ELSE MIN(COALESCE(mm.team1_rounds, m.score_t1), 12) 
-                END as points_against
-            FROM matches m
-            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-            WHERE m.status = 'completed' AND m.match_type = 'regular' AND (m.format IS NULL OR UPPER(m.format)='BO1')
-        )
-        SELECT 
-            t.id, t.name, t.group_name, t.logo_path,
-            COALESCE(SUM(tm.win), 0) as Wins,
-            COALESCE(SUM(tm.loss), 0) as Losses,
-            COALESCE(SUM(tm.points), 0) as Points,
-            COALESCE(SUM(tm.points_against), 0) as "Points Against",
-            COALESCE(COUNT(tm.team_id), 0) as Played,
-            (COALESCE(SUM(tm.points), 0) - COALESCE(SUM(tm.points_against), 0)) as PD
-        FROM teams t
-        LEFT JOIN team_matches tm ON t.id = tm.team_id
-        GROUP BY t.id
-        ORDER BY Points DESC, "Points Against" ASC
-        """
-        df = pd.read_sql_query(query, conn)
-        
-        # Filter out dummy teams if needed
-        df = df[~df['name'].isin(['FAT1', 'FAT2'])]
-        
-    except Exception:
-        conn.close()
-        return pd.DataFrame()
-    conn.close()
+                t.id, t.name, t.group_name, t.logo_path,
+                COALESCE(SUM(tm.win), 0) as Wins,
+                COALESCE(SUM(tm.loss), 0) as Losses,
+                COALESCE(SUM(tm.points), 0) as Points,
+                COALESCE(SUM(tm.points_against), 0) as "Points Against",
+                COALESCE(COUNT(tm.team_id), 0) as Played,
+                (COALESCE(SUM(tm.points), 0) - COALESCE(SUM(tm.points_against), 0)) as PD
+            FROM teams t
+            LEFT JOIN team_matches tm ON t.id = tm.team_id
+            GROUP BY t.id
+            ORDER BY Points DESC, "Points Against" ASC
+            """
+            df = pd.read_sql_query(query, conn)
+            
+            # Filter out dummy teams if needed
+            df = df[~df['name'].isin(['FAT1', 'FAT2'])]
+            
+        except Exception:
+            return pd.DataFrame()
     
     # Pre-calculate logo display safety
     if not df.empty:
-        df['logo_display'] = [
-            p if p and not (".." in p or p.startswith("/") or p.startswith("\\")) and os.path.exists(p) 
-            else None 
-            for p in df['logo_path']
-        ]
+        df['logo_display'] = df['logo_path'].map(safe_logo_path)
     
     return df
 
 
 @st.cache_data(ttl=60)
 def get_player_leaderboard():
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query(
-            """
-            SELECT p.id as player_id,
-                   p.name,
-                   p.riot_id,
-                   t.tag as team,
-                   COUNT(DISTINCT msm.match_id) as games,
-                   AVG(msm.acs) as avg_acs,
-                   SUM(msm.kills) as total_kills,
-                   SUM(msm.deaths) as total_deaths,
-                   SUM(msm.assists) as total_assists
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            JOIN players p ON msm.player_id = p.id
-            LEFT JOIN teams t ON p.default_team_id = t.id
-            WHERE m.status = 'completed'
-            GROUP BY p.id, p.name, p.riot_id
-            HAVING games > 0
-            """,
-            conn,
-        )
-    except Exception:
-        conn.close()
-        return pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql_query(
+                """
+                SELECT p.id as player_id,
+                       p.name,
+                       p.riot_id,
+                       t.tag as team,
+                       COUNT(DISTINCT msm.match_id) as games,
+                       AVG(msm.acs) as avg_acs,
+                       SUM(msm.kills) as total_kills,
+                       SUM(msm.deaths) as total_deaths,
+                       SUM(msm.assists) as total_assists
+                FROM match_stats_map msm
+                JOIN matches m ON msm.match_id = m.id
+                JOIN players p ON msm.player_id = p.id
+                LEFT JOIN teams t ON p.default_team_id = t.id
+                WHERE m.status = 'completed'
+                GROUP BY p.id, p.name, p.riot_id
+                HAVING games > 0
+                """,
+                conn,
+            )
+        except Exception:
+            return pd.DataFrame()
     
     if not df.empty:
         # Format name to include Riot ID if available
-        df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
+        df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
         df = df.drop(columns=['riot_id'])
         df['kd_ratio'] = df['total_kills'] / df['total_deaths'].replace(0, 1)
         df['avg_acs'] = df['avg_acs'].round(1)
         df['kd_ratio'] = df['kd_ratio'].round(2)
     return df.sort_values('avg_acs', ascending=False)
 
+def _apply_bo1_scores(df):
+    # For BO1, if we have map rounds, use them as the primary scores for display
+    if df.empty or 'team1_rounds' not in df.columns:
+        return df
+    # Missing format counts as BO1; one string pass instead of astype(str) + isna
+    is_bo1 = df['format'].fillna('BO1').str.upper().eq('BO1')
+    m1 = is_bo1 & df['team1_rounds'].notna()
+    m2 = is_bo1 & df['team2_rounds'].notna()
+    # Ensure integer type for scores to avoid .0 display
+    df['score_t1'] = df['team1_rounds'].where(m1, df['score_t1']).astype(int)
+    df['score_t2'] = df['team2_rounds'].where(m2, df['score_t2']).astype(int)
+    return df
+
 @st.cache_data(ttl=60)
 def get_week_matches(week):
-    conn = get_conn()
-    df = pd.read_sql_query(
-        """
-        SELECT m.id, m.week, m.group_name, m.status, m.format, m.maps_played, m.is_forfeit,
-               t1.name as t1_name, t2.name as t2_name,
-               m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
-               mm.team1_rounds, mm.team2_rounds
-        FROM matches m
-        JOIN teams t1 ON m.team1_id = t1.id
-        JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-        WHERE m.week = ? AND m.match_type = 'regular'
-        ORDER BY m.id
-        """,
-        conn,
-        params=(week,),
-    )
-    # For BO1, if we have map rounds, use them as the primary scores for display
-    if not df.empty and 'team1_rounds' in df.columns:
-        is_bo1 = (df['format'].str.upper() == 'BO1') | (df['format'].isna())
-        df.loc[is_bo1 & df['team1_rounds'].notna(), 'score_t1'] = df.loc[is_bo1 & df['team1_rounds'].notna(), 'team1_rounds']
-        df.loc[is_bo1 & df['team2_rounds'].notna(), 'score_t2'] = df.loc[is_bo1 & df['team2_rounds'].notna(), 'team2_rounds']
-        
-        # Ensure integer type for scores to avoid .0 display
-        df['score_t1'] = df['score_t1'].astype(int)
-        df['score_t2'] = df['score_t2'].astype(int)
-    conn.close()
+    with _dbconn() as conn:
+        df = pd.read_sql_query(
+            """
+            SELECT m.id, m.week, m.group_name, m.status, m.format, m.maps_played, m.is_forfeit,
+                   t1.name as t1_name, t2.name as t2_name,
+                   m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
+                   mm.team1_rounds, mm.team2_rounds
+            FROM matches m
+            JOIN teams t1 ON m.team1_id = t1.id
+            JOIN teams t2 ON m.team2_id = t2.id
+            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+            WHERE m.week = ? AND m.match_type = 'regular'
+            ORDER BY m.id
+            """,
+            conn,
+            params=(week,),
+        )
+        df = _downcast_ints(_apply_bo1_scores(df))
     return df
 
 @st.cache_data(ttl=300)
 def get_playoff_matches():
-    conn = get_conn()
-    df = pd.read_sql_query(
-        """
-        SELECT m.id, m.playoff_round, m.bracket_pos, m.status, m.format, m.maps_played, m.is_forfeit,
-               m.bracket_label,
-               t1.name as t1_name, t2.name as t2_name,
-               m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
-               m.winner_id,
-               mm.team1_rounds, mm.team2_rounds
-        FROM matches m
-        LEFT JOIN teams t1 ON m.team1_id = t1.id
-        LEFT JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-        WHERE m.match_type = 'playoff'
-        ORDER BY m.playoff_round ASC, m.bracket_pos ASC
-        """,
-        conn
-    )
-    # For BO1, if we have map rounds, use them as the primary scores for display
-    if not df.empty and 'team1_rounds' in df.columns:
-        is_bo1 = (df['format'].str.upper() == 'BO1') | (df['format'].isna())
-        df.loc[is_bo1 & df['team1_rounds'].notna(), 'score_t1'] = df.loc[is_bo1 & df['team1_rounds'].notna(), 'team1_rounds']
-        df.loc[is_bo1 & df['team2_rounds'].notna(), 'score_t2'] = df.loc[is_bo1 & df['team2_rounds'].notna(), 'team2_rounds']
-        
-        # Ensure integer type for scores to avoid .0 display
-        df['score_t1'] = df['score_t1'].astype(int)
-        df['score_t2'] = df['score_t2'].astype(int)
-    conn.close()
+    with _dbconn() as conn:
+        df = pd.read_sql_query(
+            """
+            SELECT m.id, m.playoff_round, m.bracket_pos, m.status, m.format, m.maps_played, m.is_forfeit,
+                   m.bracket_label,
+                   t1.name as t1_name, t2.name as t2_name,
+                   m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
+                   m.winner_id,
+                   mm.team1_rounds, mm.team2_rounds
+            FROM matches m
+            LEFT JOIN teams t1 ON m.team1_id = t1.id
+            LEFT JOIN teams t2 ON m.team2_id = t2.id
+            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+            WHERE m.match_type = 'playoff'
+            ORDER BY m.playoff_round ASC, m.bracket_pos ASC
+            """,
+            conn
+        )
+        df = _apply_bo1_scores(df)
+        # Editor select labels built once per cache fill instead of on every rerun
+        df['opt_label'] = "R" + df['playoff_round'].astype(str) + " P" + df['bracket_pos'].astype(str) + ": " + df['t1_name'].fillna('') + " vs " + df['t2_name'].fillna('')
     return df
 
 @st.cache_data(ttl=300)
 def get_match_maps(match_id):
-    conn = get_conn()
-    df = pd.read_sql_query(
-        "SELECT map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit FROM match_maps WHERE match_id=? ORDER BY map_index",
-        conn,
-        params=(match_id,),
-    )
-    conn.close()
-    return df
+    with _dbconn() as conn:
+        df = _fast_read(
+            conn,
+            "SELECT map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit FROM match_maps WHERE match_id=? ORDER BY map_index",
+            (match_id,),
+        )
+    return _downcast_ints(df)
 
 @st.cache_data(ttl=300)
-def get_all_players_directory(format_names=True):
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
-            """
-            SELECT p.id, p.name, p.riot_id, p.rank, t.name as team
-            FROM players p
-            LEFT JOIN teams t ON p.default_team_id = t.id
-            ORDER BY p.name
-            """,
-            conn
+def get_match_ids_with_maps():
+    # Negative cache: matches absent here have no map rows, so their lookups can be skipped
+    with _dbconn() as conn:
+        try:
+            ids = frozenset(r[0] for r in conn.execute("SELECT DISTINCT match_id FROM match_maps").fetchall())
+        except Exception:
+            ids = frozenset()
+    return ids
+
+@st.cache_data(ttl=300)
+def get_match_maps_bulk(match_ids):
+    # One IN (...) query for a whole list of matches instead of get_match_maps per row
+    cols = "match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit"
+    if not match_ids:
+        return pd.DataFrame(columns=cols.split(", "))
+    placeholders = ",".join("?" * len(match_ids))
+    with _dbconn() as conn:
+        df = _fast_read(
+            conn,
+            f"SELECT {cols} FROM match_maps WHERE match_id IN ({placeholders}) ORDER BY match_id, map_index",
+            tuple(int(x) for x in match_ids),
         )
-    except Exception:
-        df = pd.DataFrame(columns=['id','name','riot_id','rank','team'])
-    finally:
-        conn.close()
-    
-    if not df.empty and format_names:
-        df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-    
-    return df
+    return _downcast_ints(df)
+
+@st.cache_data(ttl=300)
+def get_all_players_directory(format_names=True, search=None, ranks=None):
+    # ranks filter in SQL, search in pandas (SQLite's lower() only folds ASCII); each distinct query is one cached result set
+    clauses, params = [], []
+    if ranks is not None:
+        if not ranks:
+            return pd.DataFrame(columns=['id','name','riot_id','rank','team'])
+        clauses.append(f"COALESCE(p.rank, 'Unranked') IN ({','.join('?' * len(ranks))})")
+        params += list(ranks)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                f"""
+                SELECT p.id, p.name, p.riot_id, p.rank, t.name as team
+                FROM players p
+                LEFT JOIN teams t ON p.default_team_id = t.id
+                {where}
+                ORDER BY p.name
+                """,
+                conn,
+                params=tuple(params)
+            )
+        except Exception:
+            df = pd.DataFrame(columns=['id','name','riot_id','rank','team'])
+        
+        if search and not df.empty:
+            s = search.lower()
+            df = df[
+                df['name'].fillna('').astype(str).str.lower().str.contains(s, regex=False) |
+                df['riot_id'].fillna('').astype(str).str.lower().str.contains(s, regex=False)
+            ].reset_index(drop=True)
+        
+        if not df.empty and format_names:
+            df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
+        
+        return df
 
 @st.cache_data(ttl=300)
 def get_map_stats(match_id, map_index, team_id):
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
-            """
-            SELECT p.name, p.riot_id, ms.agent, ms.acs, ms.kills, ms.deaths, ms.assists, ms.is_sub 
-            FROM match_stats_map ms 
-            JOIN players p ON ms.player_id=p.id 
-            WHERE ms.match_id=? AND ms.map_index=? AND ms.team_id=?
-            """, 
-            conn, 
-            params=(int(match_id), int(map_index), int(team_id))
-        )
-        if not df.empty:
-            df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-            df = df.drop(columns=['riot_id'])
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                """
+                SELECT p.name, p.riot_id, ms.agent, ms.acs, ms.kills, ms.deaths, ms.assists, ms.is_sub 
+                FROM match_stats_map ms 
+                JOIN players p ON ms.player_id=p.id 
+                WHERE ms.match_id=? AND ms.map_index=? AND ms.team_id=?
+                """, 
+                conn, 
+                params=(int(match_id), int(map_index), int(team_id))
+            )
+            if not df.empty:
+                df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
+                df = _downcast_ints(df.drop(columns=['riot_id']), _STAT_INT_COLS)
+        except Exception:
+            df = pd.DataFrame()
     return df
 
 @st.cache_data(ttl=300)
 def get_team_history_counts():
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query(
-            "SELECT team_id, COUNT(DISTINCT season_id) as season_count FROM team_history GROUP BY team_id",
-            conn,
-        )
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql_query(
+                "SELECT team_id, COUNT(DISTINCT season_id) as season_count FROM team_history GROUP BY team_id",
+                conn,
+            )
+        except Exception:
+            df = pd.DataFrame()
     return df
 
-@st.cache_data(ttl=300)
+@st.cache_resource(ttl=300)
 def get_all_players():
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT id, name, riot_id, rank, default_team_id FROM players ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = _fast_read(conn, "SELECT id, name, riot_id, rank, default_team_id FROM players ORDER BY name")
+        except Exception:
+            df = pd.DataFrame()
     return df
 
 @st.cache_data(ttl=300)
 def get_teams_list_full():
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT id, name, tag, group_name, logo_path FROM teams ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = _fast_read(conn, "SELECT id, name, tag, group_name, logo_path FROM teams ORDER BY name")
+        except Exception:
+            df = pd.DataFrame()
     return df
 
 @st.cache_data(ttl=300)
@@ -437,44 +537,52 @@ def get_teams_list():
 
 @st.cache_data(ttl=3600)
 def get_agents_list():
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT name FROM agents ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df['name'].tolist() if not df.empty else []
+    with _dbconn() as conn:
+        try:
+            agents = [r[0] for r in conn.execute("SELECT name FROM agents ORDER BY name").fetchall()]
+        except Exception:
+            agents = []
+    return agents
 
 @st.cache_data(ttl=300)
 def get_match_weeks():
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query("SELECT DISTINCT week FROM matches ORDER BY week", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df['week'].tolist() if not df.empty else []
+    with _dbconn() as conn:
+        try:
+            weeks = [r[0] for r in conn.execute("SELECT DISTINCT week FROM matches ORDER BY week").fetchall()]
+        except Exception:
+            weeks = []
+    return weeks
 
 @st.cache_data(ttl=300)
 def get_latest_played_week():
-    conn = get_conn()
-    try:
-        # Get the max week that has at least one completed match
-        res = conn.execute("SELECT MAX(week) FROM matches WHERE status='completed'").fetchone()
-        if res and res[0]:
-            return int(res[0])
-    except Exception:
-        pass
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            # Get the max week that has at least one completed match
+            res = conn.execute("SELECT MAX(week) FROM matches WHERE status='completed'").fetchone()
+            if res and res[0]:
+                return int(res[0])
+        except Exception:
+            pass
     return 1 # Default to week 1 if no matches played
 
-@st.cache_data(ttl=300)
+@st.cache_resource(ttl=300)
 def get_completed_matches():
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT * FROM matches WHERE status='completed'", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df
+    with _dbconn() as conn:
+        try:
+            # Only the fields the Home / Predictor pages read
+            df = _fast_read(
+                conn,
+                "SELECT id, week, group_name, team1_id, team2_id, winner_id, score_t1, score_t2, format, is_forfeit "
+                "FROM matches WHERE status='completed'"
+            )
+        except Exception:
+            df = pd.DataFrame()
+    return _downcast_ints(df)
+
+def get_data_version(matches_df):
+    # Content hash of a get_completed_matches snapshot, taken from the frame itself so a
+    # helper keyed on it can never store a stale frame under a fresh key
+    if matches_df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(matches_df, index=False).sum())
 
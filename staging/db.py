@@ -1,10 +1,19 @@
 import sqlite3
 import os
+import threading
+import queue
+from contextlib import contextmanager
+from pathlib import Path
 import streamlit as st
 import pandas as pd
 from .config import ROOT_DIR, CURRENT_DIR
 from .utils import get_secret
 
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 # Use data folder for database
 DEFAULT_DB_PATH = os.path.join(ROOT_DIR, "data", "valorant_s23.db")
 SECRET_DB_PATH = get_secret("DB_PATH")
@@ -44,6 +53,21 @@ def get_postgres_conn(host, database, user, password):
         password=password
     )
 
+def _tune_sqlite(conn):
+    # WAL + NORMAL: a single-writer app doesn't need two fsyncs per commit.
+    # journal_mode is persisted in the file, so after the first open this is a no-op.
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError:
+        pass
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Wait out a concurrent writer instead of failing with "database is locked"
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
 def get_conn():
     # Phase 1: Cloud DB Support
     cloud_type = get_secret("CLOUD_DB_TYPE")
@@ -82,7 +106,79 @@ def get_conn():
 
     # Ensure directory exists
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    return _tune_sqlite(sqlite3.connect(DB_PATH))
+
+_thread_local = threading.local()
+
+def get_thread_conn():
+    # Long-lived per-thread SQLite connection so hot lookups (auth) reuse
+    # sqlite3's prepared-statement cache. Callers hand it back via release_thread_conn.
+    if get_secret("CLOUD_DB_TYPE"):
+        return get_conn()
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = _tune_sqlite(sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=512))
+        _thread_local.conn = conn
+    return conn
+
+def release_thread_conn(conn):
+    # Close what get_thread_conn handed out on the cloud path; the cached per-thread SQLite handle stays open
+    if conn is not None and conn is not getattr(_thread_local, "conn", None):
+        conn.close()
+
+# Process-wide read connection shared by the cached query helpers; the lock
+# serializes use across Streamlit sessions since one sqlite3 handle isn't reentrant.
+DB_POOL_LOCK = threading.RLock()
+
+# Multi-statement saves run on their own connections; one writer at a time
+# keeps concurrent sessions from queueing on SQLite's file lock.
+DB_WRITE_LOCK = threading.Lock()
+
+@st.cache_resource
+def get_pooled_conn():
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    return _tune_sqlite(sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=512))
+
+# Read-only connections for the cached query helpers. Under WAL they read a
+# committed snapshot, so page reads don't queue behind a write holding DB_POOL_LOCK.
+READER_POOL_SIZE = 4
+
+@st.cache_resource
+def get_reader_pool():
+    return queue.LifoQueue(maxsize=READER_POOL_SIZE)
+
+@contextmanager
+def reader_conn():
+    pool = get_reader_pool()
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        uri = Path(os.path.abspath(DB_PATH)).as_uri() + "?mode=ro"
+        conn = _tune_sqlite(sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=512))
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@contextmanager
+def pooled_write_conn():
+    # Short write transaction on the pooled connection: commits on success, rolls back on error
+    if get_secret("CLOUD_DB_TYPE"):
+        conn = get_conn()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+        return
+    with DB_POOL_LOCK:
+        conn = get_pooled_conn()
+        with conn:
+            yield conn
 
 def init_admin_table(conn=None):
     should_close = False
@@ -96,10 +192,15 @@ def init_admin_table(conn=None):
             username TEXT UNIQUE NOT NULL,
             password_hash BLOB NOT NULL,
             salt BLOB NOT NULL,
-            is_active INTEGER NOT NULL DEFAULT 1
+            is_active INTEGER NOT NULL DEFAULT 1,
+            hash_scheme TEXT DEFAULT 'pbkdf2'
         )
         """
     )
+    try:
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_admins_user_active ON admins(username, is_active)")
+    except Exception:
+        pass
     if should_close:
         conn.commit()
         conn.close()
@@ -250,6 +351,7 @@ def ensure_upgrade_schema(conn=None):
     ensure_column("matches", "maps_played", "maps_played INTEGER DEFAULT 0", conn=conn)
     ensure_column("seasons", "is_active", "is_active BOOLEAN DEFAULT 0", conn=conn)
     ensure_column("admins", "role", "role TEXT DEFAULT 'admin'", conn=conn)
+    ensure_column("admins", "hash_scheme", "hash_scheme TEXT DEFAULT 'pbkdf2'", conn=conn)
     ensure_column("matches", "match_type", "match_type TEXT DEFAULT 'regular'", conn=conn)
     ensure_column("matches", "playoff_round", "playoff_round INTEGER", conn=conn)
     ensure_column("matches", "bracket_pos", "bracket_pos INTEGER", conn=conn)
@@ -268,6 +370,31 @@ def ensure_upgrade_schema(conn=None):
         c.execute("INSERT OR IGNORE INTO team_history (team_id, season_id, group_name) SELECT id, 23, group_name FROM teams")
     except Exception:
         pass
+    # Map saves upsert ON CONFLICT(match_id, map_index), so this index is required: build it once and let failures surface
+    if not c.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='ux_match_maps_mm'").fetchone():
+        # Keep the newest row per (match, map) so the unique index can be built
+        c.execute("DELETE FROM match_maps WHERE id NOT IN (SELECT MAX(id) FROM match_maps GROUP BY match_id, map_index)")
+        c.execute("CREATE UNIQUE INDEX ux_match_maps_mm ON match_maps(match_id, map_index)")
+    try:
+        # Indexes backing the completed-match aggregations (leaderboard, profile, subs log, map stats)
+        c.execute("CREATE INDEX IF NOT EXISTS ix_msm_player_match ON match_stats_map(player_id, match_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_msm_match_map_team ON match_stats_map(match_id, map_index, team_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_m_status_type ON matches(status, match_type)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_players_rank ON players(rank)")
+        # Lets get_match_weeks' SELECT DISTINCT week walk the index instead of the table
+        c.execute("CREATE INDEX IF NOT EXISTS ix_matches_week ON matches(week)")
+    except Exception:
+        pass
+    # Case-insensitive uniqueness for player names and riot ids, matching the editors' strip/lower checks.
+    # Each index is skipped while legacy duplicates remain; Cleanup Duplicate Players merges them.
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_players_name_lc ON players(LOWER(TRIM(name)))")
+    except Exception:
+        pass
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_players_riot_lc ON players(LOWER(TRIM(riot_id))) WHERE riot_id IS NOT NULL AND TRIM(riot_id) != ''")
+    except Exception:
+        pass
     
     if should_close:
         conn.commit()
@@ -300,18 +427,20 @@ def init_match_stats_map_table(conn=None):
         conn.commit()
         conn.close()
 
-def import_sqlite_db(upload_bytes):
-    import tempfile
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+def import_sqlite_db_path(src_path):
+    src = sqlite3.connect(src_path)
+    tgt = get_conn()
+    tables = [
+        "teams","players","matches","match_maps","match_stats_map","match_stats","agents","seasons","team_history"
+    ]
+    summary = {}
+    # Bulk-load settings: one transaction, no fsync per statement
+    tgt.execute("PRAGMA journal_mode=WAL")
+    tgt.execute("PRAGMA synchronous=OFF")
+    tgt.execute("PRAGMA temp_store=MEMORY")
+    tgt.execute("PRAGMA cache_size=-65536")
+    tgt.execute("BEGIN")
     try:
-        tmp.write(upload_bytes)
-        tmp.flush()
-        src = sqlite3.connect(tmp.name)
-        tgt = get_conn()
-        tables = [
-            "teams","players","matches","match_maps","match_stats_map","match_stats","agents","seasons","team_history"
-        ]
-        summary = {}
         for t in tables:
             try:
                 df = pd.read_sql(f"SELECT * FROM {t}", src)
@@ -324,13 +453,35 @@ def import_sqlite_db(upload_bytes):
             if not use:
                 continue
             q = f"INSERT OR REPLACE INTO {t} (" + ",".join(use) + ") VALUES (" + ",".join(["?"]*len(use)) + ")"
-            vals = df[use].values.tolist()
-            tgt.executemany(q, vals)
-            summary[t] = len(vals)
+            if t == "players" and "id" in use:
+                # Upsert on id only: REPLACE would let the unique name / riot id indexes delete a local player
+                # with a different id and orphan their stats; such a collision now fails the whole import instead
+                upd = ",".join(f"{c}=excluded.{c}" for c in use if c != "id")
+                q = f"INSERT INTO {t} (" + ",".join(use) + ") VALUES (" + ",".join(["?"]*len(use)) + ") ON CONFLICT(id) DO " + (f"UPDATE SET {upd}" if upd else "NOTHING")
+            tgt.executemany(q, df[use].itertuples(index=False, name=None))
+            summary[t] = len(df)
         tgt.commit()
+    except Exception:
+        tgt.rollback()
+        raise
+    finally:
         src.close()
         tgt.close()
-        return summary
+    return summary
+
+def import_sqlite_db(upload):
+    # Accepts raw bytes or a file-like upload; file objects are copied to disk in chunks
+    import tempfile
+    import shutil
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    try:
+        if isinstance(upload, (bytes, bytearray, memoryview)):
+            tmp.write(upload)
+        else:
+            upload.seek(0)
+            shutil.copyfileobj(upload, tmp, 1 << 20)
+        tmp.flush()
+        return import_sqlite_db_path(tmp.name)
     finally:
         tmp.close()
         if os.path.exists(tmp.name):
@@ -339,7 +490,16 @@ def import_sqlite_db(upload_bytes):
             except Exception:
                 pass
 
+def checkpoint_wal():
+    # Fold WAL frames back into the main file before it is read or replaced as raw bytes
+    try:
+        with DB_POOL_LOCK:
+            get_pooled_conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except Exception:
+        pass
+
 def export_db_bytes():
+    checkpoint_wal()
     p = os.path.abspath(DB_PATH)
     try:
         if os.path.exists(p):
@@ -349,6 +509,30 @@ def export_db_bytes():
         return None
     return None
 
+def export_db_b64(chunk_size=3 * 65536):
+    # Base64-encode the DB file chunk by chunk into a preallocated buffer.
+    # chunk_size must be a multiple of 3 so no padding lands mid-stream.
+    checkpoint_wal()
+    p = os.path.abspath(DB_PATH)
+    try:
+        if not os.path.exists(p):
+            return None
+        size = os.path.getsize(p)
+        out = bytearray((size + 2) // 3 * 4)
+        pos = 0
+        with open(p, 'rb', buffering=1 << 20) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                enc = _b64encode(chunk)
+                out[pos:pos + len(enc)] = enc
+                pos += len(enc)
+        del out[pos:]
+        return out.decode("ascii")
+    except Exception:
+        return None
+
 def reset_db():
     conn = get_conn()
     c = conn.cursor()
@@ -1,9 +1,28 @@
 import os
 import streamlit as st
 import requests
-import base64
+import hashlib
+import json
+import pandas as pd
+from functools import lru_cache
 from .config import ROOT_DIR
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
+# Shared keep-alive session for GitHub calls: repeated fetch/backup requests reuse the TLS connection
+_gh_session = requests.Session()
+_gh_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=1))
+# url -> (ETag, parsed JSON) so repeat match pulls can be answered with a 304
+_gh_match_cache = {}
+
 def get_secret(key, default=None):
     # Try direct access first
     if key in st.secrets:
@@ -60,7 +79,9 @@ def get_visitor_ip():
         st.session_state['pseudo_ip'] = f"tmp_{uuid.uuid4().hex[:8]}"
     return st.session_state['pseudo_ip']
 
-@st.cache_data(ttl=3600)
+# sha1(image bytes) -> base64 string, shared across paths
+_b64_by_hash = {}
+
 def get_base64_image(image_path):
     if not image_path:
         return None
@@ -71,14 +92,57 @@ def get_base64_image(image_path):
     else:
         full_path = image_path
 
-    if not os.path.exists(full_path):
+    try:
+        mtime = os.path.getmtime(full_path)
+    except OSError:
         return None
-        
+    # Keyed on mtime so a replaced logo is re-encoded instead of served stale for the TTL
+    return _encode_image_b64(full_path, mtime)
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _encode_image_b64(full_path, mtime):
     try:
         with open(full_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+            data = f.read()
     except Exception:
         return None
+    # Same bytes under a different path/version suffix reuse the encoded string
+    h = hashlib.sha1(data).digest()
+    enc = _b64_by_hash.get(h)
+    if enc is None:
+        if len(_b64_by_hash) >= 256:
+            _b64_by_hash.clear()
+        enc = _b64_by_hash[h] = _b64encode(data).decode()
+    return enc
+
+def load_json_bytes(raw):
+    """
+    Parses a JSON document from bytes/str, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+@lru_cache(maxsize=64)
+def _parse_match_file(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return load_json_bytes(f.read())
+
+def load_match_json_file(path):
+    # Re-applying the same match reuses the parsed document until the file changes on disk
+    st_ = os.stat(path)
+    return _parse_match_file(path, st_.st_mtime_ns, st_.st_size)
+
+def _with_etag(url, headers):
+    cached = _gh_match_cache.get(url)
+    return {**headers, "If-None-Match": cached[0]} if cached else headers
+
+def _remember_match(url, r):
+    data = load_json_bytes(r.content)
+    etag = r.headers.get("ETag")
+    if etag:
+        _gh_match_cache[url] = (etag, data)
+    return data
 
 def fetch_match_from_github(match_id):
     """
@@ -100,9 +164,11 @@ def fetch_match_from_github(match_id):
             "Accept": "application/vnd.github.raw"
         }
         try:
-            r = requests.get(url, headers=headers, timeout=10)
+            r = _gh_session.get(url, headers=_with_etag(url, headers), timeout=10)
+            if r.status_code == 304:
+                return _gh_match_cache[url][1], None
             if r.status_code == 200:
-                return r.json(), None
+                return _remember_match(url, r), None
             else:
                 return None, f"GitHub API error: {r.status_code}"
         except Exception as e:
@@ -111,9 +177,11 @@ def fetch_match_from_github(match_id):
         # Fallback to public raw URL
         raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/assets/matches/match_{match_id}.json"
         try:
-            r = requests.get(raw_url, timeout=10)
+            r = _gh_session.get(raw_url, headers=_with_etag(raw_url, {}), timeout=10)
+            if r.status_code == 304:
+                return _gh_match_cache[raw_url][1], None
             if r.status_code == 200:
-                return r.json(), None
+                return _remember_match(raw_url, r), None
             else:
                 return None, f"GitHub file not found (Status: {r.status_code})"
         except Exception as e:
@@ -132,14 +200,15 @@ def backup_db_to_github():
         return False, "GitHub configuration missing (GH_OWNER/GH_REPO/GH_TOKEN)"
         
     # Get DB Path
-    from .db import DB_PATH
+    from .db import DB_PATH, export_db_b64
     
     if not os.path.exists(DB_PATH):
         return False, "Database file not found."
         
     try:
-        with open(DB_PATH, "rb") as f:
-            content = f.read()
+        content_b64 = export_db_b64()
+        if not content_b64:
+            return False, "Database file could not be read."
             
         # Get current SHA of the file if it exists
         url = f"https://api.github.com/repos/{owner}/{repo}/contents/data/valorant_s23.db"
@@ -149,20 +218,20 @@ def backup_db_to_github():
         }
         
         sha = None
-        r_get = requests.get(url, headers=headers)
+        r_get = _gh_session.get(url, headers=headers)
         if r_get.status_code == 200:
             sha = r_get.json().get("sha")
             
         # Create/Update file
         data = {
             "message": "Automated DB Backup from Admin Panel",
-            "content": base64.b64encode(content).decode("utf-8"),
+            "content": content_b64,
             "branch": branch
         }
         if sha:
             data["sha"] = sha
             
-        r_put = requests.put(url, headers=headers, json=data)
+        r_put = _gh_session.put(url, headers=headers, json=data)
         
         if r_put.status_code in [200, 201]:
             return True, "Backup successful!"
@@ -172,16 +241,29 @@ def backup_db_to_github():
     except Exception as e:
         return False, f"Backup error: {str(e)}"
 
+def vec_escape(s):
+    # Column-wise html.escape (quote=True): one pass per entity instead of a Python call per cell
+    return (s.fillna('').astype(str)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False)
+            .str.replace('"', '&quot;', regex=False)
+            .str.replace("'", '&#x27;', regex=False))
+
+def _stat_value(stats, key):
+    # Tracker stat lookup without allocating empty-dict defaults for missing keys
+    v = stats.get(key) if stats else None
+    return v.get("value", 0) if v else 0
+
 def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
     """
     Parses Tracker.gg JSON data and matches it to team1_id and team2_id.
     Returns (json_suggestions, map_name, t1_rounds, t2_rounds)
     """
-    import re
-    import pandas as pd
-    
     json_suggestions = {}
-    segments = jsdata.get("data", {}).get("segments", [])
+    # Tracker's payload shape is fixed: resolve the "data" node once
+    data = jsdata.get("data") or {}
+    segments = data.get("segments", [])
     
     # First pass: find team names/IDs to identify which Tracker team is which
     tracker_team_1_id = None
@@ -195,6 +277,27 @@ def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
         # Also map name -> name for fallback
         name_to_name = {str(n).strip().lower(): str(n) for n in all_players_df['name'] if pd.notna(n)}
 
+    # Single pass over player segments, pulling the needed fields into parallel columns
+    # p_lows holds the lower-cased riot id, reused by the roster matching and the suggestion keys
+    p_rids, p_lows, p_tids, p_agents, p_acs, p_k, p_d, p_a = [], [], [], [], [], [], [], []
+    for seg in segments:
+        if seg.get("type") != "player-summary":
+            continue
+        md = seg.get("metadata")
+        pi = md.get("platformInfo") if md else None
+        stats = seg.get("stats")
+        # Tracker sometimes puts the name in platformUserHandle or platformUserIdentifier
+        rid = (pi.get("platformUserIdentifier") or pi.get("platformUserHandle")) if pi else None
+        rid = str(rid).strip() if rid else None
+        p_rids.append(rid)
+        p_lows.append(rid.lower() if rid else None)
+        p_tids.append(md.get("teamId") if md else None)
+        p_agents.append(md.get("agentName") if md else None)
+        p_acs.append(_stat_value(stats, "scorePerRound"))
+        p_k.append(_stat_value(stats, "kills"))
+        p_d.append(_stat_value(stats, "deaths"))
+        p_a.append(_stat_value(stats, "assists"))
+
     if len(team_segments) >= 2:
         # Use Riot IDs to match teams
         t1_id_int = int(team1_id) if team1_id is not None else None
@@ -202,31 +305,29 @@ def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
         
         # Team 1 Roster
         t1_roster_df = all_players_df[all_players_df['default_team_id'] == t1_id_int]
-        t1_rids = [str(r).strip().lower() for r in t1_roster_df['riot_id'].dropna()]
-        t1_names = [str(n).strip().lower() for n in t1_roster_df['name'].dropna()]
-        t1_names_clean = [n.replace('@', '').strip() for n in t1_names]
+        t1_rids = {str(r).strip().lower() for r in t1_roster_df['riot_id'].dropna()}
+        t1_names = {str(n).strip().lower() for n in t1_roster_df['name'].dropna()}
+        t1_names_clean = {n.replace('@', '').strip() for n in t1_names}
         
         # Team 2 Roster
         t2_roster_df = all_players_df[all_players_df['default_team_id'] == t2_id_int]
-        t2_rids = [str(r).strip().lower() for r in t2_roster_df['riot_id'].dropna()]
-        t2_names = [str(n).strip().lower() for n in t2_roster_df['name'].dropna()]
-        t2_names_clean = [n.replace('@', '').strip() for n in t2_names]
+        t2_rids = {str(r).strip().lower() for r in t2_roster_df['riot_id'].dropna()}
+        t2_names = {str(n).strip().lower() for n in t2_roster_df['name'].dropna()}
+        t2_names_clean = {n.replace('@', '').strip() for n in t2_names}
         
         team_ids_in_json = [ts.get("attributes", {}).get("teamId") for ts in team_segments]
         
         # Count matches for each Tracker team against our rosters
-        # score[tracker_team_id][db_team_id]
-        scores = {tid: {1: 0, 2: 0} for tid in team_ids_in_json}
+        # s<tracker slot><db team slot>: s00 = tracker team 0 vs db team 1, etc.
+        tid0, tid1 = team_ids_in_json[0], team_ids_in_json[1]
+        s00 = s01 = s10 = s11 = 0
         
-        for p_seg in [s for s in segments if s.get("type") == "player-summary"]:
-            t_id = p_seg.get("metadata", {}).get("teamId")
-            if t_id in scores:
-                rid = p_seg.get("metadata", {}).get("platformInfo", {}).get("platformUserIdentifier")
-                if not rid: rid = p_seg.get("metadata", {}).get("platformInfo", {}).get("platformUserHandle")
-                
-                if rid:
-                    rid_clean = str(rid).strip().lower()
-                    name_part = rid_clean.split('#')[0]
+        for t_id, rid_clean in zip(p_tids, p_lows):
+            in0 = t_id == tid0
+            in1 = t_id == tid1
+            if in0 or in1:
+                if rid_clean:
+                    name_part = rid_clean.partition('#')[0]
                     
                     # Match vs Team 1
                     is_t1 = rid_clean in t1_rids or rid_clean in t1_names or name_part in t1_names or name_part in t1_names_clean
@@ -236,7 +337,9 @@ def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
                             if name_part in tn or tn in name_part:
                                 is_t1 = True
                                 break
-                    if is_t1: scores[t_id][1] += 1
+                    if is_t1:
+                        if in0: s00 += 1
+                        if in1: s10 += 1
                     
                     # Match vs Team 2
                     is_t2 = rid_clean in t2_rids or rid_clean in t2_names or name_part in t2_names or name_part in t2_names_clean
@@ -246,13 +349,15 @@ def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
                             if name_part in tn or tn in name_part:
                                 is_t2 = True
                                 break
-                    if is_t2: scores[t_id][2] += 1
+                    if is_t2:
+                        if in0: s01 += 1
+                        if in1: s11 += 1
         
         # Decision logic:
         # Option A: TrackerTeam0 is Team 1, TrackerTeam1 is Team 2
-        score_a = scores[team_ids_in_json[0]][1] + scores[team_ids_in_json[1]][2]
+        score_a = s00 + s11
         # Option B: TrackerTeam0 is Team 2, TrackerTeam1 is Team 1
-        score_b = scores[team_ids_in_json[0]][2] + scores[team_ids_in_json[1]][1]
+        score_b = s01 + s10
         
         if score_a >= score_b and score_a > 0:
             tracker_team_1_id = team_ids_in_json[0]
@@ -267,64 +372,39 @@ def parse_tracker_json(jsdata, team1_id, team2_id, all_players_df):
         else:
             tracker_team_1_id = None
 
-    for seg in segments:
-        if seg.get("type") == "player-summary":
-            metadata = seg.get("metadata", {})
-            platform_info = metadata.get("platformInfo", {})
-            rid = platform_info.get("platformUserIdentifier")
-            
-            # Tracker sometimes puts the name in platformUserHandle or platformUserIdentifier
-            if not rid:
-                rid = platform_info.get("platformUserHandle")
-            
-            if rid:
-                rid = str(rid).strip()
-            
-            agent = metadata.get("agentName")
-            st_map = seg.get("stats", {})
-            acs = st_map.get("scorePerRound", {}).get("value", 0)
-            k = st_map.get("kills", {}).get("value", 0)
-            d = st_map.get("deaths", {}).get("value", 0)
-            a = st_map.get("assists", {}).get("value", 0)
-            t_id = metadata.get("teamId")
-            
-            our_team_num = 1 if t_id == tracker_team_1_id else 2
+    for rid, rid_lower, t_id, agent, acs, k, d, a in zip(p_rids, p_lows, p_tids, p_agents, p_acs, p_k, p_d, p_a):
+        our_team_num = 1 if t_id == tracker_team_1_id else 2
+        
+        if rid:
+            name_part = rid_lower.partition('#')[0]
+            # Direct Riot ID match first, then the name part of rid (if it's Name#Tag) or rid itself against DB names
+            matched_name = riot_id_to_name.get(rid_lower) or name_to_name.get(name_part) or name_to_name.get(rid_lower)
             
-            if rid:
-                rid_lower = rid.lower()
-                # Try to find a match in our DB if direct match fails
-                matched_name = riot_id_to_name.get(rid_lower)
-                
-                # If still no match, try matching the name part of rid (if it's Name#Tag) or rid itself against DB names
-                if not matched_name:
-                    name_part = rid.split('#')[0].lower()
-                    matched_name = name_to_name.get(name_part) or name_to_name.get(rid_lower)
-                
-                # Store by riot_id but also provide the matched name if found
-                json_suggestions[rid_lower] = {
-                    'name': matched_name, # Found in DB or None
-                    'tracker_name': rid,  # Original name from Tracker
-                    'acs': int(acs) if acs is not None else 0, 
-                    'k': int(k) if k is not None else 0, 
-                    'd': int(d) if d is not None else 0, 
-                    'a': int(a) if a is not None else 0, 
-                    'agent': agent,
-                    'team_num': our_team_num,
-                    'conf': 100.0 if matched_name else 80.0
-                }
+            # Store by riot_id but also provide the matched name if found
+            json_suggestions[rid_lower] = {
+                'name': matched_name, # Found in DB or None
+                'tracker_name': rid,  # Original name from Tracker
+                'acs': int(acs) if acs is not None else 0, 
+                'k': int(k) if k is not None else 0, 
+                'd': int(d) if d is not None else 0, 
+                'a': int(a) if a is not None else 0, 
+                'agent': agent,
+                'team_num': our_team_num,
+                'conf': 100.0 if matched_name else 80.0
+            }
     
     # Extract map name and rounds
-    map_name = jsdata.get("data", {}).get("metadata", {}).get("mapName")
+    map_name = data.get("metadata", {}).get("mapName")
     t1_r = 0
     t2_r = 0
     
     if len(team_segments) >= 2:
+        r0 = _stat_value(team_segments[0].get("stats"), "roundsWon")
+        r1 = _stat_value(team_segments[1].get("stats"), "roundsWon")
         if tracker_team_1_id == team_segments[0].get("attributes", {}).get("teamId"):
-            t1_r = team_segments[0].get("stats", {}).get("roundsWon", {}).get("value", 0)
-            t2_r = team_segments[1].get("stats", {}).get("roundsWon", {}).get("value", 0)
+            t1_r, t2_r = r0, r1
         else:
-            t1_r = team_segments[1].get("stats", {}).get("roundsWon", {}).get("value", 0)
-            t2_r = team_segments[0].get("stats", {}).get("roundsWon", {}).get("value", 0)
+            t1_r, t2_r = r1, r0
             
     return json_suggestions, map_name, int(t1_r), int(t2_r)
 
@@ -3,12 +3,13 @@ import pandas as pd
 import json
 import os
 import re
+import sqlite3
 from ..data_access import (
     get_teams_list, get_all_players, get_match_weeks, get_completed_matches,
-    upsert_match_maps, get_conn, import_sqlite_db, export_db_bytes, reset_db,
+    upsert_match_maps, get_conn, DB_WRITE_LOCK, import_sqlite_db, export_db_bytes, reset_db,
     get_match_maps, get_team_history_counts, get_agents_list
 )
-from ..utils import parse_tracker_json, backup_db_to_github
+from ..utils import parse_tracker_json, backup_db_to_github, load_json_bytes, load_match_json_file
 from ..auth import create_admin_with_role
 
 def show_admin_panel():
@@ -86,18 +87,17 @@ def show_admin_matches():
                                 match_uuid = tracker_url.strip().split('/')[-1]
                                 json_path = os.path.join(os.getcwd(), "assets", "matches", f"match_{match_uuid}.json")
                                 
-                                if os.path.exists(json_path):
-                                    with open(json_path, 'r', encoding='utf-8') as f:
-                                        js_data = json.load(f)
+                                try:
+                                    js_data = load_match_json_file(json_path)
                                     st.info(f"Loaded match data from assets: match_{match_uuid}.json")
-                                else:
+                                except FileNotFoundError:
                                     st.warning(f"No local file found for ID: {match_uuid} (Checked: {json_path})")
                             except Exception as e:
                                 st.error(f"Error parsing URL: {e}")
                                 
                         if not js_data and uploaded_file:
                             try:
-                                js_data = json.load(uploaded_file)
+                                js_data = load_json_bytes(uploaded_file.getvalue())
                             except Exception as e:
                                 st.error(f"Invalid JSON file: {e}")
 
@@ -388,6 +388,7 @@ def parse_and_schedule(text, week):
                         )
                         count += 1
                 conn.commit()
+                st.cache_data.clear()
                 st.success(f"Successfully scheduled {count} new matches!")
             except Exception as e:
                 st.error(f"Database error: {e}")
@@ -395,109 +396,113 @@ def parse_and_schedule(text, week):
                 conn.close()
 
 def save_match_result(match_id, map_name, t1_rounds, t2_rounds, player_stats, match_info):
-    conn = get_conn()
-    try:
-        # Update Match
-        winner = match_info['team1_id'] if t1_rounds > t2_rounds else match_info['team2_id']
-        if t1_rounds == t2_rounds: winner = None # Draw
+    with DB_WRITE_LOCK:
+        conn = get_conn()
+        try:
+            # Update Match
+            winner = match_info['team1_id'] if t1_rounds > t2_rounds else match_info['team2_id']
+            if t1_rounds == t2_rounds: winner = None # Draw
         
-        conn.execute(
-            "UPDATE matches SET status='completed', score_t1=?, score_t2=?, winner_id=?, maps_played=1 WHERE id=?",
-            (t1_rounds, t2_rounds, winner, match_id)
-        )
+            conn.execute(
+                "UPDATE matches SET status='completed', score_t1=?, score_t2=?, winner_id=?, maps_played=1 WHERE id=?",
+                (t1_rounds, t2_rounds, winner, match_id)
+            )
         
-        # Update Map
-        conn.execute("DELETE FROM match_maps WHERE match_id=?", (match_id,))
-        conn.execute(
-            "INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id) VALUES (?, 0, ?, ?, ?, ?)",
-            (match_id, map_name, t1_rounds, t2_rounds, winner)
-        )
+            # Update Map
+            conn.execute("DELETE FROM match_maps WHERE match_id=?", (match_id,))
+            conn.execute(
+                "INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id) VALUES (?, 0, ?, ?, ?, ?)",
+                (match_id, map_name, t1_rounds, t2_rounds, winner)
+            )
         
-        # Update Stats
-        conn.execute("DELETE FROM match_stats_map WHERE match_id=?", (match_id,))
+            # Update Stats
+            conn.execute("DELETE FROM match_stats_map WHERE match_id=?", (match_id,))
         
-        # Get team rosters to determine missing players (for sub mapping)
-        # We need to find who is supposed to be playing but isn't
-        t1_roster_df = pd.read_sql("SELECT id FROM players WHERE default_team_id=?", conn, params=(match_info['team1_id'],))
-        t2_roster_df = pd.read_sql("SELECT id FROM players WHERE default_team_id=?", conn, params=(match_info['team2_id'],))
+            # Get team rosters to determine missing players (for sub mapping)
+            # We need to find who is supposed to be playing but isn't
+            t1_roster_df = pd.read_sql("SELECT id FROM players WHERE default_team_id=?", conn, params=(match_info['team1_id'],))
+            t2_roster_df = pd.read_sql("SELECT id FROM players WHERE default_team_id=?", conn, params=(match_info['team2_id'],))
         
-        t1_roster_ids = set(t1_roster_df['id'].tolist())
-        t2_roster_ids = set(t2_roster_df['id'].tolist())
+            t1_roster_ids = set(t1_roster_df['id'].tolist())
+            t2_roster_ids = set(t2_roster_df['id'].tolist())
         
-        # Pre-resolve players to find who is playing
-        resolved_players = []
-        t1_present_ids = set()
-        t2_present_ids = set()
+            # Pre-resolve players to find who is playing
+            resolved_players = []
+            t1_present_ids = set()
+            t2_present_ids = set()
         
-        for riot_id, stats in player_stats.items():
-            pid = None
-            default_tid = None
+            for riot_id, stats in player_stats.items():
+                pid = None
+                default_tid = None
             
-            if stats['name']:
-                p_row = conn.execute("SELECT id, default_team_id FROM players WHERE name=?", (stats['name'],)).fetchone()
-                if p_row:
-                    pid = p_row[0]
-                    default_tid = p_row[1]
+                if stats['name']:
+                    p_row = conn.execute("SELECT id, default_team_id FROM players WHERE name=?", (stats['name'],)).fetchone()
+                    if p_row:
+                        pid = p_row[0]
+                        default_tid = p_row[1]
             
-            if pid:
-                if stats['team_num'] == 1:
-                    t1_present_ids.add(pid)
-                else:
-                    t2_present_ids.add(pid)
+                if pid:
+                    if stats['team_num'] == 1:
+                        t1_present_ids.add(pid)
+                    else:
+                        t2_present_ids.add(pid)
             
-            resolved_players.append({
-                'riot_id': riot_id,
-                'stats': stats,
-                'pid': pid,
-                'default_tid': default_tid
-            })
+                resolved_players.append({
+                    'riot_id': riot_id,
+                    'stats': stats,
+                    'pid': pid,
+                    'default_tid': default_tid
+                })
             
-        # Identify missing players (candidates for being subbed out)
-        t1_missing = list(t1_roster_ids - t1_present_ids)
-        t2_missing = list(t2_roster_ids - t2_present_ids)
+            # Identify missing players (candidates for being subbed out)
+            t1_missing = list(t1_roster_ids - t1_present_ids)
+            t2_missing = list(t2_roster_ids - t2_present_ids)
         
-        for p in resolved_players:
-            stats = p['stats']
-            pid = p['pid']
-            default_tid = p['default_tid']
+            stat_rows = []
+            for p in resolved_players:
+                stats = p['stats']
+                pid = p['pid']
+                default_tid = p['default_tid']
             
-            # Determine Team ID (Match Team)
-            # Ensure int for database consistency
-            team_id = int(match_info['team1_id']) if stats['team_num'] == 1 else int(match_info['team2_id'])
+                # Determine Team ID (Match Team)
+                # Ensure int for database consistency
+                team_id = int(match_info['team1_id']) if stats['team_num'] == 1 else int(match_info['team2_id'])
             
-            is_sub = 0
-            subbed_for_id = None
+                is_sub = 0
+                subbed_for_id = None
             
-            if pid:
-                # Check for Sub
-                # If player's default team is different from the team they played for -> Sub
-                # Note: default_tid can be None (Free Agent) -> counted as Sub if playing for a team
-                if default_tid != team_id:
-                    is_sub = 1
+                if pid:
+                    # Check for Sub
+                    # If player's default team is different from the team they played for -> Sub
+                    # Note: default_tid can be None (Free Agent) -> counted as Sub if playing for a team
+                    if default_tid != team_id:
+                        is_sub = 1
                     
-                    # Assign subbed_for_id
-                    # Heuristic: Assign to the first missing player from the roster
-                    if stats['team_num'] == 1:
-                        if t1_missing:
-                            subbed_for_id = t1_missing.pop(0)
-                    else:
-                        if t2_missing:
-                            subbed_for_id = t2_missing.pop(0)
+                        # Assign subbed_for_id
+                        # Heuristic: Assign to the first missing player from the roster
+                        if stats['team_num'] == 1:
+                            if t1_missing:
+                                subbed_for_id = t1_missing.pop(0)
+                        else:
+                            if t2_missing:
+                                subbed_for_id = t2_missing.pop(0)
             
-            # Insert Stats
-            conn.execute(
+                stat_rows.append((match_id, team_id, pid, stats['agent'], stats['acs'], stats['k'], stats['d'], stats['a'], is_sub, subbed_for_id))
+        
+            # Insert Stats in one batch
+            conn.executemany(
                 """
                 INSERT INTO match_stats_map (match_id, map_index, team_id, player_id, agent, acs, kills, deaths, assists, is_sub, subbed_for_id)
                 VALUES (?, 0, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (match_id, team_id, pid, stats['agent'], stats['acs'], stats['k'], stats['d'], stats['a'], is_sub, subbed_for_id)
+                stat_rows
             )
-            
-        conn.commit()
-    except Exception as e:
-        st.error(f"Database Error: {e}")
-    finally:
-        conn.close()
+            conn.commit()
+            st.cache_data.clear()
+        except Exception as e:
+            st.error(f"Database Error: {e}")
+        finally:
+            conn.close()
 
 def show_admin_players():
     st.subheader("Manage Players")
@@ -559,6 +564,7 @@ def show_admin_players():
                             (name, riot_id, rank, tid)
                         )
                         conn.commit()
+                        st.cache_data.clear()
                         st.success(f"Player {name} added!")
                         st.rerun()
                     except Exception as e:
@@ -607,9 +613,12 @@ def show_admin_system():
     
     with c1:
         st.markdown("### Database Backup")
-        data = export_db_bytes()
-        if data:
-            st.download_button("Download Database (.sqlite)", data, "valorant_s23.db", "application/x-sqlite3")
+        # Read the file only on request, not on every admin rerun
+        if st.button("Prepare download"):
+            st.session_state['_db_blob'] = export_db_bytes()
+        data = st.session_state.get('_db_blob')
+        if data and st.download_button("Download Database (.sqlite)", data, "valorant_s23.db", "application/x-sqlite3"):
+            st.session_state.pop('_db_blob', None)
             
         st.markdown("### Cloud Backup")
         if st.button("Backup DB to GitHub", type="primary"):
@@ -624,9 +633,13 @@ def show_admin_system():
         up = st.file_uploader("Upload .db or .sqlite file", type=['db', 'sqlite'])
         if up:
             if st.button("Restore Database", type="primary"):
-                summary = import_sqlite_db(up.getvalue())
-                st.success(f"Restored: {summary}")
-                st.rerun()
+                try:
+                    summary = import_sqlite_db(up)
+                except sqlite3.IntegrityError as e:
+                    st.error(f"Import aborted: an imported player's name or Riot ID is already used by a different local player ({e}).")
+                else:
+                    st.success(f"Restored: {summary}")
+                    st.rerun()
                 
     with c2:
         st.markdown("### Admin Management")
@@ -20,15 +20,9 @@ def show_directory():
             q = st.text_input("Search Name or Riot ID", placeholder="Search...")
         st.markdown('</div>', unsafe_allow_html=True)
     
-    out = players_df.copy()
+    # Filtering runs in SQL; normalising the query lets equivalent inputs share one cache entry
+    out = get_all_players_directory(search=q.strip().lower() or None, ranks=tuple(sorted(rf)))
     out['rank'] = out['rank'].fillna("Unranked")
-    out = out[out['rank'].isin(rf)]
-    if q:
-        s = q.lower()
-        out = out[
-            out['name'].str.lower().fillna("").str.contains(s) | 
-            out['riot_id'].str.lower().fillna("").str.contains(s)
-        ]
     
     # Display as a clean table with the brand theme
     st.markdown("<br>", unsafe_allow_html=True)
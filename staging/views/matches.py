@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import html
-from ..data_access import get_week_matches, get_match_weeks, get_playoff_matches, get_standings, get_match_maps
+from ..data_access import get_week_matches, get_match_weeks, get_playoff_matches, get_standings, get_match_maps_bulk, get_match_ids_with_maps
 
 def show_matches():
     st.markdown('<h1 class="main-header">MATCH SCHEDULE</h1>', unsafe_allow_html=True)
@@ -10,8 +10,24 @@ def show_matches():
     
     if week == "Playoffs":
         df = get_playoff_matches()
+        if not df.empty:
+            # Bracket names (label halves stand in for unset teams), escaped once per distinct name
+            lbl = df['bracket_label'].fillna('')
+            halves = lbl.str.split(' vs ')
+            has_vs = lbl.str.contains(' vs ', regex=False)
+            disp = {}
+            for side, i in (('t1', 0), ('t2', 1)):
+                names = df[side + '_name'].fillna('')
+                disp[side] = names.where(names != '', halves.str[i].where(has_vs, 'TBD')).tolist()
+            escaped_names = {n: html.escape(n) for n in set(disp['t1']) | set(disp['t2'])}
+            df['t1_disp_esc'] = [escaped_names[n] for n in disp['t1']]
+            df['t2_disp_esc'] = [escaped_names[n] for n in disp['t2']]
+            df['format_esc'] = [html.escape(str(v)) for v in df['format'].tolist()]
     else:
         df = get_week_matches(week)
+        # Escape the card text once per load rather than once per card per rerun
+        for c in ('t1_name', 't2_name', 'format', 'group_name'):
+            df[c + '_esc'] = [html.escape(str(v)) for v in df[c].tolist()]
         
     if df.empty:
         st.info("No matches for this week.")
@@ -20,6 +36,8 @@ def show_matches():
             st.markdown("### Playoff Brackets")
             # Group by playoff_round (1=Quarters, 2=Semis, 3=Finals etc.)
             rounds = sorted(df['playoff_round'].unique())
+            # One groupby pass instead of a full-frame mask per round
+            matches_by_round = {r: g.sort_values('bracket_pos') for r, g in df.groupby('playoff_round', sort=False)}
             cols = st.columns(len(rounds))
             for i, r_num in enumerate(rounds):
                 with cols[i]:
@@ -35,9 +53,9 @@ def show_matches():
                     if r_num == 1:
                         standings = get_standings()
                         if not standings.empty:
-                            # Group by group_name and get top 2
-                            for g_name, g_df in standings.groupby('group_name'):
-                                g_df = g_df.sort_values(['Points', 'PD'], ascending=False).head(2)
+                            # Group by group_name and get top 2 (one sort for all groups)
+                            top2 = standings.sort_values(['Points', 'PD'], ascending=False).groupby('group_name').head(2)
+                            for g_name, g_df in top2.groupby('group_name'):
                                 for team in g_df.itertuples():
                                     st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px; padding: 10px; border-left: 3px solid var(--primary-blue); opacity: 0.8;">
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem;">
@@ -47,25 +65,21 @@ def show_matches():
 <div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">ADVANCES TO R16</div>
 </div>""", unsafe_allow_html=True)
 
-                    r_matches = df[df['playoff_round'] == r_num].sort_values('bracket_pos')
+                    r_matches = matches_by_round.get(r_num, df.iloc[:0])
                     for m in r_matches.itertuples():
                         winner_color_1 = "var(--primary-blue)" if m.status == 'completed' and m.winner_id == m.t1_id else "var(--text-main)"
                         winner_color_2 = "var(--primary-red)" if m.status == 'completed' and m.winner_id == m.t2_id else "var(--text-main)"
-                        
-                        # Use bracket label if names are TBD
-                        t1_display = m.t1_name if m.t1_name else (m.bracket_label.split(' vs ')[0] if m.bracket_label and ' vs ' in m.bracket_label else "TBD")
-                        t2_display = m.t2_name if m.t2_name else (m.bracket_label.split(' vs ')[1] if m.bracket_label and ' vs ' in m.bracket_label else "TBD")
 
                         st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px; padding: 10px; border-left: 3px solid {winner_color_1 if m.winner_id == m.t1_id else winner_color_2};">
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem;">
-<span style="color: {winner_color_1}; font-weight: {'bold' if m.winner_id == m.t1_id else 'normal'};">{html.escape(str(t1_display))}</span>
+<span style="color: {winner_color_1}; font-weight: {'bold' if m.winner_id == m.t1_id else 'normal'};">{m.t1_disp_esc}</span>
 <span style="font-family: 'Orbitron';">{int(m.score_t1) if m.status == 'completed' else '-'}</span>
 </div>
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem; margin-top: 5px;">
-<span style="color: {winner_color_2}; font-weight: {'bold' if m.winner_id == m.t2_id else 'normal'};">{html.escape(str(t2_display))}</span>
+<span style="color: {winner_color_2}; font-weight: {'bold' if m.winner_id == m.t2_id else 'normal'};">{m.t2_disp_esc}</span>
 <span style="font-family: 'Orbitron';">{int(m.score_t2) if m.status == 'completed' else '-'}</span>
 </div>
-<div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">{html.escape(str(m.format))}</div>
+<div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">{m.format_esc}</div>
 </div>""", unsafe_allow_html=True)
         else:
             st.markdown("### Scheduled")
@@ -73,18 +87,26 @@ def show_matches():
             if sched.empty:
                 st.caption("None")
             else:
+                # All scheduled cards go out as one markdown element instead of one per match
+                cards = []
                 for m in sched.itertuples():
-                    st.markdown(f"""<div class="custom-card">
+                    cards.append(f"""<div class="custom-card">
 <div style="display: flex; justify-content: space-between; align-items: center;">
-<div style="flex: 1; text-align: right; font-weight: bold; color: var(--primary-blue);">{html.escape(str(m.t1_name))}</div>
+<div style="flex: 1; text-align: right; font-weight: bold; color: var(--primary-blue);">{m.t1_name_esc}</div>
 <div style="margin: 0 20px; color: var(--text-dim); font-family: 'Orbitron';">VS</div>
-<div style="flex: 1; text-align: left; font-weight: bold; color: var(--primary-red);">{html.escape(str(m.t2_name))}</div>
+<div style="flex: 1; text-align: left; font-weight: bold; color: var(--primary-red);">{m.t2_name_esc}</div>
 </div>
-<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{html.escape(str(m.format))} • {html.escape(str(m.group_name))}</div>
-</div>""", unsafe_allow_html=True)
+<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{m.format_esc} • {m.group_name_esc}</div>
+</div>""")
+                st.markdown("\n".join(cards), unsafe_allow_html=True)
         
             st.markdown("### Completed")
             comp = df[df['status'] == 'completed']
+            # Fetch map rows for every completed match at once, then split per match
+            with_maps = get_match_ids_with_maps()
+            maps_bulk = get_match_maps_bulk(tuple(i for i in comp['id'].astype(int) if i in with_maps))
+            empty_maps = maps_bulk.iloc[:0].drop(columns=['match_id'])
+            maps_by_match = {int(k): g.drop(columns=['match_id']).reset_index(drop=True) for k, g in maps_bulk.groupby('match_id')}
             for m in comp.itertuples():
                 with st.container():
                     winner_color_1 = "var(--primary-blue)" if m.score_t1 > m.score_t2 else "var(--text-main)"
@@ -96,20 +118,20 @@ def show_matches():
 {forfeit_badge}
 <div style="display: flex; justify-content: space-between; align-items: center;">
 <div style="flex: 1; text-align: right;">
-<span style="font-weight: bold; color: {winner_color_1};">{html.escape(str(m.t1_name))}</span>
+<span style="font-weight: bold; color: {winner_color_1};">{m.t1_name_esc}</span>
 <span style="font-size: 1.5rem; margin-left: 10px; font-family: 'Orbitron';">{m.score_t1}</span>
 </div>
 <div style="margin: 0 20px; color: var(--text-dim); font-family: 'Orbitron';">-</div>
 <div style="flex: 1; text-align: left;">
 <span style="font-size: 1.5rem; margin-right: 10px; font-family: 'Orbitron';">{m.score_t2}</span>
-<span style="font-weight: bold; color: {winner_color_2};">{html.escape(str(m.t2_name))}</span>
+<span style="font-weight: bold; color: {winner_color_2};">{m.t2_name_esc}</span>
 </div>
 </div>
-<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{html.escape(str(m.format))} • {html.escape(str(m.group_name))}</div>
+<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{m.format_esc} • {m.group_name_esc}</div>
 </div>""", unsafe_allow_html=True)
                     
                     with st.expander("Match Details"):
-                        maps_df = get_match_maps(int(m.id))
+                        maps_df = maps_by_match.get(int(m.id), empty_maps)
                         if maps_df.empty:
                             st.caption("No map details")
                         else:
@@ -1,7 +1,61 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import html
-from staging.data_access import get_teams_list, get_completed_matches
+from staging.data_access import get_teams_list, get_completed_matches, get_data_version
+
+@st.cache_data(ttl=300)
+def _team_stats_table(data_version, _matches_df):
+    # win_rate / avg_score / games for every team from one long-format groupby
+    df = _matches_df
+    if df.empty:
+        return {}
+    # Stack both sides with np.concatenate; no per-piece index or column alignment as with pd.concat
+    tid = np.concatenate([df['team1_id'].to_numpy(), df['team2_id'].to_numpy()])
+    winner = np.tile(df['winner_id'].to_numpy(dtype=float), 2)
+    long = pd.DataFrame({
+        'tid': tid,
+        'score': np.concatenate([df['score_t1'].to_numpy(dtype=float), df['score_t2'].to_numpy(dtype=float)]),
+        'won': winner == tid,
+    })
+    agg = long.groupby('tid').agg(games=('score', 'size'), avg_score=('score', 'mean'), wins=('won', 'sum'))
+    agg['win_rate'] = agg['wins'] / agg['games']
+    return {
+        int(tid): {'win_rate': float(r.win_rate), 'avg_score': float(r.avg_score), 'games': int(r.games)}
+        for tid, r in zip(agg.index, agg.itertuples(index=False))
+    }
+
+@st.cache_data(ttl=300)
+def _h2h_matrix(data_version, _matches_df):
+    # {(winner, opponent): wins} over all completed matches, either side of the fixture
+    df = _matches_df
+    if df.empty:
+        return {}
+    decided = df[df['winner_id'].notna()]
+    winner = decided['winner_id'].astype('int64')
+    opponent = decided['team2_id'].where(winner.eq(decided['team1_id']), decided['team1_id']).astype('int64')
+    counts = pd.DataFrame({'w': winner, 'o': opponent}).groupby(['w', 'o']).size()
+    return {(int(w), int(o)): int(n) for (w, o), n in counts.items()}
+
+@st.cache_resource
+def _load_predictor_model():
+    # Optional ML model, imported once per process; None keeps the heuristic fallback
+    try:
+        import predictor_model
+    except Exception:
+        return None
+    return predictor_model
+
+def _heuristic_probs(wr1, as1, h1, wr2, as2, h2):
+    # Team 1 win probability from the weighted heuristic; takes scalars or equal-length arrays (bulk backtests)
+    s1 = np.asarray(wr1, dtype=float) * 40 + np.asarray(as1, dtype=float) * 2 + np.asarray(h1, dtype=float) * 5
+    s2 = np.asarray(wr2, dtype=float) * 40 + np.asarray(as2, dtype=float) * 2 + np.asarray(h2, dtype=float) * 5
+    total = s1 + s2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total == 0, 0.5, s1 / total)
+
+# Partial reruns where this Streamlit supports them; older versions just call the function
+_fragment = getattr(st, "fragment", None) or (lambda fn: fn)
 
 def show_predictor():
     st.markdown('<h1 class="main-header">MATCH PREDICTOR</h1>', unsafe_allow_html=True)
@@ -11,6 +65,12 @@ def show_predictor():
     matches_df = get_completed_matches()
     
     tnames = teams_df['name'].tolist() if not teams_df.empty else []
+    name_to_id = dict(zip(teams_df['name'].astype(str), teams_df['id'].astype(int))) if not teams_df.empty else {}
+    _predictor_panel(matches_df, tnames, name_to_id)
+
+@_fragment
+def _predictor_panel(matches_df, tnames, name_to_id):
+    # Predict Result reruns only this panel, not the page header and data loads above
     c1, c2 = st.columns(2)
     
     # Check if user is admin or dev
@@ -26,62 +86,43 @@ def show_predictor():
         if t1_name == t2_name:
             st.error("Select two different teams.")
         else:
-            t1_id = teams_df[teams_df['name'] == t1_name].iloc[0]['id']
-            t2_id = teams_df[teams_df['name'] == t2_name].iloc[0]['id']
+            t1_id = name_to_id[t1_name]
+            t2_id = name_to_id[t2_name]
             
-            # Feature extraction helper
-            def get_team_stats(tid):
-                import pandas as pd
-                played = matches_df[(matches_df['team1_id']==tid) | (matches_df['team2_id']==tid)]
-                if played.empty:
-                    return {'win_rate': 0.0, 'avg_score': 0.0, 'games': 0}
-                wins = played[played['winner_id'] == tid].shape[0]
-                total = played.shape[0]
-                
-                # Calculate avg score (rounds won) using vectorized operations
-                scores_t1 = played.loc[played['team1_id'] == tid, 'score_t1']
-                scores_t2 = played.loc[played['team2_id'] == tid, 'score_t2']
-                all_scores = pd.concat([scores_t1, scores_t2])
-                avg_score = all_scores.mean() if not all_scores.empty else 0
-                
-                return {'win_rate': wins/total, 'avg_score': avg_score, 'games': total}
-
-            s1 = get_team_stats(t1_id)
-            s2 = get_team_stats(t2_id)
+            # Keyed on the snapshot's data version so Streamlit never hashes the frame itself
+            data_version = get_data_version(matches_df)
+            team_stats = _team_stats_table(data_version, matches_df)
+            no_games = {'win_rate': 0.0, 'avg_score': 0.0, 'games': 0}
+            s1 = team_stats.get(int(t1_id), no_games)
+            s2 = team_stats.get(int(t2_id), no_games)
             
             # Head to head
-            h2h = matches_df[((matches_df['team1_id']==t1_id) & (matches_df['team2_id']==t2_id)) | 
-                             ((matches_df['team1_id']==t2_id) & (matches_df['team2_id']==t1_id))]
-            h2h_wins_t1 = h2h[h2h['winner_id'] == t1_id].shape[0]
-            h2h_wins_t2 = h2h[h2h['winner_id'] == t2_id].shape[0]
+            h2h = _h2h_matrix(data_version, matches_df)
+            h2h_wins_t1 = h2h.get((int(t1_id), int(t2_id)), 0)
+            h2h_wins_t2 = h2h.get((int(t2_id), int(t1_id)), 0)
             
             # Heuristic Score
             # Win Rate (40%), Avg Score (30%), H2H (30%)
             # Normalize scores? No, just compare raw weighted sums or probabilities
             
             # Heuristic Score (Fallback if ML fails or data too small)
-            score1 = (s1['win_rate'] * 40) + (s1['avg_score'] * 2) + (h2h_wins_t1 * 5)
-            score2 = (s2['win_rate'] * 40) + (s2['avg_score'] * 2) + (h2h_wins_t2 * 5)
+            heur_p1 = float(_heuristic_probs(s1['win_rate'], s1['avg_score'], h2h_wins_t1, s2['win_rate'], s2['avg_score'], h2h_wins_t2))
             
             ml_prob = None
-            try:
-                import predictor_model
-                ml_prob = predictor_model.predict_match(t1_id, t2_id)
-            except Exception as e:
-                pass
+            model = _load_predictor_model()
+            if model is not None:
+                try:
+                    ml_prob = model.predict_match(t1_id, t2_id)
+                except Exception:
+                    pass
                 
             if ml_prob is not None:
                 prob1 = ml_prob * 100
                 prob2 = (1 - ml_prob) * 100
                 prediction_type = "ML MODEL"
             else:
-                total = score1 + score2
-                if total == 0:
-                    prob1 = 50.0
-                    prob2 = 50.0
-                else:
-                    prob1 = (score1 / total) * 100
-                    prob2 = (score2 / total) * 100
+                prob1 = heur_p1 * 100
+                prob2 = (1 - heur_p1) * 100
                 prediction_type = "HEURISTIC"
                 
             winner = t1_name if prob1 > prob2 else t2_name
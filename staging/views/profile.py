@@ -1,11 +1,39 @@
 import streamlit as st
 import pandas as pd
 import html
-import plotly.graph_objects as go
 import plotly.express as px
-from plotly.subplots import make_subplots
 from ..config import apply_plotly_theme
-from ..data_access import get_all_players, get_player_profile
+from ..data_access import get_all_players, get_player_profile, _fmt_with_riot
+
+def _profile_figs_key(prof):
+    # Content key for _profile_trend_figures: the trend rows plus the sub-impact numbers
+    trend = prof.get('trend')
+    trend_hash = int(pd.util.hash_pandas_object(trend, index=False).sum()) if trend is not None and not trend.empty else 0
+    return trend_hash, tuple(sorted((prof.get('sub_impact') or {}).items()))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _profile_trend_figures(pid, figs_key, _prof):
+    # Trend / sub-impact figures for one player; figs_key (see _profile_figs_key) ties the entry to the profile's content
+    figs = {}
+    trend = _prof.get('trend')
+    if trend is not None and not trend.empty:
+        figs['acs'] = px.line(trend, x='label', y='avg_acs',
+                              title="ACS Trend", markers=True,
+                              color_discrete_sequence=['#3FD1FF'])
+        figs['kda'] = px.line(trend, x='label', y='kda',
+                              title="KDA Trend", markers=True,
+                              color_discrete_sequence=['#FF4655'])
+    sid = _prof.get('sub_impact')
+    if sid:
+        figs['sub_acs'] = px.bar(x=['Starter', 'Sub'], y=[sid['starter_acs'], sid['sub_acs']],
+                                 title="ACS: Starter vs Sub",
+                                 labels={'x': 'Role', 'y': 'ACS'},
+                                 color_discrete_sequence=['#3FD1FF'])
+        figs['sub_kda'] = px.bar(x=['Starter', 'Sub'], y=[sid['starter_kda'], sid['sub_kda']],
+                                 title="KDA: Starter vs Sub",
+                                 labels={'x': 'Role', 'y': 'KDA'},
+                                 color_discrete_sequence=['#FF4655'])
+    return figs
 
 def show_profile():
     players_df = get_all_players()
@@ -13,14 +41,13 @@ def show_profile():
     st.markdown('<h1 class="main-header">PLAYER PROFILE</h1>', unsafe_allow_html=True)
     
     if not players_df.empty:
-        players_df = players_df.copy()
-        players_df['display_label'] = players_df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-        
-        opts = players_df['display_label'].tolist()
+        opts = _fmt_with_riot(players_df['name'], players_df['riot_id']).tolist()
+        # Built once per render; reversed so a repeated label keeps its first row, as the mask lookup did
+        label_to_id = dict(zip(reversed(opts), reversed(players_df['id'].astype(int).tolist())))
         sel = st.selectbox("Select a Player", opts)
         
         if sel:
-            pid = int(players_df[players_df['display_label'] == sel].iloc[0]['id'])
+            pid = label_to_id[sel]
             prof = get_player_profile(pid)
             
             if prof:
@@ -67,70 +94,53 @@ def show_profile():
             
             cmp_df = pd.DataFrame({
                 'Metric': ['ACS','Kills/Match','Deaths/Match','Assists/Match'],
-                'Player': [prof['avg_acs'], prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)],
+                'Player': [prof['avg_acs'], prof['kpg'], prof['dpg'], prof['apg']],
                 'Rank Avg': [prof['sr_avg_acs'], prof['sr_k'], prof['sr_d'], prof['sr_a']],
                 'League Avg': [prof['lg_avg_acs'], prof['lg_k'], prof['lg_d'], prof['lg_a']],
             })
             
-            # Plotly Bar Chart for comparison with dual axis
-            fig_cmp = make_subplots(specs=[[{"secondary_y": True}]])
-            
-            # ACS (Primary Y-Axis)
-            fig_cmp.add_trace(go.Bar(name='Player ACS', x=['ACS'], y=[prof['avg_acs']], marker_color='#3FD1FF'), secondary_y=False)
-            fig_cmp.add_trace(go.Bar(name='Rank Avg ACS', x=['ACS'], y=[prof['sr_avg_acs']], marker_color='#FF4655', opacity=0.7), secondary_y=False)
-            fig_cmp.add_trace(go.Bar(name='League Avg ACS', x=['ACS'], y=[prof['lg_avg_acs']], marker_color='#ECE8E1', opacity=0.5), secondary_y=False)
-            
-            # Per-Match Stats (Secondary Y-Axis)
-            other_metrics = ['Kills/Match', 'Deaths/Match', 'Assists/Match']
-            player_others = [prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)]
-            rank_others = [prof['sr_k'], prof['sr_d'], prof['sr_a']]
-            league_others = [prof['lg_k'], prof['lg_d'], prof['lg_a']]
-            
-            fig_cmp.add_trace(go.Bar(name='Player Stats', x=other_metrics, y=player_others, marker_color='#3FD1FF', showlegend=False), secondary_y=True)
-            fig_cmp.add_trace(go.Bar(name='Rank Avg Stats', x=other_metrics, y=rank_others, marker_color='#FF4655', opacity=0.7, showlegend=False), secondary_y=True)
-            fig_cmp.add_trace(go.Bar(name='League Avg Stats', x=other_metrics, y=league_others, marker_color='#ECE8E1', opacity=0.5, showlegend=False), secondary_y=True)
-            
+            # One long frame and one px.bar; ACS and per-match K/D/A sit in separate facets with their own y-axes
+            bench_df = cmp_df.melt(id_vars='Metric', var_name='Source', value_name='Value')
+            bench_df['Axis'] = bench_df['Metric'].where(bench_df['Metric'] == 'ACS', 'K/D/A Per Match')
+            fig_cmp = px.bar(
+                bench_df, x='Metric', y='Value', color='Source', barmode='group', facet_col='Axis',
+                category_orders={'Axis': ['ACS', 'K/D/A Per Match']},
+                color_discrete_map={'Player': '#3FD1FF', 'Rank Avg': '#FF4655', 'League Avg': '#ECE8E1'},
+            )
+            fig_cmp.update_xaxes(matches=None, title_text=None)
+            fig_cmp.update_yaxes(matches=None, showticklabels=True, title_text=None)
+            fig_cmp.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
             fig_cmp.update_layout(
-                barmode='group', 
                 height=400,
-                title_text="Performance vs Benchmarks (ACS on Left, Others on Right)",
+                title_text="Performance vs Benchmarks",
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
             )
-            fig_cmp.update_yaxes(title_text="Average Combat Score (ACS)", secondary_y=False)
-            fig_cmp.update_yaxes(title_text="K/D/A Per Match", secondary_y=True)
             
             st.plotly_chart(apply_plotly_theme(fig_cmp), use_container_width=True)
             
             # Added Charts (ACS Trend, KDA Trend, Sub Impact, Maps)
-            if 'trend' in prof and not prof['trend'].empty:
-                st.caption("ACS trend")
-                fig_acs = px.line(prof['trend'], x='label', y='avg_acs', 
-                                  title="ACS Trend", markers=True,
-                                  color_discrete_sequence=['#3FD1FF'])
-                st.plotly_chart(apply_plotly_theme(fig_acs), use_container_width=True)
-                
-                st.caption("KDA trend")
-                fig_kda = px.line(prof['trend'], x='label', y='kda', 
-                                  title="KDA Trend", markers=True,
-                                  color_discrete_sequence=['#FF4655'])
-                st.plotly_chart(apply_plotly_theme(fig_kda), use_container_width=True)
-
-            if 'sub_impact' in prof:
-                sid = prof['sub_impact']
-                st.caption("Substitution impact")
-                c_sub1, c_sub2 = st.columns(2)
-                with c_sub1:
-                    fig_sub_acs = px.bar(x=['Starter', 'Sub'], y=[sid['starter_acs'], sid['sub_acs']], 
-                                       title="ACS: Starter vs Sub",
-                                       labels={'x': 'Role', 'y': 'ACS'},
-                                       color_discrete_sequence=['#3FD1FF'])
-                    st.plotly_chart(apply_plotly_theme(fig_sub_acs), use_container_width=True)
-                with c_sub2:
-                    fig_sub_kda = px.bar(x=['Starter', 'Sub'], y=[sid['starter_kda'], sid['sub_kda']], 
-                                       title="KDA: Starter vs Sub",
-                                       labels={'x': 'Role', 'y': 'KDA'},
-                                       color_discrete_sequence=['#FF4655'])
-                    st.plotly_chart(apply_plotly_theme(fig_sub_kda), use_container_width=True)
+            figs = _profile_trend_figures(pid, _profile_figs_key(prof), prof)
+            if figs:
+                tab_acs, tab_kda, tab_sub = st.tabs(["ACS Trend", "KDA Trend", "Sub Impact"])
+                with tab_acs:
+                    if 'acs' in figs:
+                        st.plotly_chart(apply_plotly_theme(figs['acs']), use_container_width=True)
+                    else:
+                        st.info("No trend data yet")
+                with tab_kda:
+                    if 'kda' in figs:
+                        st.plotly_chart(apply_plotly_theme(figs['kda']), use_container_width=True)
+                    else:
+                        st.info("No trend data yet")
+                with tab_sub:
+                    if 'sub_acs' in figs:
+                        c_sub1, c_sub2 = st.columns(2)
+                        with c_sub1:
+                            st.plotly_chart(apply_plotly_theme(figs['sub_acs']), use_container_width=True)
+                        with c_sub2:
+                            st.plotly_chart(apply_plotly_theme(figs['sub_kda']), use_container_width=True)
+                    else:
+                        st.info("No substitution data")
 
             if not prof['maps'].empty:
                 st.markdown('<h3 style="color: var(--primary-blue); font-family: \'Orbitron\';">RECENT MATCHES</h3>', unsafe_allow_html=True)
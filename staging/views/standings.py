@@ -12,8 +12,10 @@ def show_standings():
         return
 
     # Split by Group
-    groups = df['group_name'].unique()
-    groups = sorted([g for g in groups if g]) # Filter None/Empty and sort
+    # Categorical codes: sorted group order without re-sorting strings, one split for the tabs
+    group_codes = df['group_name'].astype('category')
+    groups = [g for g in group_codes.cat.categories.tolist() if g] # Filter Empty
+    frames_by_group = {g: t for g, t in df.groupby(group_codes, sort=False, observed=True)}
     
     if not groups:
         # If no groups defined, show all
@@ -22,7 +24,7 @@ def show_standings():
         tabs = st.tabs([f"Group {g}" for g in groups])
         for i, group in enumerate(groups):
             with tabs[i]:
-                group_df = df[df['group_name'] == group].reset_index(drop=True)
+                group_df = frames_by_group[group].reset_index(drop=True)
                 display_standings_table(group_df)
 
 def display_standings_table(df):
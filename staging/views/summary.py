@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import html
-from staging.data_access import get_match_weeks, get_week_matches, get_match_maps, get_map_stats, get_latest_played_week
+from staging.config import SCOREBOARD_COLS
+from staging.data_access import get_match_weeks, get_week_matches, get_match_maps, get_match_ids_with_maps, get_map_stats, get_latest_played_week
 
 def show_summary():
     st.markdown('<h1 class="main-header">MATCH SUMMARY</h1>', unsafe_allow_html=True)
@@ -29,7 +30,12 @@ def show_summary():
         st.info("No completed matches for this week.")
     else:
         # Vectorized option generation
-        opts = (df['t1_name'].fillna('') + " vs " + df['t2_name'].fillna('') + " (" + df['group_name'].fillna('') + ")").tolist()
+        # One f-string pass over the raw columns instead of a chain of Series concatenations
+        opts = [f"{a} vs {b} ({g})" for a, b, g in zip(
+            df['t1_name'].to_numpy(dtype=object, na_value=''),
+            df['t2_name'].to_numpy(dtype=object, na_value=''),
+            df['group_name'].to_numpy(dtype=object, na_value=''),
+        )]
         sel = st.selectbox("Select Match", list(range(len(opts))), format_func=lambda i: opts[i])
         m = df.iloc[sel]
         
@@ -54,23 +60,24 @@ def show_summary():
 <div style="text-align: center; color: var(--text-dim); font-size: 0.9rem; margin-top: 10px; letter-spacing: 2px;">{html.escape(str(m['format'].upper()))} • {html.escape(str(m['group_name'].upper()))}</div>
 </div>""", unsafe_allow_html=True)
         
-        maps_df = get_match_maps(int(m['id']))
+        maps_df = get_match_maps(int(m['id'])) if int(m['id']) in get_match_ids_with_maps() else pd.DataFrame()
         if maps_df.empty:
             st.info("No detailed map data recorded for this match.")
         else:
             # Map Selection
             map_indices = sorted(maps_df['map_index'].unique().tolist())
-            map_labels = [f"Map {i+1}: {maps_df[maps_df['map_index'] == i].iloc[0]['map_name']}" for i in map_indices]
+            # First row per map_index, indexed once for label and score-card lookups
+            maps_by_idx = maps_df.drop_duplicates('map_index').set_index('map_index', drop=False)
+            map_labels = [f"Map {i+1}: {maps_by_idx.at[i, 'map_name']}" for i in map_indices]
             
             selected_map_idx = st.radio("Select Map", map_indices, format_func=lambda i: map_labels[i], horizontal=True)
             
-            st.markdown("<br>", unsafe_allow_html=True)
-            
             # Map Score Card
-            curr_map = maps_df[maps_df['map_index'] == selected_map_idx].iloc[0]
+            curr_map = maps_by_idx.loc[selected_map_idx]
             t1_id_val = int(m.get('t1_id', m.get('team1_id')))
             t2_id_val = int(m.get('t2_id', m.get('team2_id')))
-            st.markdown(f"""<div class="custom-card" style="background: rgba(255,255,255,0.02); margin-bottom: 20px;">
+            parts = ["<br>"]
+            parts.append(f"""<div class="custom-card" style="background: rgba(255,255,255,0.02); margin-bottom: 20px;">
 <div style="display: flex; justify-content: center; align-items: center; gap: 40px;">
 <div style="text-align: center;">
 <div style="color: var(--text-dim); font-size: 0.8rem; margin-bottom: 5px;">{html.escape(str(m['t1_name']))}</div>
@@ -85,25 +92,27 @@ def show_summary():
 <div style="font-size: 2rem; font-family: 'Orbitron'; color: {'var(--primary-red)' if curr_map['team2_rounds'] > curr_map['team1_rounds'] else 'var(--text-main)'};">{curr_map['team2_rounds']}</div>
 </div>
 </div>
-</div>""", unsafe_allow_html=True)
+</div>""")
+            # Scoreboard headers share the card's element; the columns below only hold the tables
+            parts.append(f"""<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">
+<h4 style="color: var(--primary-blue); font-family: 'Orbitron';">{html.escape(str(m["t1_name"]))} Scoreboard</h4>
+<h4 style="color: var(--primary-red); font-family: 'Orbitron';">{html.escape(str(m["t2_name"]))} Scoreboard</h4>
+</div>""")
+            st.markdown("\n".join(parts), unsafe_allow_html=True)
             
             # Scoreboards
-            t1_id_val = int(m.get('t1_id', m.get('team1_id')))
-            t2_id_val = int(m.get('t2_id', m.get('team2_id')))
             s1 = get_map_stats(m['id'], selected_map_idx, t1_id_val)
             s2 = get_map_stats(m['id'], selected_map_idx, t2_id_val)
             
             c1, c2 = st.columns(2)
             with c1:
-                st.markdown(f'<h4 style="color: var(--primary-blue); font-family: \'Orbitron\';">{html.escape(str(m["t1_name"]))} Scoreboard</h4>', unsafe_allow_html=True)
                 if s1.empty:
                     st.info("No scoreboard data")
                 else:
-                    st.dataframe(s1.rename(columns={'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}), hide_index=True, use_container_width=True)
+                    st.dataframe(s1.rename(columns=SCOREBOARD_COLS), hide_index=True, use_container_width=True)
             
             with c2:
-                st.markdown(f'<h4 style="color: var(--primary-red); font-family: \'Orbitron\';">{html.escape(str(m["t2_name"]))} Scoreboard</h4>', unsafe_allow_html=True)
                 if s2.empty:
                     st.info("No scoreboard data")
                 else:
-                    st.dataframe(s2.rename(columns={'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}), hide_index=True, use_container_width=True)
+                    st.dataframe(s2.rename(columns=SCOREBOARD_COLS), hide_index=True, use_container_width=True)
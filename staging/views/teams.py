@@ -1,8 +1,37 @@
 import streamlit as st
 import pandas as pd
 import html
-from ..data_access import get_teams_list_full, get_all_players, get_conn
-from ..utils import get_base64_image, is_safe_path
+from ..data_access import get_teams_list_full, get_all_players, safe_logo_path, clear_logo_cache, _fmt_with_riot
+from ..db import pooled_write_conn
+from ..utils import get_base64_image, is_safe_path, vec_escape
+
+def _team_card_html(row, roster_html=""):
+    # Header card for one team; visitors get the roster folded into the same block
+    b64 = row.logo_b64
+    logo_img_html = f"<img src='data:image/png;base64,{b64}' width='60'/>" if b64 else "<div style='width:60px;height:60px;background:rgba(255,255,255,0.05);border-radius:8px;display:flex;align-items:center;justify-content:center;color:var(--text-dim);'>?</div>"
+    return f"""<div class="custom-card" style="margin-bottom: 10px;">
+<div style="display: flex; align-items: center; gap: 20px;">
+<div style="flex-shrink: 0;">
+{logo_img_html}
+</div>
+<div>
+<h3 style="margin: 0; color: var(--primary-blue); font-family: 'Orbitron';">{row.name_esc} <span style="color: var(--text-dim); font-size: 0.9rem;">[{row.tag_esc}]</span></h3>
+<div style="color: var(--text-dim); font-size: 0.8rem; text-transform: uppercase; letter-spacing: 1px;">Group {row.group_esc}</div>
+</div>
+</div>
+{roster_html}</div>"""
+
+def _roster_details_html(roster):
+    # Native <details> toggle so the read-only roster needs no Streamlit expander
+    if roster is None or roster.empty:
+        body = '<div style="color: var(--text-dim); font-size: 0.9rem; padding: 8px 0;">No players yet</div>'
+    else:
+        rows = "".join(
+            f'<tr><td>{n}</td><td>{r}</td></tr>'
+            for n, r in zip(roster['display_esc'], roster['rank_esc'])
+        )
+        body = f'<table class="valorant-table" style="margin-top:0;"><thead><tr><th>Name</th><th>Rank</th></tr></thead><tbody>{rows}</tbody></table>'
+    return f'<details style="margin-top: 10px;"><summary style="cursor: pointer; color: var(--text-dim);">View Roster</summary>{body}</details>'
 
 def show_teams():
     st.markdown('<h1 class="main-header">TEAMS</h1>', unsafe_allow_html=True)
@@ -15,7 +44,10 @@ def show_teams():
     if not all_players.empty:
         all_players = all_players.copy()
         # Create display name for the table
-        all_players['display_name'] = all_players.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
+        all_players['display_name'] = _fmt_with_riot(all_players['name'], all_players['riot_id'])
+        # Escaped once here rather than per cell while rendering rosters
+        all_players['display_esc'] = vec_escape(all_players['display_name'])
+        all_players['rank_esc'] = vec_escape(all_players['rank'].fillna(''))
         for tid, group in all_players.groupby('default_team_id'):
             # Keep all columns for admin management, but we'll filter for display
             rosters_by_team[int(tid)] = group
@@ -41,29 +73,26 @@ def show_teams():
             show['tag'].str.lower().fillna("").str.contains(s)
         ]
 
+    show = show.assign(name_esc=vec_escape(show['name']), tag_esc=vec_escape(show['tag'].fillna('')), group_esc=vec_escape(show['group_name']))
+    # Logos resolved once per rerun; get_base64_image itself is cached on (path, mtime)
+    show = show.assign(logo_b64=show['logo_path'].map(get_base64_image))
+
     if show.empty:
         st.info("No teams found matching your criteria.")
     
+    if not st.session_state.get('is_admin'):
+        # Read-only view: every card and roster in one markdown element instead of one per team
+        cards_html = "".join(_team_card_html(row, _roster_details_html(rosters_by_team.get(int(row.id)))) for row in show.itertuples())
+        if cards_html:
+            st.markdown(cards_html, unsafe_allow_html=True)
+        return
+    
     for row in show.itertuples():
         with st.container():
             # Team Header Card
-            b64 = get_base64_image(row.logo_path)
-            logo_img_html = f"<img src='data:image/png;base64,{b64}' width='60'/>" if b64 else "<div style='width:60px;height:60px;background:rgba(255,255,255,0.05);border-radius:8px;display:flex;align-items:center;justify-content:center;color:var(--text-dim);'>?</div>"
+            st.markdown(_team_card_html(row), unsafe_allow_html=True)
             
-            st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px;">
-<div style="display: flex; align-items: center; gap: 20px;">
-<div style="flex-shrink: 0;">
-{logo_img_html}
-</div>
-<div>
-<h3 style="margin: 0; color: var(--primary-blue); font-family: 'Orbitron';">{html.escape(str(row.name))} <span style="color: var(--text-dim); font-size: 0.9rem;">[{html.escape(str(row.tag or ''))}]</span></h3>
-<div style="color: var(--text-dim); font-size: 0.8rem; text-transform: uppercase; letter-spacing: 1px;">Group {html.escape(str(row.group_name))}</div>
-</div>
-</div>
-</div>""", unsafe_allow_html=True)
-            
-            expander_label = "Manage Team & Roster" if st.session_state.get('is_admin') else "View Roster"
-            with st.expander(expander_label):
+            with st.expander("Manage Team & Roster"):
                 roster = rosters_by_team.get(int(row.id), pd.DataFrame())
                 
                 if roster.empty:
@@ -73,8 +102,8 @@ def show_teams():
                     r_html = '<table class="valorant-table" style="margin-top:0;">'
                     r_html += '<thead><tr><th>Name</th><th>Rank</th></tr></thead><tbody>'
                     
-                    for _, r_row in roster.iterrows():
-                        r_html += f'<tr><td>{html.escape(str(r_row["display_name"]))}</td><td>{html.escape(str(r_row["rank"] or ""))}</td></tr>'
+                    for name_esc, rank_esc in zip(roster['display_esc'], roster['rank_esc']):
+                        r_html += f'<tr><td>{name_esc}</td><td>{rank_esc}</td></tr>'
                     
                     r_html += '</tbody></table>'
                     st.markdown(r_html, unsafe_allow_html=True)
@@ -94,14 +123,13 @@ def show_teams():
                                 if new_logo and not is_safe_path(new_logo):
                                     st.error("Invalid logo path. Path traversal or absolute paths are not allowed.")
                                 else:
-                                    conn_u = get_conn()
                                     try:
-                                        conn_u.execute("UPDATE teams SET name=?, tag=?, group_name=?, logo_path=? WHERE id=?", 
-                                                      (new_name, new_tag, new_group, new_logo, row.id))
-                                        conn_u.commit()
-                                        st.success("Updated!")
-                                        st.rerun()
+                                        with pooled_write_conn() as conn_u:
+                                            conn_u.execute("UPDATE teams SET name=?, tag=?, group_name=?, logo_path=? WHERE id=?", 
+                                                          (new_name, new_tag, new_group, new_logo, row.id))
                                     except Exception as e:
                                         st.error(f"Error: {e}")
-                                    finally:
-                                        conn_u.close()
+                                    else:
+                                        clear_logo_cache()
+                                        st.success("Updated!")
+                                        st.rerun()
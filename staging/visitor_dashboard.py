@@ -1,15 +1,43 @@
 import streamlit as st
 import sqlite3
 import os
+import threading
+import queue
 import sys
 import html
 import json
 import re
 import pandas as pd
+import numpy as np
+import plotly.express as px
 import hmac
+import hashlib
 import time
-import base64
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
+# Shared keep-alive session for GitHub calls: repeated fetch/backup requests reuse the TLS connection
+_gh_session = requests.Session()
+_gh_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=1))
+# url -> (ETag, parsed JSON) so repeat match pulls can be answered with a 304
+_gh_match_cache = {}
+
+# Tracker.gg match-id extraction for the Apply Match Data buttons
+_TRACKER_ID_RE = re.compile(r'match/([a-zA-Z0-9\-]+)')
+_ID_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9\-]')
 
 # Path management for production/staging structure
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,8 +45,6 @@ ROOT_DIR = os.path.dirname(CURRENT_DIR)
 if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
-from tracker_scraper import TrackerScraper
-
 def get_secret(key, default=None):
     try:
         return st.secrets[key]
@@ -42,11 +68,89 @@ if SECRET_DB_PATH:
 else:
     DB_PATH = DEFAULT_DB_PATH
 
+# Shared placeholder for teams without players in roster expanders
+EMPTY_ROSTER = pd.DataFrame(columns=['display_name', 'rank'])
+
+# Display headers for the per-map scoreboards
+SCOREBOARD_COLS = {'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}
+
 # Valorant Map Catalog
 maps_catalog = ["Abyss", "Ascent", "Bind", "Breeze", "Fracture", "Haven", "Icebox", "Lotus", "Pearl", "Split", "Sunset", "Corrode"]
+# Selectbox index per map name
+maps_catalog_idx = {name: i for i, name in enumerate(maps_catalog)}
+
+def _tune_sqlite(conn):
+    # WAL + NORMAL: a single-writer app doesn't need two fsyncs per commit.
+    # journal_mode is persisted in the file, so after the first open this is a no-op.
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError:
+        pass
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Wait out a concurrent writer instead of failing with "database is locked"
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
 
 def get_conn():
-    return sqlite3.connect(DB_PATH)
+    return _tune_sqlite(sqlite3.connect(DB_PATH))
+
+_thread_local = threading.local()
+
+def get_thread_conn():
+    # Long-lived per-thread connection so hot lookups (auth) reuse
+    # sqlite3's prepared-statement cache. Callers must not close it.
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None:
+        conn = _tune_sqlite(sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=512))
+        _thread_local.conn = conn
+    return conn
+
+# Process-wide read connection shared by the cached query helpers; the lock
+# serializes use across Streamlit sessions since one sqlite3 handle isn't reentrant.
+DB_POOL_LOCK = threading.RLock()
+
+# Multi-statement saves run on their own connections; one writer at a time
+# keeps concurrent sessions from queueing on SQLite's file lock.
+DB_WRITE_LOCK = threading.Lock()
+
+@st.cache_resource
+def get_pooled_conn():
+    return _tune_sqlite(sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=512))
+
+# Read-only connections for the cached query helpers. Under WAL they read a
+# committed snapshot, so page reads don't queue behind a write holding DB_POOL_LOCK.
+READER_POOL_SIZE = 4
+
+@st.cache_resource
+def get_reader_pool():
+    return queue.LifoQueue(maxsize=READER_POOL_SIZE)
+
+@contextmanager
+def reader_conn():
+    pool = get_reader_pool()
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        uri = Path(os.path.abspath(DB_PATH)).as_uri() + "?mode=ro"
+        conn = _tune_sqlite(sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=512))
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@contextmanager
+def pooled_write_conn():
+    # Short write transaction on the pooled connection: commits on success, rolls back on error
+    with DB_POOL_LOCK:
+        conn = get_pooled_conn()
+        with conn:
+            yield conn
 
 def init_admin_table(conn=None):
     should_close = False
@@ -60,10 +164,15 @@ def init_admin_table(conn=None):
             username TEXT UNIQUE NOT NULL,
             password_hash BLOB NOT NULL,
             salt BLOB NOT NULL,
-            is_active INTEGER NOT NULL DEFAULT 1
+            is_active INTEGER NOT NULL DEFAULT 1,
+            hash_scheme TEXT DEFAULT 'pbkdf2'
         )
         """
     )
+    try:
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_admins_user_active ON admins(username, is_active)")
+    except Exception:
+        pass
     if should_close:
         conn.commit()
         conn.close()
@@ -176,6 +285,8 @@ def track_user_activity():
     except Exception:
         pass
 
+# Shared across sessions; the live-users card tolerates ~30s of lag
+@st.cache_data(ttl=30, show_spinner=False)
 def get_active_user_count():
     conn = get_conn()
     # Count distinct IPs active in last 5 minutes
@@ -202,6 +313,16 @@ def get_active_admin_session():
             
     return None
 
+def get_active_admin_session_cached(ttl=5):
+    # Reuse the lock check within one interaction (render + submit) instead of querying twice
+    now = time.time()
+    cached = st.session_state.get('_active_admin_cache')
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+    res = get_active_admin_session()
+    st.session_state['_active_admin_cache'] = (now, res)
+    return res
+
 # Set page config immediately as the first streamlit command
 st.set_page_config(page_title="S23 Portal v0.8.0", layout="wide", initial_sidebar_state="collapsed")
 
@@ -325,6 +446,7 @@ def ensure_upgrade_schema(conn=None):
     ensure_column("matches", "maps_played", "maps_played INTEGER DEFAULT 0", conn=conn)
     ensure_column("seasons", "is_active", "is_active BOOLEAN DEFAULT 0", conn=conn)
     ensure_column("admins", "role", "role TEXT DEFAULT 'admin'", conn=conn)
+    ensure_column("admins", "hash_scheme", "hash_scheme TEXT DEFAULT 'pbkdf2'", conn=conn)
     ensure_column("matches", "match_type", "match_type TEXT DEFAULT 'regular'", conn=conn)
     ensure_column("matches", "playoff_round", "playoff_round INTEGER", conn=conn)
     ensure_column("matches", "bracket_pos", "bracket_pos INTEGER", conn=conn)
@@ -341,6 +463,31 @@ def ensure_upgrade_schema(conn=None):
         c.execute("INSERT OR IGNORE INTO team_history (team_id, season_id, group_name) SELECT id, 23, group_name FROM teams")
     except Exception:
         pass
+    # Map saves upsert ON CONFLICT(match_id, map_index), so this index is required: build it once and let failures surface
+    if not c.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='ux_match_maps_mm'").fetchone():
+        # Keep the newest row per (match, map) so the unique index can be built
+        c.execute("DELETE FROM match_maps WHERE id NOT IN (SELECT MAX(id) FROM match_maps GROUP BY match_id, map_index)")
+        c.execute("CREATE UNIQUE INDEX ux_match_maps_mm ON match_maps(match_id, map_index)")
+    try:
+        # Indexes backing the completed-match aggregations (leaderboard, profile, subs log, map stats)
+        c.execute("CREATE INDEX IF NOT EXISTS ix_msm_player_match ON match_stats_map(player_id, match_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_msm_match_map_team ON match_stats_map(match_id, map_index, team_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_m_status_type ON matches(status, match_type)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_players_rank ON players(rank)")
+        # Lets get_match_weeks' SELECT DISTINCT week walk the index instead of the table
+        c.execute("CREATE INDEX IF NOT EXISTS ix_matches_week ON matches(week)")
+    except Exception:
+        pass
+    # Case-insensitive uniqueness for player names and riot ids, matching the editors' strip/lower checks.
+    # Each index is skipped while legacy duplicates remain; Cleanup Duplicate Players merges them.
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_players_name_lc ON players(LOWER(TRIM(name)))")
+    except Exception:
+        pass
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_players_riot_lc ON players(LOWER(TRIM(riot_id))) WHERE riot_id IS NOT NULL AND TRIM(riot_id) != ''")
+    except Exception:
+        pass
     
     if should_close:
         conn.commit()
@@ -653,8 +800,16 @@ else:
     st.markdown("<style>:root { --padding-top: 180px; }</style>", unsafe_allow_html=True)
     st.markdown("<style>@media (max-width: 768px) { :root { --padding-top: 140px; } }</style>", unsafe_allow_html=True)
 
-# Deferred imports moved inside functions to reduce initial white screen/load time:
-# pandas, numpy, hashlib, hmac, secrets, tempfile, base64, requests, cloudscraper, re, io, json, html, time, plotly, PIL
+# Playoff bracket styles; compacted because the block is re-sent on every bracket rerun
+BRACKET_CSS = """<style>
+.bracket-container { display: flex; justify-content: space-between; overflow-x: auto; padding: 20px 0; min-width: 1000px; }
+.bracket-round { display: flex; flex-direction: column; justify-content: space-around; width: 180px; flex-shrink: 0; }
+.bracket-match { background: var(--card-bg); border: 1px solid rgba(63, 209, 255, 0.2); border-radius: 8px; padding: 8px; margin: 10px 0; box-shadow: 0 4px 10px rgba(0,0,0,0.3); font-size: 0.8rem; min-height: 80px; }
+.match-team { display: flex; justify-content: space-between; padding: 2px 0; }
+.team-winner { color: var(--primary-blue); font-weight: bold; }
+.match-info { font-size: 0.6rem; color: var(--text-dim); text-align: center; margin-top: 4px; border-top: 1px solid rgba(255,255,255,0.05); padding-top: 4px; }
+.tbd-match { background: rgba(255,255,255,0.02); border: 1px dashed rgba(255,255,255,0.1); color: var(--text-dim); display: flex; align-items: center; justify-content: center; }
+</style>"""
 
 def is_safe_path(path):
     if not path:
@@ -718,12 +873,50 @@ def scrape_tracker_match(url):
     Returns (match_data_json, error_message)
     """
     try:
+        # cloudscraper is only needed once someone actually scrapes a match
+        from tracker_scraper import TrackerScraper
         scraper = TrackerScraper()
         data, error = scraper.get_match_data(url)
         return data, error
     except Exception as e:
         return None, f"Scraping error: {str(e)}"
 
+def load_json_bytes(raw):
+    # orjson is optional; fall back to the stdlib parser
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def write_json_file(path, data):
+    # orjson serialises straight to bytes (it only supports 2-space indent)
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+@lru_cache(maxsize=64)
+def _parse_match_file(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return load_json_bytes(f.read())
+
+def load_match_json_file(path):
+    # Re-applying the same match reuses the parsed document until the file changes on disk
+    st_ = os.stat(path)
+    return _parse_match_file(path, st_.st_mtime_ns, st_.st_size)
+
+def _with_etag(url, headers):
+    cached = _gh_match_cache.get(url)
+    return {**headers, "If-None-Match": cached[0]} if cached else headers
+
+def _remember_match(url, r):
+    data = load_json_bytes(r.content)
+    etag = r.headers.get("ETag")
+    if etag:
+        _gh_match_cache[url] = (etag, data)
+    return data
+
 def fetch_match_from_github(match_id):
     """
     Attempts to fetch a match JSON from the GitHub repository.
@@ -744,9 +937,11 @@ def fetch_match_from_github(match_id):
             "Accept": "application/vnd.github.raw"
         }
         try:
-            r = requests.get(url, headers=headers, timeout=10)
+            r = _gh_session.get(url, headers=_with_etag(url, headers), timeout=10)
+            if r.status_code == 304:
+                return _gh_match_cache[url][1], None
             if r.status_code == 200:
-                return r.json(), None
+                return _remember_match(url, r), None
             else:
                 return None, f"GitHub API error: {r.status_code}"
         except Exception as e:
@@ -755,22 +950,30 @@ def fetch_match_from_github(match_id):
         # Fallback to public raw URL
         raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/assets/matches/match_{match_id}.json"
         try:
-            r = requests.get(raw_url, timeout=10)
+            r = _gh_session.get(raw_url, headers=_with_etag(raw_url, {}), timeout=10)
+            if r.status_code == 304:
+                return _gh_match_cache[raw_url][1], None
             if r.status_code == 200:
-                return r.json(), None
+                return _remember_match(raw_url, r), None
             else:
                 return None, f"GitHub file not found (Status: {r.status_code})"
         except Exception as e:
             return None, f"GitHub fetch error: {str(e)}"
 
+def _stat_value(stats, key):
+    # Tracker stat lookup without allocating empty-dict defaults for missing keys
+    v = stats.get(key) if stats else None
+    return v.get("value", 0) if v else 0
+
 def parse_tracker_json(jsdata, team1_id, team2_id):
     """
     Parses Tracker.gg JSON data and matches it to team1_id and team2_id.
     Returns (json_suggestions, map_name, t1_rounds, t2_rounds)
     """
-    import re
     json_suggestions = {}
-    segments = jsdata.get("data", {}).get("segments", [])
+    # Tracker's payload shape is fixed: resolve the "data" node once
+    data = jsdata.get("data") or {}
+    segments = data.get("segments", [])
     
     # First pass: find team names/IDs to identify which Tracker team is which
     tracker_team_1_id = None
@@ -786,6 +989,27 @@ def parse_tracker_json(jsdata, team1_id, team2_id):
         # Also map name -> name for fallback
         name_to_name = {str(n).strip().lower(): str(n) for n in all_players_df['name'] if pd.notna(n)}
 
+    # Single pass over player segments, pulling the needed fields into parallel columns
+    # p_lows holds the lower-cased riot id, reused by the roster matching and the suggestion keys
+    p_rids, p_lows, p_tids, p_agents, p_acs, p_k, p_d, p_a = [], [], [], [], [], [], [], []
+    for seg in segments:
+        if seg.get("type") != "player-summary":
+            continue
+        md = seg.get("metadata")
+        pi = md.get("platformInfo") if md else None
+        stats = seg.get("stats")
+        # Tracker sometimes puts the name in platformUserHandle or platformUserIdentifier
+        rid = (pi.get("platformUserIdentifier") or pi.get("platformUserHandle")) if pi else None
+        rid = str(rid).strip() if rid else None
+        p_rids.append(rid)
+        p_lows.append(rid.lower() if rid else None)
+        p_tids.append(md.get("teamId") if md else None)
+        p_agents.append(md.get("agentName") if md else None)
+        p_acs.append(_stat_value(stats, "scorePerRound"))
+        p_k.append(_stat_value(stats, "kills"))
+        p_d.append(_stat_value(stats, "deaths"))
+        p_a.append(_stat_value(stats, "assists"))
+
     if len(team_segments) >= 2:
         # Use Riot IDs to match teams
         t1_id_int = int(team1_id) if team1_id is not None else None
@@ -793,31 +1017,29 @@ def parse_tracker_json(jsdata, team1_id, team2_id):
         
         # Team 1 Roster
         t1_roster_df = all_players_df[all_players_df['default_team_id'] == t1_id_int]
-        t1_rids = [str(r).strip().lower() for r in t1_roster_df['riot_id'].dropna()]
-        t1_names = [str(n).strip().lower() for n in t1_roster_df['name'].dropna()]
-        t1_names_clean = [n.replace('@', '').strip() for n in t1_names]
+        t1_rids = {str(r).strip().lower() for r in t1_roster_df['riot_id'].dropna()}
+        t1_names = {str(n).strip().lower() for n in t1_roster_df['name'].dropna()}
+        t1_names_clean = {n.replace('@', '').strip() for n in t1_names}
         
         # Team 2 Roster
         t2_roster_df = all_players_df[all_players_df['default_team_id'] == t2_id_int]
-        t2_rids = [str(r).strip().lower() for r in t2_roster_df['riot_id'].dropna()]
-        t2_names = [str(n).strip().lower() for n in t2_roster_df['name'].dropna()]
-        t2_names_clean = [n.replace('@', '').strip() for n in t2_names]
+        t2_rids = {str(r).strip().lower() for r in t2_roster_df['riot_id'].dropna()}
+        t2_names = {str(n).strip().lower() for n in t2_roster_df['name'].dropna()}
+        t2_names_clean = {n.replace('@', '').strip() for n in t2_names}
         
         team_ids_in_json = [ts.get("attributes", {}).get("teamId") for ts in team_segments]
         
         # Count matches for each Tracker team against our rosters
-        # score[tracker_team_id][db_team_id]
-        scores = {tid: {1: 0, 2: 0} for tid in team_ids_in_json}
+        # s<tracker slot><db team slot>: s00 = tracker team 0 vs db team 1, etc.
+        tid0, tid1 = team_ids_in_json[0], team_ids_in_json[1]
+        s00 = s01 = s10 = s11 = 0
         
-        for p_seg in [s for s in segments if s.get("type") == "player-summary"]:
-            t_id = p_seg.get("metadata", {}).get("teamId")
-            if t_id in scores:
-                rid = p_seg.get("metadata", {}).get("platformInfo", {}).get("platformUserIdentifier")
-                if not rid: rid = p_seg.get("metadata", {}).get("platformInfo", {}).get("platformUserHandle")
-                
-                if rid:
-                    rid_clean = str(rid).strip().lower()
-                    name_part = rid_clean.split('#')[0]
+        for t_id, rid_clean in zip(p_tids, p_lows):
+            in0 = t_id == tid0
+            in1 = t_id == tid1
+            if in0 or in1:
+                if rid_clean:
+                    name_part = rid_clean.partition('#')[0]
                     
                     # Match vs Team 1
                     is_t1 = rid_clean in t1_rids or rid_clean in t1_names or name_part in t1_names or name_part in t1_names_clean
@@ -827,7 +1049,9 @@ def parse_tracker_json(jsdata, team1_id, team2_id):
                             if name_part in tn or tn in name_part:
                                 is_t1 = True
                                 break
-                    if is_t1: scores[t_id][1] += 1
+                    if is_t1:
+                        if in0: s00 += 1
+                        if in1: s10 += 1
                     
                     # Match vs Team 2
                     is_t2 = rid_clean in t2_rids or rid_clean in t2_names or name_part in t2_names or name_part in t2_names_clean
@@ -837,13 +1061,15 @@ def parse_tracker_json(jsdata, team1_id, team2_id):
                             if name_part in tn or tn in name_part:
                                 is_t2 = True
                                 break
-                    if is_t2: scores[t_id][2] += 1
+                    if is_t2:
+                        if in0: s01 += 1
+                        if in1: s11 += 1
         
         # Decision logic:
         # Option A: TrackerTeam0 is Team 1, TrackerTeam1 is Team 2
-        score_a = scores[team_ids_in_json[0]][1] + scores[team_ids_in_json[1]][2]
+        score_a = s00 + s11
         # Option B: TrackerTeam0 is Team 2, TrackerTeam1 is Team 1
-        score_b = scores[team_ids_in_json[0]][2] + scores[team_ids_in_json[1]][1]
+        score_b = s01 + s10
         
         if score_a >= score_b and score_a > 0:
             tracker_team_1_id = team_ids_in_json[0]
@@ -858,68 +1084,50 @@ def parse_tracker_json(jsdata, team1_id, team2_id):
         else:
             tracker_team_1_id = None
 
-    for seg in segments:
-        if seg.get("type") == "player-summary":
-            metadata = seg.get("metadata", {})
-            platform_info = metadata.get("platformInfo", {})
-            rid = platform_info.get("platformUserIdentifier")
-            
-            # Tracker sometimes puts the name in platformUserHandle or platformUserIdentifier
-            if not rid:
-                rid = platform_info.get("platformUserHandle")
-            
-            if rid:
-                rid = str(rid).strip()
-            
-            agent = metadata.get("agentName")
-            st_map = seg.get("stats", {})
-            acs = st_map.get("scorePerRound", {}).get("value", 0)
-            k = st_map.get("kills", {}).get("value", 0)
-            d = st_map.get("deaths", {}).get("value", 0)
-            a = st_map.get("assists", {}).get("value", 0)
-            t_id = metadata.get("teamId")
-            
-            our_team_num = 1 if t_id == tracker_team_1_id else 2
+    for rid, rid_lower, t_id, agent, acs, k, d, a in zip(p_rids, p_lows, p_tids, p_agents, p_acs, p_k, p_d, p_a):
+        our_team_num = 1 if t_id == tracker_team_1_id else 2
+        
+        if rid:
+            name_part = rid_lower.partition('#')[0]
+            # Direct Riot ID match first, then the name part of rid (if it's Name#Tag) or rid itself against DB names
+            matched_name = riot_id_to_name.get(rid_lower) or name_to_name.get(name_part) or name_to_name.get(rid_lower)
             
-            if rid:
-                rid_lower = rid.lower()
-                # Try to find a match in our DB if direct match fails
-                matched_name = riot_id_to_name.get(rid_lower)
-                
-                # If still no match, try matching the name part of rid (if it's Name#Tag) or rid itself against DB names
-                if not matched_name:
-                    name_part = rid.split('#')[0].lower()
-                    matched_name = name_to_name.get(name_part) or name_to_name.get(rid_lower)
-                
-                # Store by riot_id but also provide the matched name if found
-                json_suggestions[rid_lower] = {
-                    'name': matched_name, # Found in DB or None
-                    'tracker_name': rid,  # Original name from Tracker
-                    'acs': int(acs) if acs is not None else 0, 
-                    'k': int(k) if k is not None else 0, 
-                    'd': int(d) if d is not None else 0, 
-                    'a': int(a) if a is not None else 0, 
-                    'agent': agent,
-                    'team_num': our_team_num,
-                    'conf': 100.0 if matched_name else 80.0
-                }
+            # Store by riot_id but also provide the matched name if found
+            json_suggestions[rid_lower] = {
+                'name': matched_name, # Found in DB or None
+                'tracker_name': rid,  # Original name from Tracker
+                'acs': int(acs) if acs is not None else 0, 
+                'k': int(k) if k is not None else 0, 
+                'd': int(d) if d is not None else 0, 
+                'a': int(a) if a is not None else 0, 
+                'agent': agent,
+                'team_num': our_team_num,
+                'conf': 100.0 if matched_name else 80.0
+            }
     
     # Extract map name and rounds
-    map_name = jsdata.get("data", {}).get("metadata", {}).get("mapName")
+    map_name = data.get("metadata", {}).get("mapName")
     t1_r = 0
     t2_r = 0
     
     if len(team_segments) >= 2:
+        r0 = _stat_value(team_segments[0].get("stats"), "roundsWon")
+        r1 = _stat_value(team_segments[1].get("stats"), "roundsWon")
         if tracker_team_1_id == team_segments[0].get("attributes", {}).get("teamId"):
-            t1_r = team_segments[0].get("stats", {}).get("roundsWon", {}).get("value", 0)
-            t2_r = team_segments[1].get("stats", {}).get("roundsWon", {}).get("value", 0)
+            t1_r, t2_r = r0, r1
         else:
-            t1_r = team_segments[1].get("stats", {}).get("roundsWon", {}).get("value", 0)
-            t2_r = team_segments[0].get("stats", {}).get("roundsWon", {}).get("value", 0)
+            t1_r, t2_r = r1, r0
             
     return json_suggestions, map_name, int(t1_r), int(t2_r)
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=300, show_spinner=False)
+def parse_tracker_bytes(raw, team1_id, team2_id):
+    # Keyed on the uploaded bytes, so the uploader's reruns skip the JSON decode and roster matching
+    return parse_tracker_json(load_json_bytes(raw), team1_id, team2_id)
+
+# sha1(image bytes) -> base64 string, shared across paths
+_b64_by_hash = {}
+
 def get_base64_image(image_path):
     if not image_path:
         return None
@@ -930,28 +1138,43 @@ def get_base64_image(image_path):
     else:
         full_path = image_path
 
-    if not os.path.exists(full_path):
+    try:
+        mtime = os.path.getmtime(full_path)
+    except OSError:
         return None
-        
+    # Keyed on mtime so a replaced logo is re-encoded instead of served stale for the TTL
+    return _encode_image_b64(full_path, mtime)
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _encode_image_b64(full_path, mtime):
     try:
         with open(full_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+            data = f.read()
     except Exception:
         return None
-
-def import_sqlite_db(upload_bytes):
-    import pandas as pd
-    import tempfile
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    # Same bytes under a different path/version suffix reuse the encoded string
+    h = hashlib.sha1(data).digest()
+    enc = _b64_by_hash.get(h)
+    if enc is None:
+        if len(_b64_by_hash) >= 256:
+            _b64_by_hash.clear()
+        enc = _b64_by_hash[h] = _b64encode(data).decode()
+    return enc
+
+def import_sqlite_db_path(src_path):
+    src = sqlite3.connect(src_path)
+    tgt = get_conn()
+    tables = [
+        "teams","players","matches","match_maps","match_stats_map","match_stats","agents","seasons","team_history"
+    ]
+    summary = {}
+    # Bulk-load settings: one transaction, no fsync per statement
+    tgt.execute("PRAGMA journal_mode=WAL")
+    tgt.execute("PRAGMA synchronous=OFF")
+    tgt.execute("PRAGMA temp_store=MEMORY")
+    tgt.execute("PRAGMA cache_size=-65536")
+    tgt.execute("BEGIN")
     try:
-        tmp.write(upload_bytes)
-        tmp.flush()
-        src = sqlite3.connect(tmp.name)
-        tgt = get_conn()
-        tables = [
-            "teams","players","matches","match_maps","match_stats_map","match_stats","agents","seasons","team_history"
-        ]
-        summary = {}
         for t in tables:
             try:
                 df = pd.read_sql(f"SELECT * FROM {t}", src)
@@ -964,13 +1187,35 @@ def import_sqlite_db(upload_bytes):
             if not use:
                 continue
             q = f"INSERT OR REPLACE INTO {t} (" + ",".join(use) + ") VALUES (" + ",".join(["?"]*len(use)) + ")"
-            vals = df[use].values.tolist()
-            tgt.executemany(q, vals)
-            summary[t] = len(vals)
+            if t == "players" and "id" in use:
+                # Upsert on id only: REPLACE would let the unique name / riot id indexes delete a local player
+                # with a different id and orphan their stats; such a collision now fails the whole import instead
+                upd = ",".join(f"{c}=excluded.{c}" for c in use if c != "id")
+                q = f"INSERT INTO {t} (" + ",".join(use) + ") VALUES (" + ",".join(["?"]*len(use)) + ") ON CONFLICT(id) DO " + (f"UPDATE SET {upd}" if upd else "NOTHING")
+            tgt.executemany(q, df[use].itertuples(index=False, name=None))
+            summary[t] = len(df)
         tgt.commit()
+    except Exception:
+        tgt.rollback()
+        raise
+    finally:
         src.close()
         tgt.close()
-        return summary
+    return summary
+
+def import_sqlite_db(upload):
+    # Accepts raw bytes or a file-like upload; file objects are copied to disk in chunks
+    import tempfile
+    import shutil
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    try:
+        if isinstance(upload, (bytes, bytearray, memoryview)):
+            tmp.write(upload)
+        else:
+            upload.seek(0)
+            shutil.copyfileobj(upload, tmp, 1 << 20)
+        tmp.flush()
+        return import_sqlite_db_path(tmp.name)
     finally:
         tmp.close()
         if os.path.exists(tmp.name):
@@ -979,7 +1224,16 @@ def import_sqlite_db(upload_bytes):
             except Exception:
                 pass
 
+def checkpoint_wal():
+    # Fold WAL frames back into the main file before it is read or replaced as raw bytes
+    try:
+        with DB_POOL_LOCK:
+            get_pooled_conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except Exception:
+        pass
+
 def export_db_bytes():
+    checkpoint_wal()
     p = os.path.abspath(DB_PATH)
     try:
         if os.path.exists(p):
@@ -989,6 +1243,30 @@ def export_db_bytes():
         return None
     return None
 
+def export_db_b64(chunk_size=3 * 65536):
+    # Base64-encode the DB file chunk by chunk into a preallocated buffer.
+    # chunk_size must be a multiple of 3 so no padding lands mid-stream.
+    checkpoint_wal()
+    p = os.path.abspath(DB_PATH)
+    try:
+        if not os.path.exists(p):
+            return None
+        size = os.path.getsize(p)
+        out = bytearray((size + 2) // 3 * 4)
+        pos = 0
+        with open(p, 'rb', buffering=1 << 20) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                enc = _b64encode(chunk)
+                out[pos:pos + len(enc)] = enc
+                pos += len(enc)
+        del out[pos:]
+        return out.decode("ascii")
+    except Exception:
+        return None
+
 def restore_db_from_github():
     owner = get_secret("GH_OWNER")
     repo = get_secret("GH_REPO")
@@ -998,10 +1276,24 @@ def restore_db_from_github():
         return False
     url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{path}"
     try:
-        r = requests.get(url, timeout=15)
+        # Unconditional fetch: local edits sit in the -wal file, so the main file's stat can't tell us the copy is pristine
+        r = _gh_session.get(url, timeout=15)
         if r.status_code == 200 and r.content:
-            with open(DB_PATH, "wb") as f:
-                f.write(r.content)
+            # Copy the download in through SQLite's backup API rather than rewriting the live file:
+            # the pooled, reader and per-thread connections (and their mmaps) stay open and just see a write
+            import tempfile
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+            try:
+                tmp.write(r.content)
+                tmp.close()
+                src = sqlite3.connect(tmp.name)
+                try:
+                    with DB_POOL_LOCK:
+                        src.backup(get_pooled_conn())
+                finally:
+                    src.close()
+            finally:
+                os.remove(tmp.name)
             return True
     except Exception:
         return False
@@ -1019,124 +1311,162 @@ def backup_db_to_github():
     headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
     sha = None
     try:
-        gr = requests.get(url, headers=headers, params={"ref": branch}, timeout=15)
+        gr = _gh_session.get(url, headers=headers, params={"ref": branch}, timeout=15)
         if gr.status_code == 200:
             data = gr.json()
             sha = data.get("sha")
     except Exception:
         pass
-    data_bytes = export_db_bytes()
-    if not data_bytes:
+    content_b64 = export_db_b64()
+    if not content_b64:
         return False, "No DB data"
     payload = {
         "message": "Portal DB backup",
-        "content": base64.b64encode(data_bytes).decode("ascii"),
+        "content": content_b64,
         "branch": branch,
     }
     if sha:
         payload["sha"] = sha
     try:
-        pr = requests.put(url, headers=headers, json=payload, timeout=20)
+        pr = _gh_session.put(url, headers=headers, json=payload, timeout=20)
         if pr.status_code in [200, 201]:
             return True, "Backed up"
         return False, f"Error {pr.status_code}"
     except Exception:
         return False, "Request failed"
 
+def _fmt_with_riot(name_col, riot_col):
+    # Vectorized "Name (RiotID)" formatting; falls back to the bare name when no Riot ID
+    s = riot_col.fillna('').astype(str).str.strip()
+    return name_col.where(s == '', name_col.astype(str) + ' (' + s + ')')
+
+def vec_escape(s):
+    # Column-wise html.escape (quote=True): one pass per entity instead of a Python call per cell
+    return (s.fillna('').astype(str)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False)
+            .str.replace('"', '&quot;', regex=False)
+            .str.replace("'", '&#x27;', regex=False))
+
+@contextmanager
+def _dbconn():
+    # Read helpers borrow a pooled read-only connection instead of connect/close per cache miss.
+    # A fresh DB has no file to open read-only yet, so fall back to the shared pooled connection.
+    if not os.path.exists(DB_PATH):
+        with DB_POOL_LOCK:
+            yield get_pooled_conn()
+        return
+    with reader_conn() as conn:
+        yield conn
+
+def _fast_read(conn, sql, params=(), dtypes=None):
+    # Thin read_sql for small fixed-schema queries: cursor rows straight into from_records
+    cur = conn.execute(sql, params)
+    cols = [d[0] for d in cur.description]
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=cols, coerce_float=True)
+    if dtypes:
+        df = df.astype(dtypes, copy=False)
+    return df
+
+_SCORE_INT_COLS = ('score_t1', 'score_t2', 'team1_rounds', 'team2_rounds', 'map_index', 'is_forfeit', 'winner_id')
+
+def _downcast_ints(df, cols=_SCORE_INT_COLS):
+    # Cached frames keep small counters at the narrowest int width; NULL-bearing columns stay float
+    for c in cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], downcast='integer')
+    return df
+
+_STAT_INT_COLS = ('map_index', 'acs', 'kills', 'deaths', 'assists', 'is_sub')
+
 @st.cache_data(ttl=300)
 def get_substitutions_log():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
-            """
-            SELECT msm.match_id, msm.map_index, m.week, m.group_name,
-                   t.name AS team, p.name AS player, p.riot_id AS player_riot,
-                   sp.name AS subbed_for, sp.riot_id AS sub_riot,
-                   msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            LEFT JOIN teams t ON msm.team_id = t.id
-            LEFT JOIN players p ON msm.player_id = p.id
-            LEFT JOIN players sp ON msm.subbed_for_id = sp.id
-            WHERE msm.is_sub = 1 AND m.status = 'completed'
-            ORDER BY m.week, msm.match_id, msm.map_index
-            """,
-            conn,
-        )
-        if not df.empty:
-            df['player'] = df.apply(lambda r: f"{r['player']} ({r['player_riot']})" if r['player_riot'] and str(r['player_riot']).strip() else r['player'], axis=1)
-            df['subbed_for'] = df.apply(lambda r: f"{r['subbed_for']} ({r['sub_riot']})" if r['sub_riot'] and str(r['sub_riot']).strip() else r['subbed_for'], axis=1)
-            df = df.drop(columns=['player_riot', 'sub_riot'])
-    except Exception:
-        conn.close()
-        return pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                """
+                SELECT msm.match_id, msm.map_index, m.week, m.group_name,
+                       t.name AS team, p.name AS player, p.riot_id AS player_riot,
+                       sp.name AS subbed_for, sp.riot_id AS sub_riot,
+                       msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists
+                FROM match_stats_map msm
+                JOIN matches m ON msm.match_id = m.id
+                LEFT JOIN teams t ON msm.team_id = t.id
+                LEFT JOIN players p ON msm.player_id = p.id
+                LEFT JOIN players sp ON msm.subbed_for_id = sp.id
+                WHERE msm.is_sub = 1 AND m.status = 'completed'
+                ORDER BY m.week, msm.match_id, msm.map_index
+                """,
+                conn,
+            )
+            if not df.empty:
+                df['player'] = _fmt_with_riot(df['player'], df['player_riot'])
+                df['subbed_for'] = _fmt_with_riot(df['subbed_for'], df['sub_riot'])
+                df = df.drop(columns=['player_riot', 'sub_riot'])
+        except Exception:
+            return pd.DataFrame()
     return df
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, show_spinner=False)
 def get_player_profile(player_id):
-    import pandas as pd
-    conn = get_conn()
-    try:
-        info = pd.read_sql(
-            "SELECT p.id, p.name, p.riot_id, p.rank, t.tag as team FROM players p LEFT JOIN teams t ON p.default_team_id=t.id WHERE p.id=?",
-            conn,
-            params=(int(player_id),),
-        )
-        if info.empty:
-            conn.close()
-            return {}
+    with _dbconn() as conn:
+        try:
+            info = pd.read_sql(
+                "SELECT p.id, p.name, p.riot_id, p.rank, t.tag as team FROM players p LEFT JOIN teams t ON p.default_team_id=t.id WHERE p.id=?",
+                conn,
+                params=(int(player_id),),
+            )
+            if info.empty:
+                return {}
+                
+            # Format name to include Riot ID if available
+            p_name = info.iloc[0]['name']
+            p_riot = info.iloc[0]['riot_id']
+            display_name = f"{p_name} ({p_riot})" if p_riot and str(p_riot).strip() else p_name
             
-        # Format name to include Riot ID if available
-        p_name = info.iloc[0]['name']
-        p_riot = info.iloc[0]['riot_id']
-        display_name = f"{p_name} ({p_riot})" if p_riot and str(p_riot).strip() else p_name
-        
-        rank_val = info.iloc[0]['rank']
-        
-        # Stats with match metadata in one go
-        stats = pd.read_sql(
-            """
-            SELECT msm.match_id, msm.map_index, msm.agent, msm.acs, msm.kills, msm.deaths, msm.assists, msm.is_sub, m.week
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            WHERE msm.player_id=? AND m.status = 'completed'
-            """,
-            conn,
-            params=(int(player_id),),
-        )
-        
-        # Combined Benchmarks
-        bench = pd.read_sql(
-            """
-            SELECT 
-                AVG(msm.acs) as lg_acs, AVG(msm.kills) as lg_k, AVG(msm.deaths) as lg_d, AVG(msm.assists) as lg_a,
-                AVG(CASE WHEN p.rank = ? THEN msm.acs ELSE NULL END) as r_acs,
-                AVG(CASE WHEN p.rank = ? THEN msm.kills ELSE NULL END) as r_k,
-                AVG(CASE WHEN p.rank = ? THEN msm.deaths ELSE NULL END) as r_d,
-                AVG(CASE WHEN p.rank = ? THEN msm.assists ELSE NULL END) as r_a
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            JOIN players p ON msm.player_id = p.id
-            WHERE m.status = 'completed'
-            """,
-            conn,
-            params=(rank_val, rank_val, rank_val, rank_val)
-        ).iloc[0]
-        
-        trend = pd.DataFrame()
-        if not stats.empty:
-            agg = stats.groupby('match_id').agg({'acs':'mean','kills':'sum','deaths':'sum','week':'first'}).reset_index()
-            agg['kda'] = agg['kills'] / agg['deaths'].replace(0, 1)
-            agg['label'] = 'W' + agg['week'].fillna(0).astype(int).astype(str) + '-M' + agg['match_id'].astype(int).astype(str)
-            agg = agg.rename(columns={'acs':'avg_acs'})
-            trend = agg[['label','avg_acs','kda']]
+            rank_val = info.iloc[0]['rank']
             
-        conn.close()
-    except Exception:
-        if 'conn' in locals(): conn.close()
-        return {}
+            # Player stats and league/rank benchmarks in one round-trip: the one-row
+            # bench CTE is LEFT JOINed to the player's completed map rows
+            combined = pd.read_sql(
+                """
+                WITH done AS (
+                    SELECT msm.*, m.week
+                    FROM match_stats_map msm
+                    JOIN matches m ON msm.match_id = m.id
+                    WHERE m.status = 'completed'
+                ),
+                bench AS (
+                    SELECT 
+                        AVG(d.acs) as lg_acs, AVG(d.kills) as lg_k, AVG(d.deaths) as lg_d, AVG(d.assists) as lg_a,
+                        AVG(CASE WHEN p.rank = ? THEN d.acs ELSE NULL END) as r_acs,
+                        AVG(CASE WHEN p.rank = ? THEN d.kills ELSE NULL END) as r_k,
+                        AVG(CASE WHEN p.rank = ? THEN d.deaths ELSE NULL END) as r_d,
+                        AVG(CASE WHEN p.rank = ? THEN d.assists ELSE NULL END) as r_a
+                    FROM done d
+                    JOIN players p ON d.player_id = p.id
+                )
+                SELECT b.*, s.match_id, s.map_index, s.agent, s.acs, s.kills, s.deaths, s.assists, s.is_sub, s.week
+                FROM bench b
+                LEFT JOIN done s ON s.player_id = ?
+                """,
+                conn,
+                params=(rank_val, rank_val, rank_val, rank_val, int(player_id))
+            )
+            bench = combined.iloc[0][['lg_acs', 'lg_k', 'lg_d', 'lg_a', 'r_acs', 'r_k', 'r_d', 'r_a']]
+            stats = combined.loc[combined['match_id'].notna(), ['match_id', 'map_index', 'agent', 'acs', 'kills', 'deaths', 'assists', 'is_sub', 'week']].reset_index(drop=True)
+            
+            trend = pd.DataFrame()
+            if not stats.empty:
+                agg = stats.groupby('match_id').agg({'acs':'mean','kills':'sum','deaths':'sum','week':'first'}).reset_index()
+                agg['kda'] = agg['kills'] / agg['deaths'].replace(0, 1)
+                agg['label'] = 'W' + agg['week'].fillna(0).astype(int).astype(str) + '-M' + agg['match_id'].astype(int).astype(str)
+                agg = agg.rename(columns={'acs':'avg_acs'})
+                trend = agg[['label','avg_acs','kda']]
+                
+        except Exception:
+            return {}
         
     games = stats['match_id'].nunique() if not stats.empty else 0
     avg_acs = float(stats['acs'].mean()) if not stats.empty else 0.0
@@ -1164,6 +1494,10 @@ def get_player_profile(player_id):
         'total_kills': total_k,
         'total_deaths': total_d,
         'total_assists': total_a,
+        # Per-game averages for the benchmark table/chart, computed once with the cached profile
+        'kpg': total_k / max(games, 1),
+        'dpg': total_d / max(games, 1),
+        'apg': total_a / max(games, 1),
         'kd_ratio': round(kd, 2),
         'sr_avg_acs': round(float(bench['r_acs'] or 0), 1),
         'sr_k': round(float(bench['r_k'] or 0), 1),
@@ -1194,450 +1528,698 @@ def reset_db():
     init_match_stats_map_table()
     ensure_upgrade_schema()
 
+# Small pool so independent key derivations (admin seeding) can overlap
+_hash_pool = ThreadPoolExecutor(max_workers=2)
+
+# New hashes use scrypt where OpenSSL provides it; existing PBKDF2 rows keep verifying
+HASH_SCHEME = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+
+def _derive_key(password, salt, scheme):
+    pw = password.encode('utf-8')
+    if scheme == "scrypt":
+        return hashlib.scrypt(pw, salt=salt, n=2**14, r=8, p=1, dklen=32)
+    return hashlib.pbkdf2_hmac('sha256', pw, salt, 200000, dklen=32)
+
 def hash_password(password, salt=None):
     import secrets
-    import hashlib
     if salt is None:
         salt = secrets.token_bytes(16)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200000)
-    return salt, hashed
+    return salt, _derive_key(password, salt, HASH_SCHEME)
 
-def verify_password(password, salt, stored_hash):
-    import hashlib
-    import hmac
-    calc = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200000)
+def verify_password(password, salt, stored_hash, scheme="pbkdf2"):
+    calc = _derive_key(password, salt, scheme or "pbkdf2")
     return hmac.compare_digest(calc, stored_hash)
 
 def admin_exists():
-    conn = get_conn()
+    conn = get_thread_conn()
     cur = conn.execute("SELECT COUNT(*) FROM admins WHERE is_active=1")
     count = cur.fetchone()[0]
-    conn.close()
     return count > 0
 
 def create_admin(username, password):
     salt, ph = hash_password(password)
-    conn = get_conn()
+    conn = get_thread_conn()
     role = get_secret("ADMIN_SEED_ROLE", "admin") if not admin_exists() else "admin"
-    conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)", (username, ph, salt, role))
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)", (username, ph, salt, role, HASH_SCHEME))
+        conn.commit()
+    except Exception:
+        # Don't leave the shared connection holding an open write transaction
+        conn.rollback()
+        raise
 
 def create_admin_with_role(username, password, role):
     salt, ph = hash_password(password)
-    conn = get_conn()
-    conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)", (username, ph, salt, role))
-    conn.commit()
-    conn.close()
+    conn = get_thread_conn()
+    try:
+        conn.execute("INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)", (username, ph, salt, role, HASH_SCHEME))
+        conn.commit()
+    except Exception:
+        # Don't leave the shared connection holding an open write transaction
+        conn.rollback()
+        raise
 
 def ensure_seed_admins(conn=None):
     su = get_secret("ADMIN_SEED_USER")
     sp = get_secret("ADMIN_SEED_PWD")
     sr = get_secret("ADMIN_SEED_ROLE", "admin")
     
-    should_close = False
+    owns_conn = False
     if conn is None:
-        conn = get_conn()
-        should_close = True
+        conn = get_thread_conn()
+        owns_conn = True
     
     c = conn.cursor()
+    # Missing seed admins get their hashes derived concurrently; hashlib drops the GIL while hashing
+    fut = None
     if su and sp:
         row = c.execute("SELECT id, role FROM admins WHERE username=?", (su,)).fetchone()
         if not row:
-            salt, ph = hash_password(sp)
-            c.execute(
-                "INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)",
-                (su, ph, salt, sr)
-            )
+            fut = _hash_pool.submit(hash_password, sp)
         else:
             if row[1] != sr:
                 c.execute("UPDATE admins SET role=? WHERE id=?", (sr, int(row[0])))
     su2 = get_secret("ADMIN2_USER")
     sp2 = get_secret("ADMIN2_PWD")
     sr2 = get_secret("ADMIN2_ROLE", "admin")
+    fut2 = None
     if su2 and sp2:
         row2 = c.execute("SELECT id FROM admins WHERE username=?", (su2,)).fetchone()
         if not row2:
-            salt2, ph2 = hash_password(sp2)
-            c.execute(
-                "INSERT INTO admins (username, password_hash, salt, is_active, role) VALUES (?, ?, ?, 1, ?)",
-                (su2, ph2, salt2, sr2)
-            )
+            fut2 = _hash_pool.submit(hash_password, sp2)
+    if fut is not None:
+        salt, ph = fut.result()
+        c.execute(
+            "INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)",
+            (su, ph, salt, sr, HASH_SCHEME)
+        )
+    if fut2 is not None:
+        salt2, ph2 = fut2.result()
+        c.execute(
+            "INSERT INTO admins (username, password_hash, salt, is_active, role, hash_scheme) VALUES (?, ?, ?, 1, ?, ?)",
+            (su2, ph2, salt2, sr2, HASH_SCHEME)
+        )
     
-    if should_close:
+    if owns_conn:
         conn.commit()
-        conn.close()
 
 def authenticate(username, password):
-    conn = get_conn()
-    row = conn.execute("SELECT username, password_hash, salt, role FROM admins WHERE username=? AND is_active=1", (username,)).fetchone()
-    conn.close()
+    conn = get_thread_conn()
+    row = conn.execute("SELECT id, username, password_hash, salt, role, hash_scheme FROM admins WHERE username=? AND is_active=1", (username,)).fetchone()
     if not row:
         return None
-    u, ph, salt, role = row
-    if verify_password(password, salt, ph):
-        return {"username": u, "role": role}
-    return None
+    aid, u, ph, salt, role, scheme = row
+    if not verify_password(password, salt, ph, scheme):
+        return None
+    if (scheme or "pbkdf2") != HASH_SCHEME:
+        # Re-hash legacy PBKDF2 passwords with the current scheme on successful login
+        new_salt, new_ph = hash_password(password)
+        try:
+            conn.execute("UPDATE admins SET password_hash=?, salt=?, hash_scheme=? WHERE id=?", (new_ph, new_salt, HASH_SCHEME, int(aid)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+    return {"username": u, "role": role}
 
 def upsert_match_maps(match_id, maps_data):
-    conn = get_conn()
-    c = conn.cursor()
-    for m in maps_data:
-        c.execute("SELECT id FROM match_maps WHERE match_id=? AND map_index=?", (match_id, m['map_index']))
-        ex = c.fetchone()
-        if ex:
-            c.execute(
-                "UPDATE match_maps SET map_name=?, team1_rounds=?, team2_rounds=?, winner_id=?, is_forfeit=? WHERE id=?",
-                (m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0), ex[0])
-            )
-        else:
-            c.execute(
-                "INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (match_id, m['map_index'], m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0))
-            )
-    conn.commit()
-    conn.close()
-
-@st.cache_data(ttl=300)
-def get_standings():
-    import pandas as pd
-    import numpy as np
+    rows = [
+        (match_id, m['map_index'], m['map_name'], m['team1_rounds'], m['team2_rounds'], m['winner_id'], m.get('is_forfeit', 0))
+        for m in maps_data
+    ]
     conn = get_conn()
     try:
-        teams_df = pd.read_sql_query("SELECT id, name, group_name, logo_path FROM teams", conn)
-        # Join with match_maps to get round scores for BO1
-        matches_df = pd.read_sql_query("""
-            SELECT m.*, mm.team1_rounds, mm.team2_rounds 
-            FROM matches m
-            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-            WHERE m.status='completed' AND m.match_type='regular' AND (UPPER(m.format)='BO1' OR m.format IS NULL)
-        """, conn)
+        conn.execute("BEGIN")
+        conn.executemany(
+            """
+            INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(match_id, map_index) DO UPDATE SET
+                map_name=excluded.map_name,
+                team1_rounds=excluded.team1_rounds,
+                team2_rounds=excluded.team2_rounds,
+                winner_id=excluded.winner_id,
+                is_forfeit=excluded.is_forfeit
+            """,
+            rows
+        )
+        conn.commit()
     except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        return pd.DataFrame()
-    conn.close()
-    
-    # Pre-calculate logo display safety to cache it
-    # Vectorized check using list comprehension (faster than .apply for small/medium DFs)
-    teams_df['logo_display'] = [
-        p if p and not (".." in p or p.startswith("/") or p.startswith("\\")) and os.path.exists(p) 
-        else None 
-        for p in teams_df['logo_path']
-    ]
+    get_match_ids_with_maps.clear()
 
-    exclude_ids = set(teams_df[teams_df['name'].isin(['FAT1','FAT2'])]['id'].tolist())
-    if exclude_ids:
-        teams_df = teams_df[~teams_df['id'].isin(exclude_ids)]
-        matches_df = matches_df[~(matches_df['team1_id'].isin(exclude_ids) | matches_df['team2_id'].isin(exclude_ids))]
-    
-    # Initialize stats using vectorization
-    if matches_df.empty:
-        for col in ['Wins', 'Losses', 'RD', 'Points', 'Points Against', 'Played']:
-            teams_df[col] = 0
-        return teams_df
+# Logo paths already found on disk; misses aren't remembered, so a logo uploaded later shows on the next rebuild
+_logo_hits = set()
 
-    # Calculate match-level stats
-    m = matches_df.copy()
-    
-    # Ensure scores are numeric to prevent alignment/broadcasting errors
-    m['score_t1'] = pd.to_numeric(m['score_t1'], errors='coerce').fillna(0)
-    m['score_t2'] = pd.to_numeric(m['score_t2'], errors='coerce').fillna(0)
-    
-    # For BO1, if we have map rounds, use them instead of map wins for points/RD
-    if 'team1_rounds' in m.columns and 'team2_rounds' in m.columns:
-        m['score_t1'] = np.where(m['team1_rounds'].notna(), m['team1_rounds'], m['score_t1'])
-        m['score_t2'] = np.where(m['team2_rounds'].notna(), m['team2_rounds'], m['score_t2'])
-    
-    # Points for Team 1
-    m['p1'] = np.where(
-        m['score_t1'] > m['score_t2'],
-        15,
-        np.minimum(m['score_t1'], 12)
-    )
-    
-    # Points for Team 2
-    m['p2'] = np.where(
-        m['score_t2'] > m['score_t1'],
-        15,
-        np.minimum(m['score_t2'], 12)
-    )
-    
-    # Wins/Losses
-    m['t1_win'] = (m['score_t1'] > m['score_t2']).astype(int)
-    m['t2_win'] = (m['score_t2'] > m['score_t1']).astype(int)
-    
-    # Reshape to team-level
-    t1_stats = m.groupby('team1_id').agg({
-        't1_win': 'sum',
-        't2_win': 'sum',
-        'p1': 'sum',
-        'p2': 'sum',
-        'id': 'count'
-    }).rename(columns={'t1_win': 'Wins', 't2_win': 'Losses', 'p1': 'Points', 'p2': 'Points Against', 'id': 'Played'})
-    
-    t2_stats = m.groupby('team2_id').agg({
-        't2_win': 'sum',
-        't1_win': 'sum',
-        'p2': 'sum',
-        'p1': 'sum',
-        'id': 'count'
-    }).rename(columns={'t2_win': 'Wins', 't1_win': 'Losses', 'p2': 'Points', 'p1': 'Points Against', 'id': 'Played'})
-
-    # Combine stats
-    combined = pd.concat([t1_stats, t2_stats]).groupby(level=0).sum()
-    combined['PD'] = combined['Points'] - combined['Points Against']
+def safe_logo_path(p):
+    # Logo validation: rejects traversal/absolute paths; found files skip the stat() on later standings rebuilds
+    if not isinstance(p, str) or not p:
+        return None
+    if ".." in p or p.startswith("/") or p.startswith("\\"):
+        return None
+    if p in _logo_hits:
+        return p
+    if os.path.exists(os.path.join(ROOT_DIR, p)):
+        _logo_hits.add(p)
+        return p
+    return None
+
+def clear_logo_cache():
+    _logo_hits.clear()
+
+# The larger read-mostly frames are cached as shared resources to skip cache_data's
+# hash + copy on every hit; callers must .copy() before mutating them.
+@st.cache_resource(ttl=300)
+def get_standings():
+    with _dbconn() as conn:
+        try:
+            teams_df = pd.read_sql_query("SELECT id, name, group_name, logo_path FROM teams", conn)
+            # Aggregate per team in SQL: one row per (match, side), then GROUP BY team.
+            # For BO1, map rounds (map_index 0) take precedence over the stored match score.
+            stats_df = pd.read_sql_query("""
+                WITH m AS (
+                    SELECT m.team1_id, m.team2_id,
+                           COALESCE(mm.team1_rounds, m.score_t1, 0) AS s1,
+                           COALESCE(mm.team2_rounds, m.score_t2, 0) AS s2
+                    FROM matches m
+                    LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+                    WHERE m.status='completed' AND m.match_type='regular' AND (UPPER(m.format)='BO1' OR m.format IS NULL)
+                      AND m.team1_id NOT IN (SELECT id FROM teams WHERE name IN ('FAT1','FAT2'))
+                      AND m.team2_id NOT IN (SELECT id FROM teams WHERE name IN ('FAT1','FAT2'))
+                ),
+                sides AS (
+                    SELECT team1_id AS tid,
+                           CASE WHEN s1>s2 THEN 1 ELSE 0 END AS w,
+                           CASE WHEN s2>s1 THEN 1 ELSE 0 END AS l,
+                           CASE WHEN s1>s2 THEN 15 ELSE MIN(s1,12) END AS pf,
+                           CASE WHEN s2>s1 THEN 15 ELSE MIN(s2,12) END AS pa
+                    FROM m
+                    UNION ALL
+                    SELECT team2_id,
+                           CASE WHEN s2>s1 THEN 1 ELSE 0 END,
+                           CASE WHEN s1>s2 THEN 1 ELSE 0 END,
+                           CASE WHEN s2>s1 THEN 15 ELSE MIN(s2,12) END,
+                           CASE WHEN s1>s2 THEN 15 ELSE MIN(s1,12) END
+                    FROM m
+                )
+                SELECT tid AS id, SUM(w) AS Wins, SUM(l) AS Losses, SUM(pf) AS Points, SUM(pa) AS "Points Against", COUNT(*) AS Played
+                FROM sides
+                GROUP BY tid
+            """, conn)
+        except Exception:
+            return pd.DataFrame()
     
-    # Merge with teams_df
-    df = teams_df.merge(combined, left_on='id', right_index=True, how='left').fillna(0)
+    # Pre-calculate logo display safety to cache it
+    # Vectorized check using list comprehension (faster than .apply for small/medium DFs)
+    teams_df['logo_display'] = teams_df['logo_path'].map(safe_logo_path)
+    teams_df = teams_df[~teams_df['name'].isin(['FAT1','FAT2'])]
     
-    # Ensure correct types for numeric columns
-    for col in ['Wins', 'Losses', 'PD', 'Points', 'Points Against', 'Played']:
-        df[col] = df[col].astype(int)
+    # Merge the aggregated stats into the (small) teams table
+    df = teams_df.merge(stats_df, on='id', how='left')
+    for col in ['Wins', 'Losses', 'Points', 'Points Against', 'Played']:
+        df[col] = df[col].fillna(0).astype(int)
+    df['PD'] = df['Points'] - df['Points Against']
         
     return df.sort_values(by=['Points', 'Points Against'], ascending=[False, True])
 
 @st.cache_data(ttl=60)
 def get_player_leaderboard():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query(
-            """
-            SELECT p.id as player_id,
-                   p.name,
-                   p.riot_id,
-                   t.tag as team,
-                   COUNT(DISTINCT msm.match_id) as games,
-                   AVG(msm.acs) as avg_acs,
-                   SUM(msm.kills) as total_kills,
-                   SUM(msm.deaths) as total_deaths,
-                   SUM(msm.assists) as total_assists
-            FROM match_stats_map msm
-            JOIN matches m ON msm.match_id = m.id
-            JOIN players p ON msm.player_id = p.id
-            LEFT JOIN teams t ON p.default_team_id = t.id
-            WHERE m.status = 'completed'
-            GROUP BY p.id, p.name, p.riot_id
-            HAVING games > 0
-            """,
-            conn,
-        )
-    except Exception:
-        conn.close()
-        return pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql_query(
+                """
+                SELECT p.id as player_id,
+                       p.name,
+                       p.riot_id,
+                       t.tag as team,
+                       COUNT(DISTINCT msm.match_id) as games,
+                       AVG(msm.acs) as avg_acs,
+                       SUM(msm.kills) as total_kills,
+                       SUM(msm.deaths) as total_deaths,
+                       SUM(msm.assists) as total_assists
+                FROM match_stats_map msm
+                JOIN matches m ON msm.match_id = m.id
+                JOIN players p ON msm.player_id = p.id
+                LEFT JOIN teams t ON p.default_team_id = t.id
+                WHERE m.status = 'completed'
+                GROUP BY p.id, p.name, p.riot_id
+                HAVING games > 0
+                """,
+                conn,
+            )
+        except Exception:
+            return pd.DataFrame()
     
     if not df.empty:
         # Format name to include Riot ID if available
-        df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
+        df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
         df = df.drop(columns=['riot_id'])
         df['kd_ratio'] = df['total_kills'] / df['total_deaths'].replace(0, 1)
         df['avg_acs'] = df['avg_acs'].round(1)
         df['kd_ratio'] = df['kd_ratio'].round(2)
     return df.sort_values('avg_acs', ascending=False)
 
-@st.cache_data(ttl=60)
-def get_week_matches(week):
-    import pandas as pd
-    conn = get_conn()
-    df = pd.read_sql_query(
-        """
-        SELECT m.id, m.week, m.group_name, m.status, m.format, m.maps_played, m.is_forfeit,
-               t1.name as t1_name, t2.name as t2_name,
-               m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
-               mm.team1_rounds, mm.team2_rounds
-        FROM matches m
-        JOIN teams t1 ON m.team1_id = t1.id
-        JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-        WHERE m.week = ? AND m.match_type = 'regular'
-        ORDER BY m.id
-        """,
-        conn,
-        params=(week,),
-    )
+def _apply_bo1_scores(df):
     # For BO1, if we have map rounds, use them as the primary scores for display
-    if not df.empty and 'team1_rounds' in df.columns:
-        is_bo1 = (df['format'].str.upper() == 'BO1') | (df['format'].isna())
-        df.loc[is_bo1 & df['team1_rounds'].notna(), 'score_t1'] = df.loc[is_bo1 & df['team1_rounds'].notna(), 'team1_rounds']
-        df.loc[is_bo1 & df['team2_rounds'].notna(), 'score_t2'] = df.loc[is_bo1 & df['team2_rounds'].notna(), 'team2_rounds']
-        
-        # Ensure integer type for scores to avoid .0 display
-        df['score_t1'] = df['score_t1'].astype(int)
-        df['score_t2'] = df['score_t2'].astype(int)
-    conn.close()
+    if df.empty or 'team1_rounds' not in df.columns:
+        return df
+    # Missing format counts as BO1; one string pass instead of astype(str) + isna
+    is_bo1 = df['format'].fillna('BO1').str.upper().eq('BO1')
+    m1 = is_bo1 & df['team1_rounds'].notna()
+    m2 = is_bo1 & df['team2_rounds'].notna()
+    # Ensure integer type for scores to avoid .0 display
+    df['score_t1'] = df['team1_rounds'].where(m1, df['score_t1']).astype(int)
+    df['score_t2'] = df['team2_rounds'].where(m2, df['score_t2']).astype(int)
     return df
 
-@st.cache_data(ttl=300)
-def get_playoff_matches():
-    import pandas as pd
-    conn = get_conn()
-    df = pd.read_sql_query(
-        """
-        SELECT m.id, m.playoff_round, m.bracket_pos, m.status, m.format, m.maps_played, m.is_forfeit,
-               m.bracket_label,
-               t1.name as t1_name, t2.name as t2_name,
-               m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
-               m.winner_id,
-               mm.team1_rounds, mm.team2_rounds
-        FROM matches m
-        LEFT JOIN teams t1 ON m.team1_id = t1.id
-        LEFT JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
-        WHERE m.match_type = 'playoff'
-        ORDER BY m.playoff_round ASC, m.bracket_pos ASC
-        """,
-        conn
-    )
-    # For BO1, if we have map rounds, use them as the primary scores for display
-    if not df.empty and 'team1_rounds' in df.columns:
-        is_bo1 = (df['format'].str.upper() == 'BO1') | (df['format'].isna())
-        df.loc[is_bo1 & df['team1_rounds'].notna(), 'score_t1'] = df.loc[is_bo1 & df['team1_rounds'].notna(), 'team1_rounds']
-        df.loc[is_bo1 & df['team2_rounds'].notna(), 'score_t2'] = df.loc[is_bo1 & df['team2_rounds'].notna(), 'team2_rounds']
-        
-        # Ensure integer type for scores to avoid .0 display
-        df['score_t1'] = df['score_t1'].astype(int)
-        df['score_t2'] = df['score_t2'].astype(int)
-    conn.close()
+@st.cache_data(ttl=60)
+def get_week_matches(week):
+    with _dbconn() as conn:
+        df = pd.read_sql_query(
+            """
+            SELECT m.id, m.week, m.group_name, m.status, m.format, m.maps_played, m.is_forfeit,
+                   t1.name as t1_name, t2.name as t2_name,
+                   m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
+                   mm.team1_rounds, mm.team2_rounds
+            FROM matches m
+            JOIN teams t1 ON m.team1_id = t1.id
+            JOIN teams t2 ON m.team2_id = t2.id
+            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+            WHERE m.week = ? AND m.match_type = 'regular'
+            ORDER BY m.id
+            """,
+            conn,
+            params=(week,),
+        )
+        df = _downcast_ints(_apply_bo1_scores(df))
     return df
 
-@st.cache_data(ttl=300)
-def get_match_maps(match_id):
-    import pandas as pd
-    conn = get_conn()
-    df = pd.read_sql_query(
-        "SELECT map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit FROM match_maps WHERE match_id=? ORDER BY map_index",
-        conn,
-        params=(match_id,),
-    )
-    conn.close()
-    return df
+@st.cache_data(ttl=60)
+def get_week_match_opts(week):
+    # Match Editor labels, cached alongside the week's matches so widget reruns skip the string build
+    dfm = get_week_matches(week)
+    return [f"ID {i}: {a} vs {b} ({g})" for i, a, b, g in zip(
+        dfm['id'].tolist(),
+        dfm['t1_name'].to_numpy(dtype=object, na_value=''),
+        dfm['t2_name'].to_numpy(dtype=object, na_value=''),
+        dfm['group_name'].to_numpy(dtype=object, na_value=''),
+    )]
 
 @st.cache_data(ttl=300)
-def get_all_players_directory(format_names=True):
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
+def get_playoff_matches():
+    with _dbconn() as conn:
+        df = pd.read_sql_query(
             """
-            SELECT p.id, p.name, p.riot_id, p.rank, t.name as team
-            FROM players p
-            LEFT JOIN teams t ON p.default_team_id = t.id
-            ORDER BY p.name
+            SELECT m.id, m.playoff_round, m.bracket_pos, m.status, m.format, m.maps_played, m.is_forfeit,
+                   m.bracket_label,
+                   t1.name as t1_name, t2.name as t2_name,
+                   m.score_t1, m.score_t2, t1.id as t1_id, t2.id as t2_id,
+                   m.winner_id,
+                   mm.team1_rounds, mm.team2_rounds
+            FROM matches m
+            LEFT JOIN teams t1 ON m.team1_id = t1.id
+            LEFT JOIN teams t2 ON m.team2_id = t2.id
+            LEFT JOIN match_maps mm ON m.id = mm.match_id AND mm.map_index = 0
+            WHERE m.match_type = 'playoff'
+            ORDER BY m.playoff_round ASC, m.bracket_pos ASC
             """,
             conn
         )
-    except Exception:
-        df = pd.DataFrame(columns=['id','name','riot_id','rank','team'])
-    finally:
-        conn.close()
-    
-    if not df.empty and format_names:
-        df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-    
+        df = _apply_bo1_scores(df)
+        # Editor select labels built once per cache fill instead of on every rerun
+        df['opt_label'] = "R" + df['playoff_round'].astype(str) + " P" + df['bracket_pos'].astype(str) + ": " + df['t1_name'].fillna('') + " vs " + df['t2_name'].fillna('')
     return df
 
 @st.cache_data(ttl=300)
-def get_map_stats(match_id, map_index, team_id):
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql(
-            """
-            SELECT p.name, p.riot_id, ms.agent, ms.acs, ms.kills, ms.deaths, ms.assists, ms.is_sub 
-            FROM match_stats_map ms 
-            JOIN players p ON ms.player_id=p.id 
-            WHERE ms.match_id=? AND ms.map_index=? AND ms.team_id=?
-            """, 
-            conn, 
-            params=(int(match_id), int(map_index), int(team_id))
+def get_match_maps(match_id):
+    with _dbconn() as conn:
+        df = _fast_read(
+            conn,
+            "SELECT map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit FROM match_maps WHERE match_id=? ORDER BY map_index",
+            (match_id,),
         )
-        if not df.empty:
-            df['name'] = df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-            df = df.drop(columns=['riot_id'])
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df
+    return _downcast_ints(df)
 
 @st.cache_data(ttl=300)
-def get_team_history_counts():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query(
-            "SELECT team_id, COUNT(DISTINCT season_id) as season_count FROM team_history GROUP BY team_id",
+def get_match_ids_with_maps():
+    # Negative cache: matches absent here have no map rows, so their lookups can be skipped
+    with _dbconn() as conn:
+        try:
+            ids = frozenset(r[0] for r in conn.execute("SELECT DISTINCT match_id FROM match_maps").fetchall())
+        except Exception:
+            ids = frozenset()
+    return ids
+
+@st.cache_data(ttl=300)
+def get_match_maps_bulk(match_ids):
+    # One IN (...) query for a whole list of matches instead of get_match_maps per row
+    cols = "match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit"
+    if not match_ids:
+        return pd.DataFrame(columns=cols.split(", "))
+    placeholders = ",".join("?" * len(match_ids))
+    with _dbconn() as conn:
+        df = _fast_read(
             conn,
+            f"SELECT {cols} FROM match_maps WHERE match_id IN ({placeholders}) ORDER BY match_id, map_index",
+            tuple(int(x) for x in match_ids),
         )
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    return _downcast_ints(df)
+
+@st.cache_data(ttl=300)
+def get_all_players_directory(format_names=True, search=None, ranks=None):
+    # ranks filter in SQL, search in pandas (SQLite's lower() only folds ASCII); each distinct query is one cached result set
+    clauses, params = [], []
+    if ranks is not None:
+        if not ranks:
+            return pd.DataFrame(columns=['id','name','riot_id','rank','team'])
+        clauses.append(f"COALESCE(p.rank, 'Unranked') IN ({','.join('?' * len(ranks))})")
+        params += list(ranks)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                f"""
+                SELECT p.id, p.name, p.riot_id, p.rank, t.name as team
+                FROM players p
+                LEFT JOIN teams t ON p.default_team_id = t.id
+                {where}
+                ORDER BY p.name
+                """,
+                conn,
+                params=tuple(params)
+            )
+        except Exception:
+            df = pd.DataFrame(columns=['id','name','riot_id','rank','team'])
+        
+        if search and not df.empty:
+            s = search.lower()
+            df = df[
+                df['name'].fillna('').astype(str).str.lower().str.contains(s, regex=False) |
+                df['riot_id'].fillna('').astype(str).str.lower().str.contains(s, regex=False)
+            ].reset_index(drop=True)
+        
+        if not df.empty and format_names:
+            df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
+        
+        return df
+
+@st.cache_data(ttl=300)
+def get_players_admin_frame():
+    # Unformatted directory plus stripped lowercase keys, shared by the Players Admin search filter and the Save Players duplicate check
+    df = get_all_players_directory(format_names=False).copy()
+    df['_name_lc'] = df['name'].fillna('').astype(str).str.strip().str.lower()
+    df['_riot_lc'] = df['riot_id'].fillna('').astype(str).str.strip().str.lower()
+    return df
+
+@st.cache_data(ttl=300)
+def get_map_stats_rows(match_id, map_index):
+    # Raw match_stats_map rows for one map, as the scoreboard editors hydrate them
+    with _dbconn() as conn:
+        df = _fast_read(conn, "SELECT * FROM match_stats_map WHERE match_id=? AND map_index=?", (int(match_id), int(map_index)))
+    return _downcast_ints(df, _STAT_INT_COLS)
+
+@st.cache_data(ttl=300)
+def get_map_stats(match_id, map_index, team_id):
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql(
+                """
+                SELECT p.name, p.riot_id, ms.agent, ms.acs, ms.kills, ms.deaths, ms.assists, ms.is_sub 
+                FROM match_stats_map ms 
+                JOIN players p ON ms.player_id=p.id 
+                WHERE ms.match_id=? AND ms.map_index=? AND ms.team_id=?
+                """, 
+                conn, 
+                params=(int(match_id), int(map_index), int(team_id))
+            )
+            if not df.empty:
+                df['name'] = _fmt_with_riot(df['name'], df['riot_id'])
+                df = _downcast_ints(df.drop(columns=['riot_id']), _STAT_INT_COLS)
+        except Exception:
+            df = pd.DataFrame()
     return df
 
 @st.cache_data(ttl=300)
+def get_team_history_counts():
+    with _dbconn() as conn:
+        try:
+            df = pd.read_sql_query(
+                "SELECT team_id, COUNT(DISTINCT season_id) as season_count FROM team_history GROUP BY team_id",
+                conn,
+            )
+        except Exception:
+            df = pd.DataFrame()
+    return df
+
+@st.cache_resource(ttl=300)
 def get_all_players():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT id, name, riot_id, rank, default_team_id FROM players ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = _fast_read(conn, "SELECT id, name, riot_id, rank, default_team_id FROM players ORDER BY name")
+        except Exception:
+            df = pd.DataFrame()
     return df
 
+@st.cache_resource(ttl=300)
+def get_player_lookups():
+    # Label and riot-id maps for the scoreboard editors, built once per players snapshot
+    all_df = get_all_players()
+    if all_df.empty:
+        return {}, [], {}, {}, {}, {}, {}
+    all_df = all_df.copy()
+    rid = all_df['riot_id'].fillna('').astype(str)
+    rid_key = rid.str.strip().str.lower()
+    has_riot = (rid_key != '').to_numpy()
+    all_df['display_label'] = np.where(has_riot, all_df['name'] + ' (' + rid + ')', all_df['name'])
+    global_list = all_df['display_label'].tolist()
+    # One normalised riot id per row (None when blank); all four maps are filled in a single pass
+    riot_keys = np.where(has_riot, rid_key, None).tolist()
+    global_map, label_to_riot, riot_to_label, player_lookup, label_by_name = {}, {}, {}, {}, {}
+    for pid, label, rkey in zip(all_df['id'].tolist(), global_list, riot_keys):
+        global_map[label] = pid
+        # First label equal to a name or starting with "<name> (", for Tracker names without a riot-id hit
+        label_by_name.setdefault(label, label)
+        cut = label.find(" (")
+        while cut != -1:
+            label_by_name.setdefault(label[:cut], label)
+            cut = label.find(" (", cut + 1)
+        player_lookup[pid] = {'label': label, 'riot_id': rkey}
+        if rkey is not None:
+            label_to_riot[label] = rkey
+            riot_to_label[rkey] = label
+    # team_id -> (labels in name order, label -> player id) for the "Subbing For" pickers
+    rosters = {}
+    for tid, g in all_df.sort_values('name').groupby('default_team_id', sort=False):
+        labels = g['display_label'].tolist()
+        rosters[tid] = (labels, dict(zip(labels, g['id'].tolist())))
+    return rosters, global_list, global_map, label_to_riot, riot_to_label, player_lookup, label_by_name
+
 @st.cache_data(ttl=300)
 def get_teams_list_full():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT id, name, tag, group_name, logo_path FROM teams ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
+    with _dbconn() as conn:
+        try:
+            df = _fast_read(conn, "SELECT id, name, tag, group_name, logo_path FROM teams ORDER BY name")
+        except Exception:
+            df = pd.DataFrame()
     return df
 
 @st.cache_data(ttl=300)
 def get_teams_list():
-    import pandas as pd
     df = get_teams_list_full()
     return df[['id', 'name']] if not df.empty else pd.DataFrame(columns=['id', 'name'])
 
 @st.cache_data(ttl=3600)
 def get_agents_list():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql("SELECT name FROM agents ORDER BY name", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df['name'].tolist() if not df.empty else []
+    with _dbconn() as conn:
+        try:
+            agents = [r[0] for r in conn.execute("SELECT name FROM agents ORDER BY name").fetchall()]
+        except Exception:
+            agents = []
+    return agents
 
 @st.cache_data(ttl=300)
 def get_match_weeks():
-    import pandas as pd
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query("SELECT DISTINCT week FROM matches ORDER BY week", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df['week'].tolist() if not df.empty else []
+    with _dbconn() as conn:
+        try:
+            weeks = [r[0] for r in conn.execute("SELECT DISTINCT week FROM matches ORDER BY week").fetchall()]
+        except Exception:
+            weeks = []
+    return weeks
 
 @st.cache_data(ttl=300)
 def get_match_maps_cached(match_id):
     return get_match_maps(match_id)
 
-@st.cache_data(ttl=300)
+@st.cache_resource(ttl=300)
 def get_completed_matches():
-    import pandas as pd
-    conn = get_conn()
+    with _dbconn() as conn:
+        try:
+            # Only the fields the Home / Predictor pages read
+            df = _fast_read(
+                conn,
+                "SELECT id, week, group_name, team1_id, team2_id, winner_id, score_t1, score_t2, format, is_forfeit "
+                "FROM matches WHERE status='completed'"
+            )
+        except Exception:
+            df = pd.DataFrame()
+    return _downcast_ints(df)
+
+def get_data_version(matches_df):
+    # Content hash of a get_completed_matches snapshot, taken from the frame itself so a
+    # helper keyed on it can never store a stale frame under a fresh key
+    if matches_df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(matches_df, index=False).sum())
+
+@st.cache_resource(ttl=300)
+def get_overview_bundle():
+    # Overview's three frames behind one cache entry; each loader checks out its own connection on a miss
+    return get_standings(), get_team_history_counts(), get_all_players()
+
+def _purge_players(conn, pids):
+    # Delete players with their own stats; rows where they were subbed for keep the sub's stats.
+    # Five statements for any number of players; the caller commits.
+    pids = [int(x) for x in pids]
+    if not pids:
+        return
+    ph = ",".join("?" * len(pids))
+    conn.execute(f"DELETE FROM match_stats_map WHERE player_id IN ({ph})", pids)
+    conn.execute(f"DELETE FROM match_stats WHERE player_id IN ({ph})", pids)
+    conn.execute(f"UPDATE match_stats_map SET subbed_for_id = NULL WHERE subbed_for_id IN ({ph})", pids)
+    conn.execute(f"UPDATE match_stats SET subbed_for_id = NULL WHERE subbed_for_id IN ({ph})", pids)
+    conn.execute(f"DELETE FROM players WHERE id IN ({ph})", pids)
+
+def add_matches(rows):
+    # Schedule regular-season matches from (week, group_name, format, team1_id, team2_id) tuples
+    # in one transaction on the pooled connection, however many there are
+    with pooled_write_conn() as conn:
+        conn.executemany(
+            "INSERT INTO matches (week, group_name, status, format, team1_id, team2_id, score_t1, score_t2, maps_played, match_type) "
+            "VALUES (?, ?, 'scheduled', ?, ?, ?, 0, 0, 0, 'regular')",
+            rows
+        )
+
+def clear_query_caches():
+    # cache_data plus the resource-cached frames above, after admin writes
+    st.cache_data.clear()
+    get_standings.clear()
+    get_all_players.clear()
+    get_player_lookups.clear()
+    get_completed_matches.clear()
+    get_overview_bundle.clear()
+
+@st.cache_data(ttl=300)
+def _team_stats_table(data_version, _matches_df):
+    # win_rate / avg_score / games for every team from one long-format groupby
+    df = _matches_df
+    if df.empty:
+        return {}
+    # Stack both sides with np.concatenate; no per-piece index or column alignment as with pd.concat
+    tid = np.concatenate([df['team1_id'].to_numpy(), df['team2_id'].to_numpy()])
+    winner = np.tile(df['winner_id'].to_numpy(dtype=float), 2)
+    long = pd.DataFrame({
+        'tid': tid,
+        'score': np.concatenate([df['score_t1'].to_numpy(dtype=float), df['score_t2'].to_numpy(dtype=float)]),
+        'won': winner == tid,
+    })
+    agg = long.groupby('tid').agg(games=('score', 'size'), avg_score=('score', 'mean'), wins=('won', 'sum'))
+    agg['win_rate'] = agg['wins'] / agg['games']
+    return {
+        int(tid): {'win_rate': float(r.win_rate), 'avg_score': float(r.avg_score), 'games': int(r.games)}
+        for tid, r in zip(agg.index, agg.itertuples(index=False))
+    }
+
+@st.cache_data(ttl=300)
+def _h2h_matrix(data_version, _matches_df):
+    # {(winner, opponent): wins} over all completed matches, either side of the fixture
+    df = _matches_df
+    if df.empty:
+        return {}
+    decided = df[df['winner_id'].notna()]
+    winner = decided['winner_id'].astype('int64')
+    opponent = decided['team2_id'].where(winner.eq(decided['team1_id']), decided['team1_id']).astype('int64')
+    counts = pd.DataFrame({'w': winner, 'o': opponent}).groupby(['w', 'o']).size()
+    return {(int(w), int(o)): int(n) for (w, o), n in counts.items()}
+
+def _team_card_html(row, roster_html=""):
+    # Header card for one team; visitors get the roster folded into the same block
+    b64 = row.logo_b64
+    logo_img_html = f"<img src='data:image/png;base64,{b64}' width='60'/>" if b64 else "<div style='width:60px;height:60px;background:rgba(255,255,255,0.05);border-radius:8px;display:flex;align-items:center;justify-content:center;color:var(--text-dim);'>?</div>"
+    return f"""<div class="custom-card" style="margin-bottom: 10px;">
+<div style="display: flex; align-items: center; gap: 20px;">
+<div style="flex-shrink: 0;">
+{logo_img_html}
+</div>
+<div>
+<h3 style="margin: 0; color: var(--primary-blue); font-family: 'Orbitron';">{row.name_esc} <span style="color: var(--text-dim); font-size: 0.9rem;">[{row.tag_esc}]</span></h3>
+<div style="color: var(--text-dim); font-size: 0.8rem; text-transform: uppercase; letter-spacing: 1px;">Group {row.group_esc}</div>
+</div>
+</div>
+{roster_html}</div>"""
+
+def _roster_details_html(roster):
+    # Native <details> toggle so the read-only roster needs no Streamlit expander
+    if roster is None or roster.empty:
+        body = '<div style="color: var(--text-dim); font-size: 0.9rem; padding: 8px 0;">No players yet</div>'
+    else:
+        rows = "".join(
+            f'<tr><td>{n}</td><td>{r}</td></tr>'
+            for n, r in zip(roster['display_esc'], roster['rank_esc'])
+        )
+        body = f'<table style="width: 100%;"><thead><tr><th>Name</th><th>Rank</th></tr></thead><tbody>{rows}</tbody></table>'
+    return f'<details style="margin-top: 10px;"><summary style="cursor: pointer; color: var(--text-dim);">View Roster</summary>{body}</details>'
+
+@st.cache_resource
+def _load_predictor_model():
+    # Optional ML model, imported once per process; None keeps the heuristic fallback
     try:
-        df = pd.read_sql("SELECT * FROM matches WHERE status='completed'", conn)
+        import predictor_model
     except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    return df
+        return None
+    return predictor_model
+
+def _profile_figs_key(prof):
+    # Content key for _profile_trend_figures: the trend rows plus the sub-impact numbers
+    trend = prof.get('trend')
+    trend_hash = int(pd.util.hash_pandas_object(trend, index=False).sum()) if trend is not None and not trend.empty else 0
+    return trend_hash, tuple(sorted((prof.get('sub_impact') or {}).items()))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _profile_trend_figures(pid, figs_key, _prof):
+    # Trend / sub-impact figures for one player; figs_key (see _profile_figs_key) ties the entry to the profile's content
+    figs = {}
+    trend = _prof.get('trend')
+    if trend is not None and not trend.empty:
+        figs['acs'] = px.line(trend, x='label', y='avg_acs',
+                              title="ACS Trend", markers=True,
+                              color_discrete_sequence=['#3FD1FF'])
+        figs['kda'] = px.line(trend, x='label', y='kda',
+                              title="KDA Trend", markers=True,
+                              color_discrete_sequence=['#FF4655'])
+    sid = _prof.get('sub_impact')
+    if sid:
+        figs['sub_acs'] = px.bar(x=['Starter', 'Sub'], y=[sid['starter_acs'], sid['sub_acs']],
+                                 title="ACS: Starter vs Sub",
+                                 labels={'x': 'Role', 'y': 'ACS'},
+                                 color_discrete_sequence=['#3FD1FF'])
+        figs['sub_kda'] = px.bar(x=['Starter', 'Sub'], y=[sid['starter_kda'], sid['sub_kda']],
+                                 title="KDA: Starter vs Sub",
+                                 labels={'x': 'Role', 'y': 'KDA'},
+                                 color_discrete_sequence=['#FF4655'])
+    return figs
+
+def _heuristic_probs(wr1, as1, h1, wr2, as2, h2):
+    # Team 1 win probability from the weighted heuristic; takes scalars or equal-length arrays (bulk backtests)
+    s1 = np.asarray(wr1, dtype=float) * 40 + np.asarray(as1, dtype=float) * 2 + np.asarray(h1, dtype=float) * 5
+    s2 = np.asarray(wr2, dtype=float) * 40 + np.asarray(as2, dtype=float) * 2 + np.asarray(h2, dtype=float) * 5
+    total = s1 + s2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total == 0, 0.5, s1 / total)
+
+# Partial reruns where this Streamlit supports them; older versions just call the function
+_fragment = getattr(st, "fragment", None) or (lambda fn: fn)
 
 def apply_plotly_theme(fig):
     fig.update_layout(
@@ -1677,9 +2259,8 @@ if 'last_login_attempt' not in st.session_state:
 # Use a placeholder to clear the screen during transitions
 main_container = st.empty()
 
-if st.session_state['app_mode'] == 'portal':
-    with main_container.container():
-        st.markdown("""<div class="portal-container">
+# Static portal markup; only the three buttons between these blocks are live widgets
+PORTAL_HTML_TOP = """<div class="portal-container">
 <h1 class="portal-header">VALORANT S23 PORTAL</h1>
 <p class="portal-subtitle">System Status & Access Terminal</p>
 <div class="status-grid">
@@ -1687,30 +2268,32 @@ if st.session_state['app_mode'] == 'portal':
 <div class="status-indicator status-offline">● TEAM PANEL: STAGING</div>
 <div class="status-indicator status-online">● ADMIN CORE: SECURE</div>
 </div>
-<div class="portal-options">""", unsafe_allow_html=True)
+<div class="portal-options">"""
+PORTAL_CARD_VISITOR = '<div class="portal-card-wrapper"><div class="portal-card-content"><h3>VISITOR</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Browse tournament statistics, match history, and player standings.</p></div><div class="portal-card-footer">'
+PORTAL_CARD_TEAM = '<div class="portal-card-wrapper disabled"><div class="portal-card-content"><h3>TEAM LEADER</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Manage your team roster, submit scores, and track performance.</p></div><div class="portal-card-footer">'
+PORTAL_CARD_ADMIN = '<div class="portal-card-wrapper"><div class="portal-card-content"><h3>ADMIN</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Full system administration, data management, and tournament control.</p></div><div class="portal-card-footer">'
+
+if st.session_state['app_mode'] == 'portal':
+    with main_container.container():
+        st.markdown(PORTAL_HTML_TOP, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.markdown('<div class="portal-card-wrapper"><div class="portal-card-content"><h3>VISITOR</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Browse tournament statistics, match history, and player standings.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_VISITOR, unsafe_allow_html=True)
             if st.button("ENTER PORTAL", key="enter_visitor", use_container_width=True, type="primary"):
                 st.session_state['app_mode'] = 'visitor'
                 st.rerun()
-            st.markdown('</div></div>', unsafe_allow_html=True)
             
         with col2:
-            st.markdown('<div class="portal-card-wrapper disabled"><div class="portal-card-content"><h3>TEAM LEADER</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Manage your team roster, submit scores, and track performance.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_TEAM, unsafe_allow_html=True)
             st.button("LOCKED", key="enter_team", use_container_width=True, disabled=True)
-            st.markdown('</div></div>', unsafe_allow_html=True)
             
         with col3:
-            st.markdown('<div class="portal-card-wrapper"><div class="portal-card-content"><h3>ADMIN</h3><p style="color: var(--text-dim); font-size: 0.9rem;">Full system administration, data management, and tournament control.</p></div><div class="portal-card-footer">', unsafe_allow_html=True)
+            st.markdown(PORTAL_CARD_ADMIN, unsafe_allow_html=True)
             if st.button("ADMIN LOGIN", key="enter_admin", use_container_width=True):
                 st.session_state['app_mode'] = 'admin'
                 st.rerun()
-            st.markdown('</div></div>', unsafe_allow_html=True)
-            
-        st.markdown('</div></div>', unsafe_allow_html=True)
     st.stop()
 
 # If in Visitor or Admin mode, show the dashboard
@@ -1726,7 +2309,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
         st.info("Please enter your administrator credentials to proceed.")
         
         # Check for active admin sessions first
-        active_admin = get_active_admin_session()
+        active_admin = get_active_admin_session_cached()
         
         if active_admin:
             st.error(f"Access Denied: Someone is actively working on the admin panel.")
@@ -1740,10 +2323,9 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                 st.write("### Option 1: Unlock your specific ID")
                 if st.button("🔓 UNLOCK MY ID", use_container_width=True):
                     try:
-                        conn = get_conn()
-                        conn.execute("DELETE FROM session_activity WHERE ip_address = ? AND (role = 'admin' OR role = 'dev')", (curr_ip,))
-                        conn.commit()
-                        conn.close()
+                        with pooled_write_conn() as conn:
+                            conn.execute("DELETE FROM session_activity WHERE ip_address = ? AND (role = 'admin' OR role = 'dev')", (curr_ip,))
+                        st.session_state.pop('_active_admin_cache', None)
                         st.success("Your ID has been cleared. Try logging in below.")
                         time.sleep(1)
                         st.rerun()
@@ -1761,10 +2343,9 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                         
                     if env_tok and hmac.compare_digest(force_token or "", env_tok):
                         try:
-                            conn = get_conn()
-                            conn.execute("DELETE FROM session_activity WHERE role = 'admin' OR role = 'dev'")
-                            conn.commit()
-                            conn.close()
+                            with pooled_write_conn() as conn:
+                                conn.execute("DELETE FROM session_activity WHERE role = 'admin' OR role = 'dev'")
+                            st.session_state.pop('_active_admin_cache', None)
                             st.success("ALL admin sessions cleared. You can now login.")
                             time.sleep(1)
                             st.rerun()
@@ -1794,7 +2375,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
             tok = st.text_input("Admin Token", type="password")
             if st.form_submit_button("LOGIN TO ADMIN PANEL", use_container_width=True):
                 # Check for active admin sessions first
-                active_admin = get_active_admin_session()
+                active_admin = get_active_admin_session_cached()
                 if active_admin:
                     st.error(f"Access Denied: Someone is actively working on the admin panel.")
                     st.warning(f"Active User: {active_admin[0]} ({active_admin[1]})")
@@ -1815,6 +2396,7 @@ if st.session_state['app_mode'] == 'admin' and not st.session_state.get('is_admi
                             st.session_state['login_attempts'] = 0
                             # Update activity immediately with new role
                             track_user_activity()
+                            st.session_state.pop('_active_admin_cache', None)
                             st.success("Access Granted")
                             st.rerun()
                         else:
@@ -1844,9 +2426,13 @@ if st.session_state['is_admin']:
         pages.append("Admin Panel")
 
 # Top Navigation Bar
+NAV_ACTIVE_BAR_HTML = '<div style="height: 3px; background: var(--primary-red); margin-top: -8px; box-shadow: 0 0 10px var(--primary-red); border-radius: 2px;"></div>'
 st.markdown('<div class="nav-wrapper"><div class="nav-logo">VALORANT S23 • PORTAL</div></div>', unsafe_allow_html=True)
 
 # Navigation Layout
+# The sub-nav-wrapper element draws the fixed band behind the nav row (see its CSS).
+# Inside the columns only real widgets go: per-button <div> wrappers were separate
+# elements that never wrapped anything; the active page is marked by type="primary".
 st.markdown('<div class="sub-nav-wrapper">', unsafe_allow_html=True)
 
 # Define columns based on whether admin is logged in (to add logout button)
@@ -1857,67 +2443,65 @@ if st.session_state['is_admin']:
 cols = st.columns(nav_cols_spec)
 
 with cols[0]:
-    st.markdown('<div class="exit-btn">', unsafe_allow_html=True)
     if st.button("🏠 EXIT", key="exit_portal", use_container_width=True):
         st.session_state['app_mode'] = 'portal'
         st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
     
 for i, p in enumerate(pages):
     with cols[i+1]:
         is_active = st.session_state['page'] == p
-        st.markdown(f'<div class="{"active-nav" if is_active else ""}">', unsafe_allow_html=True)
         if st.button(p, key=f"nav_{p}", use_container_width=True, 
                      type="primary" if is_active else "secondary"):
             st.session_state['page'] = p
             st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
         
         if is_active:
-            st.markdown('<div style="height: 3px; background: var(--primary-red); margin-top: -8px; box-shadow: 0 0 10px var(--primary-red); border-radius: 2px;"></div>', unsafe_allow_html=True)
+            st.markdown(NAV_ACTIVE_BAR_HTML, unsafe_allow_html=True)
 
 # Add Logout button if admin
 if st.session_state['is_admin']:
     with cols[-1]:
-        st.markdown('<div class="exit-btn">', unsafe_allow_html=True)
         if st.button(f"🚪 LOGOUT ({st.session_state['username']})", key="logout_btn", use_container_width=True):
             st.session_state['is_admin'] = False
             st.session_state['username'] = None
             st.session_state['app_mode'] = 'portal'
             st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
 page = st.session_state['page']
 
 if page == "Overview & Standings":
-    import pandas as pd
     st.markdown('<h1 class="main-header">OVERVIEW & STANDINGS</h1>', unsafe_allow_html=True)
     
-    df = get_standings()
+    df, hist, all_players_bench = get_overview_bundle()
     if not df.empty:
-        hist = get_team_history_counts()
-        all_players_bench = get_all_players()
         # Pre-group rosters for efficiency
         rosters_by_team = {}
         if not all_players_bench.empty:
             all_players_bench = all_players_bench.copy()
             # Create display name for the table
-            all_players_bench['display_name'] = all_players_bench.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-            for tid, group in all_players_bench.groupby('default_team_id'):
-                # Keep all columns but we'll show display_name in the table
-                rosters_by_team[int(tid)] = group
+            all_players_bench['display_name'] = _fmt_with_riot(all_players_bench['name'], all_players_bench['riot_id'])
+            # Row positions per team, sliced down to the two displayed columns
+            roster_cols = all_players_bench[['display_name', 'rank']]
+            rosters_by_team = {int(tid): roster_cols.iloc[ix] for tid, ix in all_players_bench.groupby('default_team_id').indices.items()}
 
         df = df.merge(hist, left_on='id', right_on='team_id', how='left')
         df['season_count'] = df['season_count'].fillna(1).astype(int)
         
-        groups = sorted(df['group_name'].unique())
+        # Dictionary-encode groups once: sorted categories give the order, codes drive the split
+        group_codes = df['group_name'].astype('category')
+        groups = group_codes.cat.categories.tolist()
+        frames_by_group = {g: t for g, t in df.groupby(group_codes, sort=False, observed=True)}
+        # Rank every group's table with one sort; groupby keeps that order within each group
+        ranked = df.sort_values(['Points', 'PD'], ascending=False)
+        table_cols = ['name', 'Played', 'Wins', 'Losses', 'Points', 'PD']
+        tables_by_group = {g: t[table_cols].reset_index(drop=True) for g, t in ranked.groupby('group_name', sort=False)}
         
         for grp in groups:
             st.markdown(f'<h2 style="color: var(--primary-blue); font-family: \'Orbitron\'; border-left: 4px solid var(--primary-blue); padding-left: 15px; margin: 2rem 0 1rem 0;">GROUP {html.escape(str(grp))}</h2>', unsafe_allow_html=True)
             
-            grp_df = df[df['group_name'] == grp]
+            grp_df = frames_by_group[grp]
             
             # Team Cards Grid
             t_cols = st.columns(min(len(grp_df), 3))
@@ -1942,11 +2526,11 @@ if page == "Overview & Standings":
 </div>""", unsafe_allow_html=True)
                     
                     with st.expander("Roster"):
-                        roster = rosters_by_team.get(int(row.id), pd.DataFrame())
+                        roster = rosters_by_team.get(int(row.id), EMPTY_ROSTER)
                         if roster.empty: st.caption("No players")
                         else: 
                             st.dataframe(
-                                roster[['display_name', 'rank']], 
+                                roster, 
                                 hide_index=True, 
                                 use_container_width=True,
                                 column_config={
@@ -1959,7 +2543,7 @@ if page == "Overview & Standings":
             st.markdown("<br>", unsafe_allow_html=True)
             
             # Sort and add Rank column
-            sorted_grp = grp_df[['name', 'Played', 'Wins', 'Losses', 'Points', 'PD']].sort_values(['Points', 'PD'], ascending=False).reset_index(drop=True)
+            sorted_grp = tables_by_group.get(grp, ranked[table_cols].iloc[:0].reset_index(drop=True))
             sorted_grp.index += 1
             sorted_grp.insert(0, 'Rank', sorted_grp.index)
             
@@ -1980,15 +2564,30 @@ if page == "Overview & Standings":
         st.info("No standings data available yet.")
 
 elif page == "Matches":
-    import pandas as pd
     st.markdown('<h1 class="main-header">MATCH SCHEDULE</h1>', unsafe_allow_html=True)
     week_options = [1, 2, 3, 4, 5, 6, "Playoffs"]
     week = st.selectbox("Select Week", week_options, index=0)
     
     if week == "Playoffs":
         df = get_playoff_matches()
+        if not df.empty:
+            # Bracket names (label halves stand in for unset teams), escaped once per distinct name
+            lbl = df['bracket_label'].fillna('')
+            halves = lbl.str.split(' vs ')
+            has_vs = lbl.str.contains(' vs ', regex=False)
+            disp = {}
+            for side, i in (('t1', 0), ('t2', 1)):
+                names = df[side + '_name'].fillna('')
+                disp[side] = names.where(names != '', halves.str[i].where(has_vs, 'TBD')).tolist()
+            escaped_names = {n: html.escape(n) for n in set(disp['t1']) | set(disp['t2'])}
+            df['t1_disp_esc'] = [escaped_names[n] for n in disp['t1']]
+            df['t2_disp_esc'] = [escaped_names[n] for n in disp['t2']]
+            df['format_esc'] = [html.escape(str(v)) for v in df['format'].tolist()]
     else:
         df = get_week_matches(week)
+        # Escape the card text once per load rather than once per card per rerun
+        for c in ('t1_name', 't2_name', 'format', 'group_name'):
+            df[c + '_esc'] = [html.escape(str(v)) for v in df[c].tolist()]
         
     if df.empty:
         st.info("No matches for this week.")
@@ -1997,6 +2596,8 @@ elif page == "Matches":
             st.markdown("### Playoff Brackets")
             # Group by playoff_round (1=Quarters, 2=Semis, 3=Finals etc.)
             rounds = sorted(df['playoff_round'].unique())
+            # One groupby pass instead of a full-frame mask per round
+            matches_by_round = {r: g.sort_values('bracket_pos') for r, g in df.groupby('playoff_round', sort=False)}
             cols = st.columns(len(rounds))
             for i, r_num in enumerate(rounds):
                 with cols[i]:
@@ -2012,9 +2613,9 @@ elif page == "Matches":
                     if r_num == 1:
                         standings = get_standings()
                         if not standings.empty:
-                            # Group by group_name and get top 2
-                            for g_name, g_df in standings.groupby('group_name'):
-                                g_df = g_df.sort_values(['Points', 'PD'], ascending=False).head(2)
+                            # Group by group_name and get top 2 (one sort for all groups)
+                            top2 = standings.sort_values(['Points', 'PD'], ascending=False).groupby('group_name').head(2)
+                            for g_name, g_df in top2.groupby('group_name'):
                                 for team in g_df.itertuples():
                                     st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px; padding: 10px; border-left: 3px solid var(--primary-blue); opacity: 0.8;">
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem;">
@@ -2024,25 +2625,21 @@ elif page == "Matches":
 <div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">ADVANCES TO R16</div>
 </div>""", unsafe_allow_html=True)
 
-                    r_matches = df[df['playoff_round'] == r_num].sort_values('bracket_pos')
+                    r_matches = matches_by_round.get(r_num, df.iloc[:0])
                     for m in r_matches.itertuples():
                         winner_color_1 = "var(--primary-blue)" if m.status == 'completed' and m.winner_id == m.t1_id else "var(--text-main)"
                         winner_color_2 = "var(--primary-red)" if m.status == 'completed' and m.winner_id == m.t2_id else "var(--text-main)"
-                        
-                        # Use bracket label if names are TBD
-                        t1_display = m.t1_name if m.t1_name else (m.bracket_label.split(' vs ')[0] if m.bracket_label and ' vs ' in m.bracket_label else "TBD")
-                        t2_display = m.t2_name if m.t2_name else (m.bracket_label.split(' vs ')[1] if m.bracket_label and ' vs ' in m.bracket_label else "TBD")
 
                         st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px; padding: 10px; border-left: 3px solid {winner_color_1 if m.winner_id == m.t1_id else winner_color_2};">
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem;">
-<span style="color: {winner_color_1}; font-weight: {'bold' if m.winner_id == m.t1_id else 'normal'};">{html.escape(str(t1_display))}</span>
+<span style="color: {winner_color_1}; font-weight: {'bold' if m.winner_id == m.t1_id else 'normal'};">{m.t1_disp_esc}</span>
 <span style="font-family: 'Orbitron';">{int(m.score_t1) if m.status == 'completed' else '-'}</span>
 </div>
 <div style="display: flex; justify-content: space-between; font-size: 0.9rem; margin-top: 5px;">
-<span style="color: {winner_color_2}; font-weight: {'bold' if m.winner_id == m.t2_id else 'normal'};">{html.escape(str(t2_display))}</span>
+<span style="color: {winner_color_2}; font-weight: {'bold' if m.winner_id == m.t2_id else 'normal'};">{m.t2_disp_esc}</span>
 <span style="font-family: 'Orbitron';">{int(m.score_t2) if m.status == 'completed' else '-'}</span>
 </div>
-<div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">{html.escape(str(m.format))}</div>
+<div style="text-align: center; font-size: 0.6rem; color: var(--text-dim); margin-top: 5px;">{m.format_esc}</div>
 </div>""", unsafe_allow_html=True)
         else:
             st.markdown("### Scheduled")
@@ -2050,18 +2647,26 @@ elif page == "Matches":
         if sched.empty:
             st.caption("None")
         else:
+            # All scheduled cards go out as one markdown element instead of one per match
+            cards = []
             for m in sched.itertuples():
-                st.markdown(f"""<div class="custom-card">
+                cards.append(f"""<div class="custom-card">
 <div style="display: flex; justify-content: space-between; align-items: center;">
-<div style="flex: 1; text-align: right; font-weight: bold; color: var(--primary-blue);">{html.escape(str(m.t1_name))}</div>
+<div style="flex: 1; text-align: right; font-weight: bold; color: var(--primary-blue);">{m.t1_name_esc}</div>
 <div style="margin: 0 20px; color: var(--text-dim); font-family: 'Orbitron';">VS</div>
-<div style="flex: 1; text-align: left; font-weight: bold; color: var(--primary-red);">{html.escape(str(m.t2_name))}</div>
+<div style="flex: 1; text-align: left; font-weight: bold; color: var(--primary-red);">{m.t2_name_esc}</div>
 </div>
-<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{html.escape(str(m.format))} • {html.escape(str(m.group_name))}</div>
-</div>""", unsafe_allow_html=True)
+<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{m.format_esc} • {m.group_name_esc}</div>
+</div>""")
+            st.markdown("\n".join(cards), unsafe_allow_html=True)
         
         st.markdown("### Completed")
         comp = df[df['status'] == 'completed']
+        # Fetch map rows for every completed match at once, then split per match
+        with_maps = get_match_ids_with_maps()
+        maps_bulk = get_match_maps_bulk(tuple(i for i in comp['id'].astype(int) if i in with_maps))
+        empty_maps = maps_bulk.iloc[:0].drop(columns=['match_id'])
+        maps_by_match = {int(k): g.drop(columns=['match_id']).reset_index(drop=True) for k, g in maps_bulk.groupby('match_id')}
         for m in comp.itertuples():
             with st.container():
                 winner_color_1 = "var(--primary-blue)" if m.score_t1 > m.score_t2 else "var(--text-main)"
@@ -2073,20 +2678,20 @@ elif page == "Matches":
 {forfeit_badge}
 <div style="display: flex; justify-content: space-between; align-items: center;">
 <div style="flex: 1; text-align: right;">
-<span style="font-weight: bold; color: {winner_color_1};">{html.escape(str(m.t1_name))}</span>
+<span style="font-weight: bold; color: {winner_color_1};">{m.t1_name_esc}</span>
 <span style="font-size: 1.5rem; margin-left: 10px; font-family: 'Orbitron';">{m.score_t1}</span>
 </div>
 <div style="margin: 0 20px; color: var(--text-dim); font-family: 'Orbitron';">-</div>
 <div style="flex: 1; text-align: left;">
 <span style="font-size: 1.5rem; margin-right: 10px; font-family: 'Orbitron';">{m.score_t2}</span>
-<span style="font-weight: bold; color: {winner_color_2};">{html.escape(str(m.t2_name))}</span>
+<span style="font-weight: bold; color: {winner_color_2};">{m.t2_name_esc}</span>
 </div>
 </div>
-<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{html.escape(str(m.format))} • {html.escape(str(m.group_name))}</div>
+<div style="text-align: center; color: var(--text-dim); font-size: 0.8rem; margin-top: 10px;">{m.format_esc} • {m.group_name_esc}</div>
 </div>""", unsafe_allow_html=True)
                 
                 with st.expander("Match Details"):
-                    maps_df = get_match_maps(int(m.id))
+                    maps_df = maps_by_match.get(int(m.id), empty_maps)
                     if maps_df.empty:
                         st.caption("No map details")
                     else:
@@ -2122,7 +2727,12 @@ elif page == "Match Summary":
         st.info("No matches for this week.")
     else:
         # Vectorized option generation
-        opts = (df['t1_name'].fillna('') + " vs " + df['t2_name'].fillna('') + " (" + df['group_name'].fillna('') + ")").tolist()
+        # One f-string pass over the raw columns instead of a chain of Series concatenations
+        opts = [f"{a} vs {b} ({g})" for a, b, g in zip(
+            df['t1_name'].to_numpy(dtype=object, na_value=''),
+            df['t2_name'].to_numpy(dtype=object, na_value=''),
+            df['group_name'].to_numpy(dtype=object, na_value=''),
+        )]
         sel = st.selectbox("Select Match", list(range(len(opts))), format_func=lambda i: opts[i])
         m = df.iloc[sel]
         
@@ -2147,23 +2757,24 @@ elif page == "Match Summary":
 <div style="text-align: center; color: var(--text-dim); font-size: 0.9rem; margin-top: 10px; letter-spacing: 2px;">{html.escape(str(m['format'].upper()))} • {html.escape(str(m['group_name'].upper()))}</div>
 </div>""", unsafe_allow_html=True)
         
-        maps_df = get_match_maps(int(m['id']))
+        maps_df = get_match_maps(int(m['id'])) if int(m['id']) in get_match_ids_with_maps() else pd.DataFrame()
         if maps_df.empty:
             st.info("No detailed map data recorded for this match.")
         else:
             # Map Selection
             map_indices = sorted(maps_df['map_index'].unique().tolist())
-            map_labels = [f"Map {i+1}: {maps_df[maps_df['map_index'] == i].iloc[0]['map_name']}" for i in map_indices]
+            # First row per map_index, indexed once for label and score-card lookups
+            maps_by_idx = maps_df.drop_duplicates('map_index').set_index('map_index', drop=False)
+            map_labels = [f"Map {i+1}: {maps_by_idx.at[i, 'map_name']}" for i in map_indices]
             
             selected_map_idx = st.radio("Select Map", map_indices, format_func=lambda i: map_labels[i], horizontal=True)
             
-            st.markdown("<br>", unsafe_allow_html=True)
-            
             # Map Score Card
-            curr_map = maps_df[maps_df['map_index'] == selected_map_idx].iloc[0]
+            curr_map = maps_by_idx.loc[selected_map_idx]
             t1_id_val = int(m.get('t1_id', m.get('team1_id')))
             t2_id_val = int(m.get('t2_id', m.get('team2_id')))
-            st.markdown(f"""<div class="custom-card" style="background: rgba(255,255,255,0.02); margin-bottom: 20px;">
+            parts = ["<br>"]
+            parts.append(f"""<div class="custom-card" style="background: rgba(255,255,255,0.02); margin-bottom: 20px;">
 <div style="display: flex; justify-content: center; align-items: center; gap: 40px;">
 <div style="text-align: center;">
 <div style="color: var(--text-dim); font-size: 0.8rem; margin-bottom: 5px;">{html.escape(str(m['t1_name']))}</div>
@@ -2178,31 +2789,32 @@ elif page == "Match Summary":
 <div style="font-size: 2rem; font-family: 'Orbitron'; color: {'var(--primary-red)' if curr_map['team2_rounds'] > curr_map['team1_rounds'] else 'var(--text-main)'};">{curr_map['team2_rounds']}</div>
 </div>
 </div>
-</div>""", unsafe_allow_html=True)
+</div>""")
+            # Scoreboard headers share the card's element; the columns below only hold the tables
+            parts.append(f"""<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">
+<h4 style="color: var(--primary-blue); font-family: 'Orbitron';">{html.escape(str(m["t1_name"]))} Scoreboard</h4>
+<h4 style="color: var(--primary-red); font-family: 'Orbitron';">{html.escape(str(m["t2_name"]))} Scoreboard</h4>
+</div>""")
+            st.markdown("\n".join(parts), unsafe_allow_html=True)
             
             # Scoreboards
-            t1_id_val = int(m.get('t1_id', m.get('team1_id')))
-            t2_id_val = int(m.get('t2_id', m.get('team2_id')))
             s1 = get_map_stats(m['id'], selected_map_idx, t1_id_val)
             s2 = get_map_stats(m['id'], selected_map_idx, t2_id_val)
             
             c1, c2 = st.columns(2)
             with c1:
-                st.markdown(f'<h4 style="color: var(--primary-blue); font-family: \'Orbitron\';">{html.escape(str(m["t1_name"]))} Scoreboard</h4>', unsafe_allow_html=True)
                 if s1.empty:
                     st.info("No scoreboard data")
                 else:
-                    st.dataframe(s1.rename(columns={'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}), hide_index=True, use_container_width=True)
+                    st.dataframe(s1.rename(columns=SCOREBOARD_COLS), hide_index=True, use_container_width=True)
             
             with c2:
-                st.markdown(f'<h4 style="color: var(--primary-red); font-family: \'Orbitron\';">{html.escape(str(m["t2_name"]))} Scoreboard</h4>', unsafe_allow_html=True)
                 if s2.empty:
                     st.info("No scoreboard data")
                 else:
-                    st.dataframe(s2.rename(columns={'name':'Player','agent':'Agent','acs':'ACS','kills':'K','deaths':'D','assists':'A','is_sub':'Sub'}), hide_index=True, use_container_width=True)
+                    st.dataframe(s2.rename(columns=SCOREBOARD_COLS), hide_index=True, use_container_width=True)
 
 elif page == "Match Predictor":
-    import pandas as pd
     st.markdown('<h1 class="main-header">MATCH PREDICTOR</h1>', unsafe_allow_html=True)
     st.write("Predict the outcome of a match based on team history and stats.")
     
@@ -2210,88 +2822,74 @@ elif page == "Match Predictor":
     matches_df = get_completed_matches()
     
     tnames = teams_df['name'].tolist() if not teams_df.empty else []
-    c1, c2 = st.columns(2)
+    name_to_id = dict(zip(teams_df['name'].astype(str), teams_df['id'].astype(int))) if not teams_df.empty else {}
     
-    # Check if user is admin or dev
-    is_privileged = st.session_state.get('is_admin', False) or st.session_state.get('role') in ['admin', 'dev']
+    @_fragment
+    def _predictor_panel():
+        # Predict Result reruns only this panel, not the page header and data loads above
+        c1, c2 = st.columns(2)
     
-    t1_name = c1.selectbox("Team 1", tnames, index=0, disabled=not is_privileged)
-    t2_name = c2.selectbox("Team 2", tnames, index=(1 if len(tnames)>1 else 0), disabled=not is_privileged)
+        # Check if user is admin or dev
+        is_privileged = st.session_state.get('is_admin', False) or st.session_state.get('role') in ['admin', 'dev']
     
-    if st.button("Predict Result", disabled=not is_privileged):
-        if t1_name == t2_name:
-            st.error("Select two different teams.")
-        else:
-            t1_id = teams_df[teams_df['name'] == t1_name].iloc[0]['id']
-            t2_id = teams_df[teams_df['name'] == t2_name].iloc[0]['id']
-            
-            # Feature extraction helper
-            def get_team_stats(tid):
-                import pandas as pd
-                played = matches_df[(matches_df['team1_id']==tid) | (matches_df['team2_id']==tid)]
-                if played.empty:
-                    return {'win_rate': 0.0, 'avg_score': 0.0, 'games': 0}
-                wins = played[played['winner_id'] == tid].shape[0]
-                total = played.shape[0]
-                
-                # Calculate avg score (rounds won) using vectorized operations
-                scores_t1 = played.loc[played['team1_id'] == tid, 'score_t1']
-                scores_t2 = played.loc[played['team2_id'] == tid, 'score_t2']
-                all_scores = pd.concat([scores_t1, scores_t2])
-                avg_score = all_scores.mean() if not all_scores.empty else 0
-                
-                return {'win_rate': wins/total, 'avg_score': avg_score, 'games': total}
-
-            s1 = get_team_stats(t1_id)
-            s2 = get_team_stats(t2_id)
+        t1_name = c1.selectbox("Team 1", tnames, index=0, disabled=not is_privileged)
+        t2_name = c2.selectbox("Team 2", tnames, index=(1 if len(tnames)>1 else 0), disabled=not is_privileged)
+    
+        if st.button("Predict Result", disabled=not is_privileged):
+            if t1_name == t2_name:
+                st.error("Select two different teams.")
+            else:
+                t1_id = name_to_id[t1_name]
+                t2_id = name_to_id[t2_name]
             
-            # Head to head
-            h2h = matches_df[((matches_df['team1_id']==t1_id) & (matches_df['team2_id']==t2_id)) | 
-                             ((matches_df['team1_id']==t2_id) & (matches_df['team2_id']==t1_id))]
-            h2h_wins_t1 = h2h[h2h['winner_id'] == t1_id].shape[0]
-            h2h_wins_t2 = h2h[h2h['winner_id'] == t2_id].shape[0]
+                # Keyed on the snapshot's data version so Streamlit never hashes the frame itself
+                data_version = get_data_version(matches_df)
+                team_stats = _team_stats_table(data_version, matches_df)
+                no_games = {'win_rate': 0.0, 'avg_score': 0.0, 'games': 0}
+                s1 = team_stats.get(int(t1_id), no_games)
+                s2 = team_stats.get(int(t2_id), no_games)
             
-            # Heuristic Score
-            # Win Rate (40%), Avg Score (30%), H2H (30%)
-            # Normalize scores? No, just compare raw weighted sums or probabilities
+                # Head to head
+                h2h = _h2h_matrix(data_version, matches_df)
+                h2h_wins_t1 = h2h.get((int(t1_id), int(t2_id)), 0)
+                h2h_wins_t2 = h2h.get((int(t2_id), int(t1_id)), 0)
+                
+                # Heuristic Score
+                # Win Rate (40%), Avg Score (30%), H2H (30%)
+                # Normalize scores? No, just compare raw weighted sums or probabilities
             
-            # Heuristic Score (Fallback if ML fails or data too small)
-            score1 = (s1['win_rate'] * 40) + (s1['avg_score'] * 2) + (h2h_wins_t1 * 5)
-            score2 = (s2['win_rate'] * 40) + (s2['avg_score'] * 2) + (h2h_wins_t2 * 5)
+                # Heuristic Score (Fallback if ML fails or data too small)
+                heur_p1 = float(_heuristic_probs(s1['win_rate'], s1['avg_score'], h2h_wins_t1, s2['win_rate'], s2['avg_score'], h2h_wins_t2))
             
-            ml_prob = None
-            try:
-                import predictor_model
-                ml_prob = predictor_model.predict_match(t1_id, t2_id)
-            except Exception as e:
-                pass
+                ml_prob = None
+                model = _load_predictor_model()
+                if model is not None:
+                    try:
+                        ml_prob = model.predict_match(t1_id, t2_id)
+                    except Exception:
+                        pass
                 
-            if ml_prob is not None:
-                prob1 = ml_prob * 100
-                prob2 = (1 - ml_prob) * 100
-                prediction_type = "ML MODEL"
-            else:
-                total = score1 + score2
-                if total == 0:
-                    prob1 = 50.0
-                    prob2 = 50.0
+                if ml_prob is not None:
+                    prob1 = ml_prob * 100
+                    prob2 = (1 - ml_prob) * 100
+                    prediction_type = "ML MODEL"
                 else:
-                    prob1 = (score1 / total) * 100
-                    prob2 = (score2 / total) * 100
-                prediction_type = "HEURISTIC"
+                    prob1 = heur_p1 * 100
+                    prob2 = (1 - heur_p1) * 100
+                    prediction_type = "HEURISTIC"
                 
-            winner = t1_name if prob1 > prob2 else t2_name
-            conf = max(prob1, prob2)
+                winner = t1_name if prob1 > prob2 else t2_name
+                conf = max(prob1, prob2)
             
-            st.markdown(f"""<div class="custom-card" style="text-align: center; border-top: 4px solid { 'var(--primary-blue)' if winner == t1_name else 'var(--primary-red)' };">
+                st.markdown(f"""<div class="custom-card" style="text-align: center; border-top: 4px solid { 'var(--primary-blue)' if winner == t1_name else 'var(--primary-red)' };">
 <div style="color: var(--text-dim); font-size: 0.7rem; margin-bottom: 5px;">{prediction_type} PREDICTION</div>
 <h2 style="margin: 0; color: { 'var(--primary-blue)' if winner == t1_name else 'var(--primary-red)' };">{html.escape(str(winner))}</h2>
 <div style="font-size: 3rem; font-family: 'Orbitron'; margin: 10px 0;">{conf:.1f}%</div>
 <div style="color: var(--text-dim);">CONFIDENCE LEVEL</div>
 </div>""", unsafe_allow_html=True)
 
-            # Probability Bar
-            st.markdown(f"""<div style="width: 100%; background: rgba(255,255,255,0.05); height: 20px; border-radius: 10px; overflow: hidden; display: flex; margin: 20px 0;">
+                # Probability Bar
+                st.markdown(f"""<div style="width: 100%; background: rgba(255,255,255,0.05); height: 20px; border-radius: 10px; overflow: hidden; display: flex; margin: 20px 0;">
 <div style="width: {prob1}%; background: var(--primary-blue); height: 100%; transition: width 1s ease-in-out;"></div>
 <div style="width: {prob2}%; background: var(--primary-red); height: 100%; transition: width 1s ease-in-out;"></div>
 </div>
@@ -2300,9 +2898,9 @@ elif page == "Match Predictor":
 <div style="color: var(--primary-red);">{html.escape(str(t2_name))} ({prob2:.1f}%)</div>
 </div>""", unsafe_allow_html=True)
             
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown(f"""<div class="custom-card">
+                c1, c2 = st.columns(2)
+                with c1:
+                    st.markdown(f"""<div class="custom-card">
 <h3 style="color: var(--primary-blue); margin-top: 0;">{html.escape(str(t1_name))} Analysis</h3>
 <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
 <div>
@@ -2319,8 +2917,8 @@ elif page == "Match Predictor":
 </div>
 </div>
 </div>""", unsafe_allow_html=True)
-            with c2:
-                st.markdown(f"""<div class="custom-card">
+                with c2:
+                    st.markdown(f"""<div class="custom-card">
 <h3 style="color: var(--primary-red); margin-top: 0;">{html.escape(str(t2_name))} Analysis</h3>
 <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
 <div>
@@ -2337,9 +2935,10 @@ elif page == "Match Predictor":
 </div>
 </div>
 </div>""", unsafe_allow_html=True)
+    
+    _predictor_panel()
 
 elif page == "Player Leaderboard":
-    import pandas as pd
     df = get_player_leaderboard()
     if df.empty:
         st.info("No player stats yet.")
@@ -2383,74 +2982,57 @@ elif page == "Player Leaderboard":
                     c4.metric("Assists", prof['total_assists'])
                     cmp_df = pd.DataFrame({
                         'Metric': ['ACS','Kills','Deaths','Assists'],
-                        'Player': [prof['avg_acs'], prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)],
+                        'Player': [prof['avg_acs'], prof['kpg'], prof['dpg'], prof['apg']],
                         'Rank Avg': [prof['sr_avg_acs'], prof['sr_k'], prof['sr_d'], prof['sr_a']],
                         'League Avg': [prof['lg_avg_acs'], prof['lg_k'], prof['lg_d'], prof['lg_a']],
                     })
                     st.dataframe(cmp_df, hide_index=True, use_container_width=True)
                     
-                    # Performance Benchmarks Chart (Dual Axis)
-                    import plotly.graph_objects as go
-                    import plotly.express as px
-                    from plotly.subplots import make_subplots
-                    fig_cmp_admin = make_subplots(specs=[[{"secondary_y": True}]])
-                    
-                    fig_cmp_admin.add_trace(go.Bar(name='Player ACS', x=['ACS'], y=[prof['avg_acs']], marker_color='#3FD1FF'), secondary_y=False)
-                    fig_cmp_admin.add_trace(go.Bar(name='Rank Avg ACS', x=['ACS'], y=[prof['sr_avg_acs']], marker_color='#FF4655', opacity=0.7), secondary_y=False)
-                    fig_cmp_admin.add_trace(go.Bar(name='League Avg ACS', x=['ACS'], y=[prof['lg_avg_acs']], marker_color='#ECE8E1', opacity=0.5), secondary_y=False)
-                    
-                    other_metrics = ['Kills', 'Deaths', 'Assists']
-                    player_others = [prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)]
-                    rank_others = [prof['sr_k'], prof['sr_d'], prof['sr_a']]
-                    league_others = [prof['lg_k'], prof['lg_d'], prof['lg_a']]
-                    
-                    fig_cmp_admin.add_trace(go.Bar(name='Player Stats', x=other_metrics, y=player_others, marker_color='#3FD1FF', showlegend=False), secondary_y=True)
-                    fig_cmp_admin.add_trace(go.Bar(name='Rank Avg Stats', x=other_metrics, y=rank_others, marker_color='#FF4655', opacity=0.7, showlegend=False), secondary_y=True)
-                    fig_cmp_admin.add_trace(go.Bar(name='League Avg Stats', x=other_metrics, y=league_others, marker_color='#ECE8E1', opacity=0.5, showlegend=False), secondary_y=True)
-                    
+                    # Performance Benchmarks Chart
+                    # One long frame and one px.bar; ACS and per-match K/D/A sit in separate facets with their own y-axes
+                    bench_df = cmp_df.melt(id_vars='Metric', var_name='Source', value_name='Value')
+                    bench_df['Axis'] = bench_df['Metric'].where(bench_df['Metric'] == 'ACS', 'K/D/A')
+                    fig_cmp_admin = px.bar(
+                        bench_df, x='Metric', y='Value', color='Source', barmode='group', facet_col='Axis',
+                        category_orders={'Axis': ['ACS', 'K/D/A']},
+                        color_discrete_map={'Player': '#3FD1FF', 'Rank Avg': '#FF4655', 'League Avg': '#ECE8E1'},
+                    )
+                    fig_cmp_admin.update_xaxes(matches=None, title_text=None)
+                    fig_cmp_admin.update_yaxes(matches=None, showticklabels=True, title_text=None)
+                    fig_cmp_admin.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
                     fig_cmp_admin.update_layout(
-                        barmode='group', height=350,
+                        height=350,
                         title_text="Performance vs Benchmarks",
                         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
                     )
-                    fig_cmp_admin.update_yaxes(title_text="ACS", secondary_y=False)
-                    fig_cmp_admin.update_yaxes(title_text="K/D/A", secondary_y=True)
                     st.plotly_chart(apply_plotly_theme(fig_cmp_admin), use_container_width=True)
-                    if 'trend' in prof and not prof['trend'].empty:
-                        st.caption("ACS trend")
-                        fig_acs = px.line(prof['trend'], x='label', y='avg_acs', 
-                                          title="ACS Trend", markers=True,
-                                          color_discrete_sequence=['#3FD1FF'])
-                        st.plotly_chart(apply_plotly_theme(fig_acs), use_container_width=True)
-                        
-                        st.caption("KDA trend")
-                        fig_kda = px.line(prof['trend'], x='label', y='kda', 
-                                          title="KDA Trend", markers=True,
-                                          color_discrete_sequence=['#FF4655'])
-                        st.plotly_chart(apply_plotly_theme(fig_kda), use_container_width=True)
-
-                    if 'sub_impact' in prof:
-                        sid = prof['sub_impact']
-                        st.caption("Substitution impact")
-                        c_sub1, c_sub2 = st.columns(2)
-                        with c_sub1:
-                            fig_sub_acs = px.bar(x=['Starter', 'Sub'], y=[sid['starter_acs'], sid['sub_acs']], 
-                                               title="ACS: Starter vs Sub",
-                                               labels={'x': 'Role', 'y': 'ACS'},
-                                               color_discrete_sequence=['#3FD1FF'])
-                            st.plotly_chart(apply_plotly_theme(fig_sub_acs), use_container_width=True)
-                        with c_sub2:
-                            fig_sub_kda = px.bar(x=['Starter', 'Sub'], y=[sid['starter_kda'], sid['sub_kda']], 
-                                               title="KDA: Starter vs Sub",
-                                               labels={'x': 'Role', 'y': 'KDA'},
-                                               color_discrete_sequence=['#FF4655'])
-                            st.plotly_chart(apply_plotly_theme(fig_sub_kda), use_container_width=True)
+                    figs = _profile_trend_figures(pid, _profile_figs_key(prof), prof)
+                    if figs:
+                        tab_acs, tab_kda, tab_sub = st.tabs(["ACS Trend", "KDA Trend", "Sub Impact"])
+                        with tab_acs:
+                            if 'acs' in figs:
+                                st.plotly_chart(apply_plotly_theme(figs['acs']), use_container_width=True)
+                            else:
+                                st.info("No trend data yet")
+                        with tab_kda:
+                            if 'kda' in figs:
+                                st.plotly_chart(apply_plotly_theme(figs['kda']), use_container_width=True)
+                            else:
+                                st.info("No trend data yet")
+                        with tab_sub:
+                            if 'sub_acs' in figs:
+                                c_sub1, c_sub2 = st.columns(2)
+                                with c_sub1:
+                                    st.plotly_chart(apply_plotly_theme(figs['sub_acs']), use_container_width=True)
+                                with c_sub2:
+                                    st.plotly_chart(apply_plotly_theme(figs['sub_kda']), use_container_width=True)
+                            else:
+                                st.info("No substitution data")
                     if not prof['maps'].empty:
                         st.caption("Maps played")
                         st.dataframe(prof['maps'][['match_id','map_index','agent','acs','kills','deaths','assists','is_sub']], hide_index=True, use_container_width=True)
 
 elif page == "Players Directory":
-    import pandas as pd
     st.markdown('<h1 class="main-header">PLAYERS DIRECTORY</h1>', unsafe_allow_html=True)
     
     players_df = get_all_players_directory()
@@ -2467,15 +3049,9 @@ elif page == "Players Directory":
             q = st.text_input("Search Name or Riot ID", placeholder="Search...")
         st.markdown('</div>', unsafe_allow_html=True)
     
-    out = players_df.copy()
+    # Filtering runs in SQL; normalising the query lets equivalent inputs share one cache entry
+    out = get_all_players_directory(search=q.strip().lower() or None, ranks=tuple(sorted(rf)))
     out['rank'] = out['rank'].fillna("Unranked")
-    out = out[out['rank'].isin(rf)]
-    if q:
-        s = q.lower()
-        out = out[
-            out['name'].str.lower().fillna("").str.contains(s) | 
-            out['riot_id'].str.lower().fillna("").str.contains(s)
-        ]
     
     # Display as a clean table with the brand theme
     st.markdown("<br>", unsafe_allow_html=True)
@@ -2494,7 +3070,6 @@ elif page == "Players Directory":
         )
 
 elif page == "Teams":
-    import pandas as pd
     st.markdown('<h1 class="main-header">TEAMS</h1>', unsafe_allow_html=True)
     
     teams = get_teams_list_full()
@@ -2505,7 +3080,10 @@ elif page == "Teams":
     if not all_players.empty:
         all_players = all_players.copy()
         # Create display name for the table
-        all_players['display_name'] = all_players.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
+        all_players['display_name'] = _fmt_with_riot(all_players['name'], all_players['riot_id'])
+        # Escaped once here rather than per cell while rendering rosters
+        all_players['display_esc'] = vec_escape(all_players['display_name'])
+        all_players['rank_esc'] = vec_escape(all_players['rank'].fillna(''))
         for tid, group in all_players.groupby('default_team_id'):
             # Keep all columns for admin management, but we'll filter for display
             rosters_by_team[int(tid)] = group
@@ -2520,92 +3098,84 @@ elif page == "Teams":
     st.markdown("<br>", unsafe_allow_html=True)
     
     show = teams if g == "All" else teams[teams['group_name'] == g]
-    for row in show.itertuples():
-        with st.container():
-            # Team Header Card
-            b64 = get_base64_image(row.logo_path)
-            logo_img_html = f"<img src='data:image/png;base64,{b64}' width='60'/>" if b64 else "<div style='width:60px;height:60px;background:rgba(255,255,255,0.05);border-radius:8px;display:flex;align-items:center;justify-content:center;color:var(--text-dim);'>?</div>"
-            
-            st.markdown(f"""<div class="custom-card" style="margin-bottom: 10px;">
-<div style="display: flex; align-items: center; gap: 20px;">
-<div style="flex-shrink: 0;">
-{logo_img_html}
-</div>
-<div>
-<h3 style="margin: 0; color: var(--primary-blue); font-family: 'Orbitron';">{html.escape(str(row.name))} <span style="color: var(--text-dim); font-size: 0.9rem;">[{html.escape(str(row.tag or ''))}]</span></h3>
-<div style="color: var(--text-dim); font-size: 0.8rem; text-transform: uppercase; letter-spacing: 1px;">Group {html.escape(str(row.group_name))}</div>
-</div>
-</div>
-</div>""", unsafe_allow_html=True)
+    show = show.assign(name_esc=vec_escape(show['name']), tag_esc=vec_escape(show['tag'].fillna('')), group_esc=vec_escape(show['group_name']))
+    # Logos resolved once per rerun; get_base64_image itself is cached on (path, mtime)
+    show = show.assign(logo_b64=show['logo_path'].map(get_base64_image))
+    if not st.session_state.get('is_admin'):
+        # Read-only view: every card and roster in one markdown element instead of one per team
+        cards_html = "".join(_team_card_html(row, _roster_details_html(rosters_by_team.get(int(row.id)))) for row in show.itertuples())
+        if cards_html:
+            st.markdown(cards_html, unsafe_allow_html=True)
+    else:
+        # Unassigned players are the same for every team's Add Player select; resolve them once
+        unassigned = all_players.loc[all_players['default_team_id'].isna(), ['id', 'display_name']].drop_duplicates('display_name') if not all_players.empty else pd.DataFrame(columns=['id', 'display_name'])
+        unassigned_opts = [""] + unassigned['display_name'].tolist()
+        unassigned_ids = dict(zip(unassigned['display_name'], unassigned['id'].astype(int)))
+        for row in show.itertuples():
+            with st.container():
+                # Team Header Card
+                st.markdown(_team_card_html(row), unsafe_allow_html=True)
             
-            with st.expander("Manage Roster & Details"):
-                roster = rosters_by_team.get(int(row.id), pd.DataFrame())
+                with st.expander("Manage Roster & Details"):
+                    roster = rosters_by_team.get(int(row.id), pd.DataFrame())
                 
-                if roster.empty:
-                    st.info("No players yet")
-                else:
-                    st.dataframe(
-                        roster[['display_name', 'rank']], 
-                        hide_index=True, 
-                        use_container_width=True,
-                        column_config={
-                            "display_name": "Name",
-                            "rank": "Rank"
-                        }
-                    )
+                    if roster.empty:
+                        st.info("No players yet")
+                    else:
+                        st.dataframe(
+                            roster[['display_name', 'rank']], 
+                            hide_index=True, 
+                            use_container_width=True,
+                            column_config={
+                                "display_name": "Name",
+                                "rank": "Rank"
+                            }
+                        )
                 
-                if st.session_state.get('is_admin'):
-                    st.markdown("---")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.caption("Edit Team Details")
-                        with st.form(f"edit_team_{row.id}"):
-                            new_name = st.text_input("Name", value=row.name)
-                            new_tag = st.text_input("Tag", value=row.tag or "")
-                            new_group = st.text_input("Group", value=row.group_name or "")
-                            new_logo = st.text_input("Logo Path", value=row.logo_path or "")
-                            if st.form_submit_button("Update Team"):
-                                # Use is_safe_path for validation
-                                if new_logo and not is_safe_path(new_logo):
-                                    st.error("Invalid logo path. Path traversal or absolute paths are not allowed.")
-                                else:
-                                    conn_u = get_conn()
-                                    conn_u.execute("UPDATE teams SET name=?, tag=?, group_name=?, logo_path=? WHERE id=?", (new_name, new_tag or None, new_group or None, new_logo or None, int(row.id)))
-                                    conn_u.commit()
-                                    conn_u.close()
-                                    st.success("Team updated")
-                                    st.rerun()
+                    if st.session_state.get('is_admin'):
+                        st.markdown("---")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.caption("Edit Team Details")
+                            with st.form(f"edit_team_{row.id}"):
+                                new_name = st.text_input("Name", value=row.name)
+                                new_tag = st.text_input("Tag", value=row.tag or "")
+                                new_group = st.text_input("Group", value=row.group_name or "")
+                                new_logo = st.text_input("Logo Path", value=row.logo_path or "")
+                                if st.form_submit_button("Update Team"):
+                                    # Use is_safe_path for validation
+                                    if new_logo and not is_safe_path(new_logo):
+                                        st.error("Invalid logo path. Path traversal or absolute paths are not allowed.")
+                                    else:
+                                        with pooled_write_conn() as conn_u:
+                                            conn_u.execute("UPDATE teams SET name=?, tag=?, group_name=?, logo_path=? WHERE id=?", (new_name, new_tag or None, new_group or None, new_logo or None, int(row.id)))
+                                        clear_logo_cache()
+                                        st.success("Team updated")
+                                        st.rerun()
                     
-                    with col2:
-                        st.caption("Roster Management")
-                        # Add player
-                        unassigned = all_players[all_players['default_team_id'].isna()].copy()
-                        
-                        add_sel = st.selectbox(f"Add Player", [""] + unassigned['display_name'].tolist(), key=f"add_{row.id}")
-                        if add_sel:
-                            pid = int(unassigned[unassigned['display_name'] == add_sel].iloc[0]['id'])
-                            conn_a = get_conn()
-                            conn_a.execute("UPDATE players SET default_team_id=? WHERE id=?", (int(row.id), pid))
-                            conn_a.commit()
-                            conn_a.close()
-                            st.success("Player added")
-                            st.rerun()
-                        
-                        # Remove player
-                        if not roster.empty:
-                            rem_sel = st.selectbox(f"Remove Player", [""] + roster['display_name'].tolist(), key=f"rem_{row.id}")
-                            if rem_sel:
-                                pid = int(roster[roster['display_name'] == rem_sel].iloc[0]['id'])
-                                conn_d = get_conn()
-                                conn_d.execute("UPDATE players SET default_team_id=NULL WHERE id=?", (pid,))
-                                conn_d.commit()
-                                conn_d.close()
-                                st.success("Player removed")
+                        with col2:
+                            st.caption("Roster Management")
+                            # Add player
+                            add_sel = st.selectbox(f"Add Player", unassigned_opts, key=f"add_{row.id}")
+                            if add_sel:
+                                pid = unassigned_ids[add_sel]
+                                with pooled_write_conn() as conn_a:
+                                    conn_a.execute("UPDATE players SET default_team_id=? WHERE id=?", (int(row.id), pid))
+                                st.success("Player added")
                                 st.rerun()
-        st.markdown("<br>", unsafe_allow_html=True)
+                        
+                            # Remove player
+                            if not roster.empty:
+                                rem_sel = st.selectbox(f"Remove Player", [""] + roster['display_name'].tolist(), key=f"rem_{row.id}")
+                                if rem_sel:
+                                    pid = int(roster[roster['display_name'] == rem_sel].iloc[0]['id'])
+                                    with pooled_write_conn() as conn_d:
+                                        conn_d.execute("UPDATE players SET default_team_id=NULL WHERE id=?", (pid,))
+                                    st.success("Player removed")
+                                    st.rerun()
+            st.markdown("<br>", unsafe_allow_html=True)
 
 elif page == "Playoffs":
-    import pandas as pd
     st.markdown('<h1 class="main-header">PLAYOFFS</h1>', unsafe_allow_html=True)
     
     if not st.session_state.get('is_admin'):
@@ -2628,6 +3198,7 @@ elif page == "Playoffs":
 
         teams_df = get_teams_list()
         tnames = [""] + (teams_df['name'].tolist() if not teams_df.empty else [])
+        name_to_id = dict(zip(teams_df['name'].astype(str), teams_df['id'].astype(int))) if not teams_df.empty else {}
         
         with st.form("add_playoff_match"):
             c1, c2, c3 = st.columns(3)
@@ -2648,8 +3219,8 @@ elif page == "Playoffs":
             
             if st.form_submit_button("Add/Update Playoff Match"):
                 conn = get_conn()
-                t1_id = int(teams_df[teams_df['name'] == t1].iloc[0]['id']) if t1 else None
-                t2_id = int(teams_df[teams_df['name'] == t2].iloc[0]['id']) if t2 else None
+                t1_id = name_to_id[t1] if t1 else None
+                t2_id = name_to_id[t2] if t2 else None
                 
                 # Check if exists
                 existing = conn.execute("SELECT id FROM matches WHERE match_type='playoff' AND playoff_round=? AND bracket_pos=?", (round_idx, pos)).fetchone()
@@ -2672,8 +3243,7 @@ elif page == "Playoffs":
     # Match Map Editor for Playoffs (Admin Only)
     if not df.empty:
         with st.expander("📝 Edit Playoff Match Scores & Maps"):
-            # Vectorized option generation
-            match_opts = ("R" + df['playoff_round'].astype(str) + " P" + df['bracket_pos'].astype(str) + ": " + df['t1_name'].fillna('') + " vs " + df['t2_name'].fillna('')).tolist()
+            match_opts = df['opt_label'].tolist()
             idx = st.selectbox("Select Playoff Match to Edit", list(range(len(match_opts))), format_func=lambda i: match_opts[i], key="po_edit_idx")
             m = df.iloc[idx]
             
@@ -2684,39 +3254,42 @@ elif page == "Playoffs":
             # Pre-define IDs for both FF and regular logic
             t1_id_val = int(m.get('t1_id', m.get('team1_id')))
             t2_id_val = int(m.get('t2_id', m.get('team2_id')))
+            m_id = int(m['id'])
             
             # Match-level Forfeit
-            is_match_ff = st.checkbox("Match-level Forfeit", value=bool(m.get('is_forfeit', 0)), key=f"po_match_ff_{m['id']}", help="Check if the entire match was a forfeit (13-0 result)")
+            is_match_ff = st.checkbox("Match-level Forfeit", value=bool(m.get('is_forfeit', 0)), key=f"po_match_ff_{m_id}", help="Check if the entire match was a forfeit (13-0 result)")
             
             if is_match_ff:
-                ff_winner_team = st.radio("Match Winner", [m['t1_name'], m['t2_name']], index=0 if m['score_t1'] >= m['score_t2'] else 1, horizontal=True, key="po_ff_winner")
-                s1 = 13 if ff_winner_team == m['t1_name'] else 0
-                s2 = 13 if ff_winner_team == m['t2_name'] else 0
-                st.info(f"Forfeit Result: {m['t1_name']} {s1} - {s2} {m['t2_name']}")
+                # Forfeit editor lives in its own container; the per-map editor below is only built when not a forfeit
+                with st.container():
+                    ff_winner_team = st.radio("Match Winner", [m['t1_name'], m['t2_name']], index=0 if m['score_t1'] >= m['score_t2'] else 1, horizontal=True, key=f"po_ff_winner_{m_id}")
+                    s1 = 13 if ff_winner_team == m['t1_name'] else 0
+                    s2 = 13 if ff_winner_team == m['t2_name'] else 0
+                    st.info(f"Forfeit Result: {m['t1_name']} {s1} - {s2} {m['t2_name']}")
                 
-                if st.button("Save Forfeit Playoff Match"):
-                    conn_u = get_conn()
-                    winner_id = t1_id_val if s1 > s2 else t2_id_val
-                    conn_u.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status=?, format=?, maps_played=?, is_forfeit=1 WHERE id=?", (int(s1), int(s2), winner_id, 'completed', fmt, 0, int(m['id'])))
-                    # Clear any existing maps/stats if it's now a forfeit
-                    conn_u.execute("DELETE FROM match_maps WHERE match_id=?", (int(m['id']),))
-                    conn_u.execute("DELETE FROM match_stats_map WHERE match_id=?", (int(m['id']),))
-                    conn_u.commit()
-                    conn_u.close()
-                    st.cache_data.clear()
-                    st.success("Saved forfeit playoff match")
-                    st.rerun()
+                    if st.button("Save Forfeit Playoff Match", key=f"po_ff_save_{m_id}"):
+                        conn_u = get_conn()
+                        winner_id = t1_id_val if s1 > s2 else t2_id_val
+                        conn_u.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status=?, format=?, maps_played=?, is_forfeit=1 WHERE id=?", (int(s1), int(s2), winner_id, 'completed', fmt, 0, m_id))
+                        # Clear any existing maps/stats if it's now a forfeit
+                        conn_u.execute("DELETE FROM match_maps WHERE match_id=?", (m_id,))
+                        conn_u.execute("DELETE FROM match_stats_map WHERE match_id=?", (m_id,))
+                        conn_u.commit()
+                        conn_u.close()
+                        clear_query_caches()
+                        st.success("Saved forfeit playoff match")
+                        st.rerun()
             else:
                 st.info("Match details are managed per-map below. The total match score will be automatically updated.")
                 st.divider()
                 st.subheader("Per-Map Scoreboard")
                 fmt_constraints = {"BO1": (1,1), "BO3": (2,3), "BO5": (3,5)}
                 min_maps, max_maps = fmt_constraints.get(fmt, (1,1))
-                map_choice = st.selectbox("Select Map", list(range(1, max_maps+1)), index=0, key=f"po_map_choice_{m['id']}")
+                map_choice = st.selectbox("Select Map", list(range(1, max_maps+1)), index=0, key=f"po_map_choice_{m_id}")
                 map_idx = map_choice - 1
                 
                 # 1. Fetch existing map data for THIS map index
-                existing_maps_df = get_match_maps(int(m['id']))
+                existing_maps_df = get_match_maps(m_id)
                 existing_map = None
                 if not existing_maps_df.empty:
                     rowx = existing_maps_df[existing_maps_df['map_index'] == map_idx]
@@ -2729,8 +3302,11 @@ elif page == "Playoffs":
                 pre_map_win = int(existing_map['winner_id']) if existing_map is not None and pd.notna(existing_map['winner_id']) else None
                 pre_map_ff = bool(existing_map['is_forfeit']) if existing_map is not None and 'is_forfeit' in existing_map else False
 
+                # Per-map session keys, built once per render
+                scraped_key, ocr_key, fm_key, fa_key = (f"{p}_po_{m_id}_{map_idx}" for p in ("scraped_data", "ocr", "force_map", "force_apply"))
+
                 # Override with scraped data if available
-                scraped_map = st.session_state.get(f"scraped_data_po_{m['id']}_{map_idx}")
+                scraped_map = st.session_state.get(scraped_key)
                 if scraped_map:
                     pre_map_name = scraped_map['map_name']
                     pre_map_t1 = scraped_map['t1_rounds']
@@ -2742,28 +3318,26 @@ elif page == "Playoffs":
                 st.write("#### 🤖 Auto-Fill from Tracker.gg")
                 col_json1, col_json2 = st.columns([2, 1])
                 with col_json1:
-                    match_input = st.text_input("Tracker.gg Match URL or ID", key=f"po_mid_{m['id']}_{map_idx}", placeholder="https://tracker.gg/valorant/match/...")
+                    match_input = st.text_input("Tracker.gg Match URL or ID", key=f"po_mid_{m_id}_{map_idx}", placeholder="https://tracker.gg/valorant/match/...")
                 with col_json2:
-                    if st.button("Apply Match Data", key=f"po_force_json_{m['id']}_{map_idx}", use_container_width=True):
+                    if st.button("Apply Match Data", key=f"po_force_json_{m_id}_{map_idx}", use_container_width=True):
                         if match_input:
                             # Clean Match ID
                             match_id_clean = match_input
                             if "tracker.gg" in match_input:
-                                mid_match = re.search(r'match/([a-zA-Z0-9\-]+)', match_input)
+                                mid_match = _TRACKER_ID_RE.search(match_input)
                                 if mid_match: match_id_clean = mid_match.group(1)
-                            match_id_clean = re.sub(r'[^a-zA-Z0-9\-]', '', match_id_clean)
+                            match_id_clean = _ID_SANITIZE_RE.sub('', match_id_clean)
                         
                             json_path = os.path.join("matches", f"match_{match_id_clean}.json")
                             jsdata = None
                             source = ""
                         
-                            # 1. Try local file first
-                            if os.path.exists(json_path):
-                                try:
-                                    with open(json_path, 'r', encoding='utf-8') as f:
-                                        jsdata = json.load(f)
-                                    source = "Local Cache"
-                                except: pass
+                            # 1. Try local file first (a missing file just falls through; the stat doubles as the cache key)
+                            try:
+                                jsdata = load_match_json_file(json_path)
+                                source = "Local Cache"
+                            except: pass
                         
                             # 2. If not found locally, try GitHub repository
                             if not jsdata:
@@ -2774,8 +3348,7 @@ elif page == "Playoffs":
                                         # Save locally for next time
                                         try:
                                             if not os.path.exists("matches"): os.makedirs("matches")
-                                            with open(json_path, 'w', encoding='utf-8') as f:
-                                                json.dump(jsdata, f, indent=4)
+                                            write_json_file(json_path, jsdata)
                                         except: pass
 
                             # 3. If still not found, attempt live scrape
@@ -2785,47 +3358,41 @@ elif page == "Playoffs":
                                     if jsdata:
                                         source = "Tracker.gg"
                                         if not os.path.exists("matches"): os.makedirs("matches")
-                                        with open(json_path, 'w', encoding='utf-8') as f:
-                                            json.dump(jsdata, f, indent=4)
+                                        write_json_file(json_path, jsdata)
                                     else:
                                         st.error(f"Live scrape failed: {err}")
                                         if gh_err: st.info(f"GitHub fetch also failed: {gh_err}")
                                         st.info("💡 **Tip:** If scraping is blocked, run the scraper script on your PC and upload the JSON file below.")
                             
                             if jsdata:
-                                cur_t1_id = t1_id_val
-                                cur_t2_id = t2_id_val
-                                json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, cur_t1_id, cur_t2_id)
-                                st.session_state[f"ocr_po_{m['id']}_{map_idx}"] = json_suggestions
-                                st.session_state[f"scraped_data_po_{m['id']}_{map_idx}"] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
-                                st.session_state[f"force_map_po_{m['id']}_{map_idx}"] = st.session_state.get(f"force_map_po_{m['id']}_{map_idx}", 0) + 1
-                                st.session_state[f"force_apply_po_{m['id']}_{map_idx}"] = st.session_state.get(f"force_apply_po_{m['id']}_{map_idx}", 0) + 1
+                                json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, t1_id_val, t2_id_val)
+                                st.session_state[ocr_key] = json_suggestions
+                                st.session_state[scraped_key] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
+                                st.session_state[fm_key] = st.session_state.get(fm_key, 0) + 1
+                                st.session_state[fa_key] = st.session_state.get(fa_key, 0) + 1
                                 st.success(f"Loaded {map_name} from {source}!")
                                 st.rerun()
 
-                uploaded_file = st.file_uploader("Or Upload Tracker.gg JSON", type=["json"], key=f"po_json_up_{m['id']}_{map_idx}")
+                uploaded_file = st.file_uploader("Or Upload Tracker.gg JSON", type=["json"], key=f"po_json_up_{m_id}_{map_idx}")
                 if uploaded_file:
                     try:
-                        jsdata = json.load(uploaded_file)
-                        cur_t1_id = t1_id_val
-                        cur_t2_id = t2_id_val
-                        json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, cur_t1_id, cur_t2_id)
-                        st.session_state[f"ocr_po_{m['id']}_{map_idx}"] = json_suggestions
-                        st.session_state[f"scraped_data_po_{m['id']}_{map_idx}"] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
-                        st.session_state[f"force_map_po_{m['id']}_{map_idx}"] = st.session_state.get(f"force_map_po_{m['id']}_{map_idx}", 0) + 1
-                        st.session_state[f"force_apply_po_{m['id']}_{map_idx}"] = st.session_state.get(f"force_apply_po_{m['id']}_{map_idx}", 0) + 1
+                        json_suggestions, map_name, t1_r, t2_r = parse_tracker_bytes(uploaded_file.getvalue(), t1_id_val, t2_id_val)
+                        st.session_state[ocr_key] = json_suggestions
+                        st.session_state[scraped_key] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
+                        st.session_state[fm_key] = st.session_state.get(fm_key, 0) + 1
+                        st.session_state[fa_key] = st.session_state.get(fa_key, 0) + 1
                         st.success(f"Loaded {map_name} from uploaded file!")
                     except Exception as e:
                         st.error(f"Invalid JSON file: {e}")
 
                 # START UNIFIED FORM
-                with st.form(key=f"po_unified_map_form_{m['id']}_{map_idx}"):
+                with st.form(key=f"po_unified_map_form_{m_id}_{map_idx}"):
                     st.write(f"### Map Details & Scoreboard")
-                    force_map_cnt = st.session_state.get(f"force_map_po_{m['id']}_{map_idx}", 0)
+                    force_map_cnt = st.session_state.get(fm_key, 0)
                     
                     mcol1, mcol2, mcol3, mcol4 = st.columns([2, 1, 1, 1])
                     with mcol1:
-                        map_name_input = st.selectbox("Map Name", maps_catalog, index=(maps_catalog.index(pre_map_name) if pre_map_name in maps_catalog else 0), key=f"po_mname_uni_{map_idx}_{force_map_cnt}")
+                        map_name_input = st.selectbox("Map Name", maps_catalog, index=maps_catalog_idx.get(pre_map_name, 0), key=f"po_mname_uni_{map_idx}_{force_map_cnt}")
                     with mcol2:
                         t1r_input = st.number_input(f"{m['t1_name']} rounds", min_value=0, value=pre_map_t1, key=f"po_t1r_uni_{map_idx}_{force_map_cnt}")
                     with mcol3:
@@ -2839,57 +3406,51 @@ elif page == "Playoffs":
                     st.divider()
                     
                     agents_list = get_agents_list()
-                    all_df = get_all_players()
-                    if not all_df.empty:
-                        all_df['display_label'] = all_df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-                        global_list = all_df['display_label'].tolist()
-                        global_map = dict(zip(global_list, all_df['id']))
-                        has_riot = all_df['riot_id'].notna() & (all_df['riot_id'].str.strip() != "")
-                        label_to_riot = dict(zip(all_df.loc[has_riot, 'display_label'], all_df.loc[has_riot, 'riot_id'].str.strip().str.lower()))
-                        riot_to_label = {v: k for k, v in label_to_riot.items()}
-                        player_lookup = {row.id: {'label': row.display_label, 'riot_id': str(row.riot_id).strip().lower() if pd.notna(row.riot_id) and str(row.riot_id).strip() else None} for row in all_df.itertuples()}
-                    else:
-                        global_list, global_map, label_to_riot, riot_to_label, player_lookup = [], {}, {}, {}, {}
+                    rosters, global_list, global_map, label_to_riot, riot_to_label, player_lookup, label_by_name = get_player_lookups()
+
+                    all_map_stats = get_map_stats_rows(m_id, map_idx)
+                    # Split once by team instead of masking the frame inside the team loop
+                    stats_by_team = dict(tuple(all_map_stats.groupby('team_id')))
 
-                    conn_p = get_conn()
-                    all_map_stats = pd.read_sql("SELECT * FROM match_stats_map WHERE match_id=? AND map_index=?", conn_p, params=(int(m['id']), map_idx))
-                    conn_p.close()
+                    # Session lookups shared by both teams; the re-apply counter also versions the widget keys
+                    sug = st.session_state.get(ocr_key, {})
+                    force_cnt = st.session_state.get(fa_key, 0)
 
                     all_teams_entries = []
                     for team_key, team_id, team_name in [("t1", t1_id_val, m['t1_name']), ("t2", t2_id_val, m['t2_name'])]:
                         st.write(f"#### {team_name} Scoreboard")
-                        roster_df = all_df[all_df['default_team_id'] == team_id].sort_values('name')
-                        roster_list = roster_df['display_label'].tolist() if not roster_df.empty else []
-                        roster_map = dict(zip(roster_list, roster_df['id']))
-                        existing = all_map_stats[all_map_stats['team_id'] == team_id]
-                        sug = st.session_state.get(f"ocr_po_{m['id']}_{map_idx}", {})
+                        roster_list, roster_map = rosters.get(team_id, ([], {}))
+                        existing = stats_by_team.get(team_id, all_map_stats.iloc[:0])
                         our_team_num = 1 if team_key == "t1" else 2
-                        force_apply = st.session_state.get(f"force_apply_po_{m['id']}_{map_idx}", False)
                         
                         rows = []
-                        if not existing.empty and not force_apply:
-                            for r in existing.itertuples():
-                                pname = player_lookup.get(r.player_id, {}).get('label', "")
-                                rid = player_lookup.get(r.player_id, {}).get('riot_id')
-                                sfname = player_lookup.get(r.subbed_for_id, {}).get('label', "")
-                                acs, k, d, a = int(r.acs or 0), int(r.kills or 0), int(r.deaths or 0), int(r.assists or 0)
-                                agent = r.agent or (agents_list[0] if agents_list else "")
+                        if not existing.empty and not force_cnt:
+                            # Walk plain column lists; no per-row namedtuple, one player_lookup probe per id
+                            empty_p = {}
+                            default_agent = agents_list[0] if agents_list else ""
+                            default_sf = roster_list[0] if roster_list else ""
+                            cols_ex = [existing[c].tolist() for c in ('player_id', 'subbed_for_id', 'is_sub', 'agent', 'acs', 'kills', 'deaths', 'assists')]
+                            for pid, sfid, sub_flag, agent, acs, k, d, a in zip(*cols_ex):
+                                p_info = player_lookup.get(pid, empty_p)
+                                rid = p_info.get('riot_id')
+                                sfname = player_lookup.get(sfid, empty_p).get('label', "")
+                                acs, k, d, a = int(acs or 0), int(k or 0), int(d or 0), int(a or 0)
+                                agent = agent or default_agent
                                 if rid and rid in sug and acs == 0 and k == 0:
                                     s = sug[rid]; acs, k, d, a = s['acs'], s['k'], s['d'], s['a']; agent = s.get('agent') or agent
-                                rows.append({'player': pname, 'is_sub': bool(r.is_sub), 'subbed_for': sfname or (roster_list[0] if roster_list else ""), 'agent': agent, 'acs': acs, 'k': k, 'd': d, 'a': a})
+                                rows.append({'player': p_info.get('label', ""), 'is_sub': bool(sub_flag), 'subbed_for': sfname or default_sf, 'agent': agent, 'acs': acs, 'k': k, 'd': d, 'a': a})
                         else:
                             team_sug_rids = [rid for rid, s in sug.items() if s.get('team_num') == our_team_num]
                             json_roster_matches, json_subs = [], []
+                            roster_set = set(roster_list)
                             for rid in team_sug_rids:
                                 s = sug[rid]; l_rid = rid.lower(); db_label = riot_to_label.get(l_rid)
                                 if not db_label and s.get('name'):
-                                    matched_name = s.get('name')
-                                    for label in global_list:
-                                        if label == matched_name or label.startswith(matched_name + " ("): db_label = label; break
-                                if db_label and db_label in roster_list: json_roster_matches.append((rid, db_label, s))
+                                    db_label = label_by_name.get(s.get('name'))
+                                if db_label and db_label in roster_set: json_roster_matches.append((rid, db_label, s))
                                 else: json_subs.append((rid, db_label, s))
                             
-                            used_roster = [mx[1] for mx in json_roster_matches]
+                            used_roster = {mx[1] for mx in json_roster_matches}
                             missing_roster = [l for l in roster_list if l not in used_roster]
                             for rid, label, s in json_roster_matches:
                                 rows.append({'player': label, 'is_sub': False, 'subbed_for': label, 'agent': s.get('agent') or (agents_list[0] if agents_list else ""), 'acs': s['acs'], 'k': s['k'], 'd': s['d'], 'a': s['a']})
@@ -2901,69 +3462,100 @@ elif page == "Playoffs":
                                 l = missing_roster.pop(0) if missing_roster else (roster_list[0] if roster_list else "")
                                 rows.append({'player': l, 'is_sub': False, 'subbed_for': l, 'agent': agents_list[0] if agents_list else "", 'acs': 0, 'k': 0, 'd': 0, 'a': 0})
 
-                        h1,h2,h3,h4,h5,h6,h7,h8,h9 = st.columns([2,1.2,2,2,1,1,1,1,0.8])
-                        h1.write("Player"); h2.write("Sub?"); h3.write("Subbing For"); h4.write("Agent"); h5.write("ACS"); h6.write("K"); h7.write("D"); h8.write("A"); h9.write("Conf")
-                        
-                        team_entries = []
-                        force_cnt = st.session_state.get(f"force_apply_po_{m['id']}_{map_idx}", 0)
-                        for i, rowd in enumerate(rows):
-                            c1,c2,c3,c4,c5,c6,c7,c8,c9 = st.columns([2,1.2,2,2,1,1,1,1,0.8])
-                            p_idx = global_list.index(rowd['player']) if rowd['player'] in global_list else len(global_list)
-                            input_key = f"po_uni_{m['id']}_{map_idx}_{team_key}_{i}_{force_cnt}"
-                            psel = c1.selectbox(f"P_{input_key}", global_list + [""], index=p_idx, label_visibility="collapsed")
-                            rid_psel = label_to_riot.get(psel)
-                            is_sub = c2.checkbox(f"S_{input_key}", value=rowd['is_sub'], label_visibility="collapsed")
-                            sf_sel = c3.selectbox(f"SF_{input_key}", roster_list + [""], index=(roster_list.index(rowd['subbed_for']) if rowd['subbed_for'] in roster_list else 0), label_visibility="collapsed")
-                            ag_sel = c4.selectbox(f"Ag_{input_key}", agents_list + [""], index=(agents_list.index(rowd['agent']) if rowd['agent'] in agents_list else 0), label_visibility="collapsed")
-                            cur_s = sug.get(rid_psel, {}) if rid_psel else {}
-                            v_acs = cur_s.get('acs', rowd['acs']); v_k = cur_s.get('k', rowd['k']); v_d = cur_s.get('d', rowd['d']); v_a = cur_s.get('a', rowd['a'])
-                            acs = c5.number_input(f"ACS_{input_key}_{rid_psel}", min_value=0, value=int(v_acs), label_visibility="collapsed")
-                            k = c6.number_input(f"K_{input_key}_{rid_psel}", min_value=0, value=int(v_k), label_visibility="collapsed")
-                            d = c7.number_input(f"D_{input_key}_{rid_psel}", min_value=0, value=int(v_d), label_visibility="collapsed")
-                            a = c8.number_input(f"A_{input_key}_{rid_psel}", min_value=0, value=int(v_a), label_visibility="collapsed")
-                            c9.write(cur_s.get('conf', '-'))
-                            team_entries.append({'player_id': global_map.get(psel), 'is_sub': int(is_sub), 'subbed_for_id': roster_map.get(sf_sel), 'agent': ag_sel or None, 'acs': int(acs), 'kills': int(k), 'deaths': int(d), 'assists': int(a)})
+                        # One grid per team instead of nine widgets per row; suggestions for the listed player pre-fill the stats
+                        key_prefix = f"po_uni_{m_id}_{map_idx}_{team_key}_"
+                        default_agent = agents_list[0] if agents_list else ""
+                        default_sf = roster_list[0] if roster_list else ""
+                        for rowd in rows:
+                            rid_p = label_to_riot.get(rowd['player'])
+                            cur_s = sug.get(rid_p, {}) if rid_p else {}
+                            if rowd['player'] not in global_map: rowd['player'] = None
+                            if rowd['subbed_for'] not in roster_map: rowd['subbed_for'] = default_sf or None
+                            if rowd['agent'] not in agents_list: rowd['agent'] = default_agent or None
+                            for c in ('acs', 'k', 'd', 'a'): rowd[c] = int(cur_s.get(c, rowd[c]))
+                            rowd['conf'] = str(cur_s.get('conf', '-'))
+                        sb_df = pd.DataFrame(rows, columns=['player', 'is_sub', 'subbed_for', 'agent', 'acs', 'k', 'd', 'a', 'conf'])
+                        edited = st.data_editor(
+                            sb_df,
+                            hide_index=True,
+                            num_rows="fixed",
+                            use_container_width=True,
+                            column_config={
+                                "player": st.column_config.SelectboxColumn("Player", options=global_list, required=False, width="medium"),
+                                "is_sub": st.column_config.CheckboxColumn("Sub?"),
+                                "subbed_for": st.column_config.SelectboxColumn("Subbing For", options=roster_list, required=False, width="medium"),
+                                "agent": st.column_config.SelectboxColumn("Agent", options=agents_list, required=False),
+                                "acs": st.column_config.NumberColumn("ACS", min_value=0, step=1),
+                                "k": st.column_config.NumberColumn("K", min_value=0, step=1),
+                                "d": st.column_config.NumberColumn("D", min_value=0, step=1),
+                                "a": st.column_config.NumberColumn("A", min_value=0, step=1),
+                                "conf": st.column_config.TextColumn("Conf", disabled=True),
+                            },
+                            key=f"{key_prefix}{force_cnt}"
+                        )
+                        # Cleared cells come back as NaN; labels go back to None so the lookups and the NULL agent behave
+                        nums = edited[['acs', 'k', 'd', 'a']].apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
+                        labels = edited[['player', 'subbed_for', 'agent']].astype(object)
+                        labels = labels.where(labels.notna(), None)
+                        team_entries = [
+                            {'player_id': global_map.get(psel), 'is_sub': int(bool(is_sub)), 'subbed_for_id': roster_map.get(sf_sel), 'agent': ag_sel or None, 'acs': acs, 'kills': k, 'deaths': d, 'assists': a}
+                            for psel, is_sub, sf_sel, ag_sel, acs, k, d, a in zip(
+                                labels['player'].tolist(), edited['is_sub'].fillna(False).tolist(), labels['subbed_for'].tolist(), labels['agent'].tolist(),
+                                nums['acs'].tolist(), nums['k'].tolist(), nums['d'].tolist(), nums['a'].tolist())
+                        ]
                         all_teams_entries.append((team_id, team_entries))
                         st.divider()
 
                     submit_all = st.form_submit_button("Save Playoff Map & Scoreboard", use_container_width=True)
                     if submit_all:
                         wid = t1_id_val if winner_input == m['t1_name'] else (t2_id_val if winner_input == m['t2_name'] else None)
-                        conn_s = get_conn()
-                        try:
-                            # Use DELETE + INSERT for maximum compatibility and to avoid ON CONFLICT issues
-                            conn_s.execute("DELETE FROM match_maps WHERE match_id=? AND map_index=?", (int(m['id']), map_idx))
-                            conn_s.execute("""
-                                INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (int(m['id']), map_idx, map_name_input, int(t1r_input), int(t2r_input), wid, int(is_forfeit_input)))
-
-                            for t_id, t_entries in all_teams_entries:
-                                conn_s.execute("DELETE FROM match_stats_map WHERE match_id=? AND map_index=? AND team_id=?", (int(m['id']), map_idx, t_id))
-                                for e in t_entries:
-                                    if e['player_id']:
-                                        conn_s.execute("""
-                                            INSERT INTO match_stats_map (match_id, map_index, team_id, player_id, is_sub, subbed_for_id, agent, acs, kills, deaths, assists)
-                                            VALUES (?,?,?,?,?,?,?,?,?,?,?)
-                                        """, (int(m['id']), map_idx, t_id, e['player_id'], e['is_sub'], e['subbed_for_id'], e['agent'], e['acs'], e['kills'], e['deaths'], e['assists']))
+                        with DB_WRITE_LOCK:
+                            conn_s = get_conn()
+                            try:
+                                # Take the write lock up front so the map and its scoreboard land atomically
+                                conn_s.execute("BEGIN IMMEDIATE")
+                                # ux_match_maps_mm makes (match_id, map_index) an upsert key
+                                conn_s.execute("""
+                                    INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                                    ON CONFLICT(match_id, map_index) DO UPDATE SET
+                                        map_name=excluded.map_name,
+                                        team1_rounds=excluded.team1_rounds,
+                                        team2_rounds=excluded.team2_rounds,
+                                        winner_id=excluded.winner_id,
+                                        is_forfeit=excluded.is_forfeit
+                                """, (m_id, map_idx, map_name_input, int(t1r_input), int(t2r_input), wid, int(is_forfeit_input)))
+
+                                # Lineups can change between saves, so stale player rows are cleared rather than upserted
+                                conn_s.executemany("DELETE FROM match_stats_map WHERE match_id=? AND map_index=? AND team_id=?",
+                                                   [(m_id, map_idx, t_id) for t_id, _ in all_teams_entries])
+                                stat_rows = [
+                                    (m_id, map_idx, t_id, e['player_id'], e['is_sub'], e['subbed_for_id'], e['agent'], e['acs'], e['kills'], e['deaths'], e['assists'])
+                                    for t_id, t_entries in all_teams_entries for e in t_entries if e['player_id']
+                                ]
+                                conn_s.executemany("""
+                                    INSERT INTO match_stats_map (match_id, map_index, team_id, player_id, is_sub, subbed_for_id, agent, acs, kills, deaths, assists)
+                                    VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                                """, stat_rows)
                             
-                            maps_df_final = pd.read_sql("SELECT winner_id, team1_rounds, team2_rounds FROM match_maps WHERE match_id=?", conn_s, params=(int(m['id']),))
-                            final_s1 = len(maps_df_final[maps_df_final['winner_id'] == t1_id_val])
-                            final_s2 = len(maps_df_final[maps_df_final['winner_id'] == t2_id_val])
-                            final_winner = t1_id_val if final_s1 > final_s2 else (t2_id_val if final_s2 > final_s1 else None)
-                            played_cnt = len(maps_df_final[(maps_df_final['team1_rounds'] + maps_df_final['team2_rounds']) > 0])
+                                final_s1, final_s2, played_cnt = conn_s.execute("""
+                                    SELECT COALESCE(SUM(winner_id=?), 0), COALESCE(SUM(winner_id=?), 0),
+                                           COALESCE(SUM((team1_rounds + team2_rounds) > 0), 0)
+                                    FROM match_maps WHERE match_id=?
+                                """, (t1_id_val, t2_id_val, m_id)).fetchone()
+                                final_winner = t1_id_val if final_s1 > final_s2 else (t2_id_val if final_s2 > final_s1 else None)
                             
-                            conn_s.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status='completed', maps_played=? WHERE id=?", 
-                                         (final_s1, final_s2, final_winner, played_cnt, int(m['id'])))
-                            conn_s.commit()
-                            st.cache_data.clear()
-                            st.success(f"Saved Playoff Map {map_idx+1}!")
-                            st.rerun()
-                        except Exception as ex:
-                            conn_s.rollback()
-                            st.error(f"Error: {ex}")
-                        finally:
-                            conn_s.close()
+                                conn_s.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status='completed', maps_played=? WHERE id=?", 
+                                             (final_s1, final_s2, final_winner, played_cnt, m_id))
+                                conn_s.commit()
+                                clear_query_caches()
+                                st.success(f"Saved Playoff Map {map_idx+1}!")
+                                st.rerun()
+                            except Exception as ex:
+                                conn_s.rollback()
+                                st.error(f"Error: {ex}")
+                            finally:
+                                conn_s.close()
 
     # Bracket Visualization
     if df.empty:
@@ -2973,7 +3565,7 @@ elif page == "Playoffs":
         standings_df = get_standings()
         team_to_rank = {}
         if not standings_df.empty:
-            team_to_rank = dict(zip(standings_df['name'], range(1, len(standings_df) + 1)))
+            team_to_rank = {n: i for i, n in enumerate(standings_df['name'].to_numpy(), start=1)}
 
         # Define Rounds
         rounds = {
@@ -2985,84 +3577,31 @@ elif page == "Playoffs":
         }
         
         # Add some CSS for better bracket look
-        st.markdown("""
-        <style>
-        .bracket-container {
-            display: flex;
-            justify-content: space-between;
-            overflow-x: auto;
-            padding: 20px 0;
-            min-width: 1000px;
-        }
-        .bracket-round {
-            display: flex;
-            flex-direction: column;
-            justify-content: space-around;
-            width: 180px;
-            flex-shrink: 0;
-        }
-        .bracket-match {
-            background: var(--card-bg);
-            border: 1px solid rgba(63, 209, 255, 0.2);
-            border-radius: 8px;
-            padding: 8px;
-            margin: 10px 0;
-            box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-            font-size: 0.8rem;
-            min-height: 80px;
-        }
-        .match-team {
-            display: flex;
-            justify-content: space-between;
-            padding: 2px 0;
-        }
-        .team-winner {
-            color: var(--primary-blue);
-            font-weight: bold;
-        }
-        .match-info {
-            font-size: 0.6rem;
-            color: var(--text-dim);
-            text-align: center;
-            margin-top: 4px;
-            border-top: 1px solid rgba(255,255,255,0.05);
-            padding-top: 4px;
-        }
-        .tbd-match {
-            background: rgba(255,255,255,0.02);
-            border: 1px dashed rgba(255,255,255,0.1);
-            color: var(--text-dim);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(BRACKET_CSS, unsafe_allow_html=True)
 
+        df = df.assign(
+            t1_esc=vec_escape(df['t1_name'].fillna('').replace('', 'TBD')),
+            t2_esc=vec_escape(df['t2_name'].fillna('').replace('', 'TBD')),
+        )
         cols = st.columns(len(rounds))
+        # Vertical spacer before each slot, by round: (first slot, later slots)
+        spacer_heights = {3: (50, 100), 4: (150, 300), 5: (350, 350)}
         
         for r_idx, r_name in rounds.items():
             with cols[r_idx-1]:
-                st.markdown(f'<h4 style="text-align: center; color: var(--primary-blue); font-family: \'Orbitron\'; font-size: 0.8rem; margin-bottom: 20px;">{r_name}</h4>', unsafe_allow_html=True)
+                # The whole column goes out as one markdown element; parts stay flush-left
+                # and blank-line free so markdown keeps treating them as raw HTML
+                parts = [f'<h4 style="text-align: center; color: var(--primary-blue); font-family: \'Orbitron\'; font-size: 0.8rem; margin-bottom: 20px;">{r_name}</h4>']
                 
                 r_matches = df[df['playoff_round'] == r_idx].sort_values('bracket_pos')
                 
                 # Number of slots for this round
                 slots = 8 if r_idx in [1, 2] else (4 if r_idx == 3 else (2 if r_idx == 4 else 1))
                 
-                # Calculate offsets for centering
-                # We'll use spacer divs to achieve vertical alignment
-                
                 for p in range(1, slots + 1):
                     # Vertical Spacing Logic
-                    if r_idx == 3: # QF
-                        if p == 1: st.markdown('<div style="height: 50px;"></div>', unsafe_allow_html=True)
-                        else: st.markdown('<div style="height: 100px;"></div>', unsafe_allow_html=True)
-                    elif r_idx == 4: # SF
-                        if p == 1: st.markdown('<div style="height: 150px;"></div>', unsafe_allow_html=True)
-                        else: st.markdown('<div style="height: 300px;"></div>', unsafe_allow_html=True)
-                    elif r_idx == 5: # Final
-                        st.markdown('<div style="height: 350px;"></div>', unsafe_allow_html=True)
+                    if r_idx in spacer_heights:
+                        parts.append(f'<div style="height: {spacer_heights[r_idx][0 if p == 1 else 1]}px;"></div>')
 
                     match = r_matches[r_matches['bracket_pos'] == p]
                     
@@ -3073,8 +3612,8 @@ elif page == "Playoffs":
                         
                         t1_rank = team_to_rank.get(t1_name, "")
                         t2_rank = team_to_rank.get(t2_name, "")
-                        t1_display = f'<span style="color: var(--text-dim); font-size: 0.6rem; margin-right: 5px;">{t1_rank}</span>{html.escape(t1_name)}' if t1_rank else html.escape(t1_name)
-                        t2_display = f'<span style="color: var(--text-dim); font-size: 0.6rem; margin-right: 5px;">{t2_rank}</span>{html.escape(t2_name)}' if t2_rank else html.escape(t2_name)
+                        t1_display = f'<span style="color: var(--text-dim); font-size: 0.6rem; margin-right: 5px;">{t1_rank}</span>{m["t1_esc"]}' if t1_rank else m['t1_esc']
+                        t2_display = f'<span style="color: var(--text-dim); font-size: 0.6rem; margin-right: 5px;">{t2_rank}</span>{m["t2_esc"]}' if t2_rank else m['t2_esc']
 
                         s1 = m['score_t1']
                         s2 = m['score_t2']
@@ -3086,31 +3625,23 @@ elif page == "Playoffs":
                         
                         ff_marker = '<span style="color: var(--primary-red); font-size: 0.6rem; margin-left: 5px;">[FF]</span>' if is_ff else ''
                         
-                        st.markdown(f"""
-                        <div class="bracket-match">
-                            <div class="match-team">
-                                <span class="{t1_class}">{t1_display}</span>
-                                <span style="font-family: 'Orbitron';">{s1}{ff_marker if s1 > s2 else ''}</span>
-                            </div>
-                            <div class="match-team">
-                                <span class="{t2_class}">{t2_display}</span>
-                                <span style="font-family: 'Orbitron';">{s2}{ff_marker if s2 > s1 else ''}</span>
-                            </div>
-                            <div class="match-info">
-                                {m['format']} • {status.upper()}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        parts.append(f"""<div class="bracket-match">
+<div class="match-team">
+<span class="{t1_class}">{t1_display}</span>
+<span style="font-family: 'Orbitron';">{s1}{ff_marker if s1 > s2 else ''}</span>
+</div>
+<div class="match-team">
+<span class="{t2_class}">{t2_display}</span>
+<span style="font-family: 'Orbitron';">{s2}{ff_marker if s2 > s1 else ''}</span>
+</div>
+<div class="match-info">{m['format']} • {status.upper()}</div>
+</div>""")
                     else:
-                        st.markdown("""
-                        <div class="bracket-match tbd-match">
-                            TBD vs TBD
-                        </div>
-                        """, unsafe_allow_html=True)
+                        parts.append('<div class="bracket-match tbd-match">TBD vs TBD</div>')
+                
+                st.markdown("\n".join(parts), unsafe_allow_html=True)
 
 elif page == "Admin Panel":
-    import pandas as pd
-    import numpy as np
     st.markdown('<h1 class="main-header">ADMIN PANEL</h1>', unsafe_allow_html=True)
     if not st.session_state.get('is_admin'):
         st.warning("Admin only")
@@ -3158,17 +3689,24 @@ elif page == "Admin Panel":
             st.subheader("Data Import")
             up = st.file_uploader("Upload SQLite .db", type=["db","sqlite"])
             if up and st.button("Import DB"):
-                res = import_sqlite_db(up.read())
-                st.success("Imported")
-                if res:
-                    st.write(res)
-                st.rerun()
+                try:
+                    res = import_sqlite_db(up)
+                except sqlite3.IntegrityError as e:
+                    st.error(f"Import aborted: an imported player's name or Riot ID is already used by a different local player ({e}).")
+                else:
+                    st.success("Imported")
+                    if res:
+                        st.write(res)
+                    st.rerun()
             st.subheader("Data Export")
-            dbb = export_db_bytes()
-            if dbb:
-                st.download_button("Download DB", data=dbb, file_name=os.path.basename(DB_PATH) or "valorant_s23.db", mime="application/octet-stream")
-            else:
-                st.info("Database file not found")
+            # Read the file only on request, not on every admin rerun
+            if st.button("Prepare download"):
+                st.session_state['_db_blob'] = export_db_bytes()
+                if not st.session_state['_db_blob']:
+                    st.info("Database file not found")
+            dbb = st.session_state.get('_db_blob')
+            if dbb and st.download_button("Download DB", data=dbb, file_name=os.path.basename(DB_PATH) or "valorant_s23.db", mime="application/octet-stream"):
+                st.session_state.pop('_db_blob', None)
             st.subheader("Cloud Backup")
             c1, c2 = st.columns(2)
             with c1:
@@ -3209,8 +3747,7 @@ elif page == "Admin Panel":
             if dfm.empty:
                 st.info("No matches for this week")
             else:
-                # Vectorized option generation
-                match_opts = ("ID " + dfm['id'].astype(str) + ": " + dfm['t1_name'].fillna('') + " vs " + dfm['t2_name'].fillna('') + " (" + dfm['group_name'].fillna('') + ")").tolist()
+                match_opts = get_week_match_opts(wk)
                 idx = st.selectbox("Match", list(range(len(match_opts))), format_func=lambda i: match_opts[i])
                 m = dfm.iloc[idx]
 
@@ -3221,28 +3758,31 @@ elif page == "Admin Panel":
                 # Pre-define IDs for both FF and regular logic
                 t1_id_val = int(m.get('t1_id', m.get('team1_id')))
                 t2_id_val = int(m.get('t2_id', m.get('team2_id')))
+                m_id = int(m['id'])
                 
                 # Match-level Forfeit
-                is_match_ff = st.checkbox("Match-level Forfeit", value=bool(m.get('is_forfeit', 0)), key=f"match_ff_{m['id']}", help="Check if the entire match was a forfeit (13-0 result)")
+                is_match_ff = st.checkbox("Match-level Forfeit", value=bool(m.get('is_forfeit', 0)), key=f"match_ff_{m_id}", help="Check if the entire match was a forfeit (13-0 result)")
                 
                 if is_match_ff:
-                    ff_winner_team = st.radio("Match Winner", [m['t1_name'], m['t2_name']], index=0 if m['score_t1'] >= m['score_t2'] else 1, horizontal=True)
-                    s1 = 13 if ff_winner_team == m['t1_name'] else 0
-                    s2 = 13 if ff_winner_team == m['t2_name'] else 0
-                    st.info(f"Forfeit Result: {m['t1_name']} {s1} - {s2} {m['t2_name']}")
+                    # Forfeit editor lives in its own container; the per-map editor below is only built when not a forfeit
+                    with st.container():
+                        ff_winner_team = st.radio("Match Winner", [m['t1_name'], m['t2_name']], index=0 if m['score_t1'] >= m['score_t2'] else 1, horizontal=True, key=f"ff_winner_{m_id}")
+                        s1 = 13 if ff_winner_team == m['t1_name'] else 0
+                        s2 = 13 if ff_winner_team == m['t2_name'] else 0
+                        st.info(f"Forfeit Result: {m['t1_name']} {s1} - {s2} {m['t2_name']}")
                     
-                    if st.button("Save Forfeit Match"):
-                        conn_u = get_conn()
-                        winner_id = t1_id_val if s1 > s2 else t2_id_val
-                        conn_u.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status=?, format=?, maps_played=?, is_forfeit=1 WHERE id=?", (int(s1), int(s2), winner_id, 'completed', fmt, 0, int(m['id'])))
-                        # Clear any existing maps/stats if it's now a forfeit
-                        conn_u.execute("DELETE FROM match_maps WHERE match_id=?", (int(m['id']),))
-                        conn_u.execute("DELETE FROM match_stats_map WHERE match_id=?", (int(m['id']),))
-                        conn_u.commit()
-                        conn_u.close()
-                        st.cache_data.clear()
-                        st.success("Saved forfeit match")
-                        st.rerun()
+                        if st.button("Save Forfeit Match", key=f"ff_save_{m_id}"):
+                            conn_u = get_conn()
+                            winner_id = t1_id_val if s1 > s2 else t2_id_val
+                            conn_u.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status=?, format=?, maps_played=?, is_forfeit=1 WHERE id=?", (int(s1), int(s2), winner_id, 'completed', fmt, 0, m_id))
+                            # Clear any existing maps/stats if it's now a forfeit
+                            conn_u.execute("DELETE FROM match_maps WHERE match_id=?", (m_id,))
+                            conn_u.execute("DELETE FROM match_stats_map WHERE match_id=?", (m_id,))
+                            conn_u.commit()
+                            conn_u.close()
+                            clear_query_caches()
+                            st.success("Saved forfeit match")
+                            st.rerun()
                 else:
                     st.info("Match details are managed per-map below. The total match score will be automatically updated.")
                     st.divider()
@@ -3254,7 +3794,7 @@ elif page == "Admin Panel":
                     map_idx = map_choice - 1
                     
                     # 1. Fetch existing map data for THIS map index
-                    existing_maps_df = get_match_maps(int(m['id']))
+                    existing_maps_df = get_match_maps(m_id)
                     existing_map = None
                     if not existing_maps_df.empty:
                         rowx = existing_maps_df[existing_maps_df['map_index'] == map_idx]
@@ -3267,8 +3807,11 @@ elif page == "Admin Panel":
                     pre_map_win = int(existing_map['winner_id']) if existing_map is not None and pd.notna(existing_map['winner_id']) else None
                     pre_map_ff = bool(existing_map['is_forfeit']) if existing_map is not None and 'is_forfeit' in existing_map else False
 
+                    # Per-map session keys, built once per render
+                    scraped_key, ocr_key, fm_key, fa_key = (f"{p}_{m_id}_{map_idx}" for p in ("scraped_data", "ocr", "force_map", "force_apply"))
+
                     # Override with scraped data if available
-                    scraped_map = st.session_state.get(f"scraped_data_{m['id']}_{map_idx}")
+                    scraped_map = st.session_state.get(scraped_key)
                     if scraped_map:
                         pre_map_name = scraped_map['map_name']
                         pre_map_t1 = scraped_map['t1_rounds']
@@ -3276,35 +3819,31 @@ elif page == "Admin Panel":
                         if pre_map_t1 > pre_map_t2: pre_map_win = t1_id_val
                         elif pre_map_t2 > pre_map_t1: pre_map_win = t2_id_val
 
-                    all_df0 = get_all_players()
-                    name_to_riot = dict(zip(all_df0['name'].astype(str), all_df0['riot_id'].astype(str))) if not all_df0.empty else {}
                 
                     # Match ID/URL input and JSON upload for automatic pre-filling
                     st.write("#### 🤖 Auto-Fill from Tracker.gg")
                     col_json1, col_json2 = st.columns([2, 1])
                     with col_json1:
-                        match_input = st.text_input("Tracker.gg Match URL or ID", key=f"mid_{m['id']}_{map_idx}", placeholder="https://tracker.gg/valorant/match/...")
+                        match_input = st.text_input("Tracker.gg Match URL or ID", key=f"mid_{m_id}_{map_idx}", placeholder="https://tracker.gg/valorant/match/...")
                     with col_json2:
-                        if st.button("Apply Match Data", key=f"force_json_{m['id']}_{map_idx}", use_container_width=True):
+                        if st.button("Apply Match Data", key=f"force_json_{m_id}_{map_idx}", use_container_width=True):
                             if match_input:
                                 # Clean Match ID
                                 match_id_clean = match_input
                                 if "tracker.gg" in match_input:
-                                    mid_match = re.search(r'match/([a-zA-Z0-9\-]+)', match_input)
+                                    mid_match = _TRACKER_ID_RE.search(match_input)
                                     if mid_match: match_id_clean = mid_match.group(1)
-                                match_id_clean = re.sub(r'[^a-zA-Z0-9\-]', '', match_id_clean)
+                                match_id_clean = _ID_SANITIZE_RE.sub('', match_id_clean)
                             
                                 json_path = os.path.join("matches", f"match_{match_id_clean}.json")
                                 jsdata = None
                                 source = ""
                             
-                                # 1. Try local file first
-                                if os.path.exists(json_path):
-                                    try:
-                                        with open(json_path, 'r', encoding='utf-8') as f:
-                                            jsdata = json.load(f)
-                                        source = "Local Cache"
-                                    except: pass
+                                # 1. Try local file first (a missing file just falls through; the stat doubles as the cache key)
+                                try:
+                                    jsdata = load_match_json_file(json_path)
+                                    source = "Local Cache"
+                                except: pass
                             
                                 # 2. If not found locally, try GitHub repository
                                 if not jsdata:
@@ -3315,8 +3854,7 @@ elif page == "Admin Panel":
                                             # Save locally for next time
                                             try:
                                                 if not os.path.exists("matches"): os.makedirs("matches")
-                                                with open(json_path, 'w', encoding='utf-8') as f:
-                                                    json.dump(jsdata, f, indent=4)
+                                                write_json_file(json_path, jsdata)
                                             except: pass
 
                                 # 3. If still not found, attempt live scrape
@@ -3326,48 +3864,42 @@ elif page == "Admin Panel":
                                         if jsdata:
                                             source = "Tracker.gg"
                                             if not os.path.exists("matches"): os.makedirs("matches")
-                                            with open(json_path, 'w', encoding='utf-8') as f:
-                                                json.dump(jsdata, f, indent=4)
+                                            write_json_file(json_path, jsdata)
                                         else:
                                             st.error(f"Live scrape failed: {err}")
                                             if gh_err: st.info(f"GitHub fetch also failed: {gh_err}")
                                             st.info("💡 **Tip:** If scraping is blocked, run the scraper script on your PC and upload the JSON file below.")
                             
                                 if jsdata:
-                                    cur_t1_id = int(m.get('t1_id', m.get('team1_id')))
-                                    cur_t2_id = int(m.get('t2_id', m.get('team2_id')))
-                                    json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, cur_t1_id, cur_t2_id)
-                                    st.session_state[f"ocr_{m['id']}_{map_idx}"] = json_suggestions
-                                    st.session_state[f"scraped_data_{m['id']}_{map_idx}"] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
-                                    st.session_state[f"force_map_{m['id']}_{map_idx}"] = st.session_state.get(f"force_map_{m['id']}_{map_idx}", 0) + 1
-                                    st.session_state[f"force_apply_{m['id']}_{map_idx}"] = st.session_state.get(f"force_apply_{m['id']}_{map_idx}", 0) + 1
+                                    json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, t1_id_val, t2_id_val)
+                                    st.session_state[ocr_key] = json_suggestions
+                                    st.session_state[scraped_key] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
+                                    st.session_state[fm_key] = st.session_state.get(fm_key, 0) + 1
+                                    st.session_state[fa_key] = st.session_state.get(fa_key, 0) + 1
                                     st.success(f"Loaded {map_name} from {source}!")
                                     st.rerun()
 
-                    uploaded_file = st.file_uploader("Or Upload Tracker.gg JSON", type=["json"], key=f"json_up_{m['id']}_{map_idx}")
+                    uploaded_file = st.file_uploader("Or Upload Tracker.gg JSON", type=["json"], key=f"json_up_{m_id}_{map_idx}")
                     if uploaded_file:
                         try:
-                            jsdata = json.load(uploaded_file)
-                            cur_t1_id = int(m.get('t1_id', m.get('team1_id')))
-                            cur_t2_id = int(m.get('t2_id', m.get('team2_id')))
-                            json_suggestions, map_name, t1_r, t2_r = parse_tracker_json(jsdata, cur_t1_id, cur_t2_id)
-                            st.session_state[f"ocr_{m['id']}_{map_idx}"] = json_suggestions
-                            st.session_state[f"scraped_data_{m['id']}_{map_idx}"] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
-                            st.session_state[f"force_map_{m['id']}_{map_idx}"] = st.session_state.get(f"force_map_{m['id']}_{map_idx}", 0) + 1
-                            st.session_state[f"force_apply_{m['id']}_{map_idx}"] = st.session_state.get(f"force_apply_{m['id']}_{map_idx}", 0) + 1
+                            json_suggestions, map_name, t1_r, t2_r = parse_tracker_bytes(uploaded_file.getvalue(), t1_id_val, t2_id_val)
+                            st.session_state[ocr_key] = json_suggestions
+                            st.session_state[scraped_key] = {'map_name': map_name, 't1_rounds': int(t1_r), 't2_rounds': int(t2_r)}
+                            st.session_state[fm_key] = st.session_state.get(fm_key, 0) + 1
+                            st.session_state[fa_key] = st.session_state.get(fa_key, 0) + 1
                             st.success(f"Loaded {map_name} from uploaded file!")
                         except Exception as e:
                             st.error(f"Invalid JSON file: {e}")
 
 
                     # START UNIFIED FORM
-                    with st.form(key=f"unified_map_form_{m['id']}_{map_idx}"):
+                    with st.form(key=f"unified_map_form_{m_id}_{map_idx}"):
                         st.write(f"### Map Details & Scoreboard")
-                        force_map_cnt = st.session_state.get(f"force_map_{m['id']}_{map_idx}", 0)
+                        force_map_cnt = st.session_state.get(fm_key, 0)
                         
                         mcol1, mcol2, mcol3, mcol4 = st.columns([2, 1, 1, 1])
                         with mcol1:
-                            map_name_input = st.selectbox("Map Name", maps_catalog, index=(maps_catalog.index(pre_map_name) if pre_map_name in maps_catalog else 0), key=f"mname_uni_{map_idx}_{force_map_cnt}")
+                            map_name_input = st.selectbox("Map Name", maps_catalog, index=maps_catalog_idx.get(pre_map_name, 0), key=f"mname_uni_{map_idx}_{force_map_cnt}")
                         with mcol2:
                             t1r_input = st.number_input(f"{m['t1_name']} rounds", min_value=0, value=pre_map_t1, key=f"t1r_uni_{map_idx}_{force_map_cnt}")
                         with mcol3:
@@ -3383,59 +3915,53 @@ elif page == "Admin Panel":
                         
                         # Shared data for scoreboards
                         agents_list = get_agents_list()
-                        all_df = get_all_players()
-                        if not all_df.empty:
-                            all_df['display_label'] = all_df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-                            global_list = all_df['display_label'].tolist()
-                            global_map = dict(zip(global_list, all_df['id']))
-                            has_riot = all_df['riot_id'].notna() & (all_df['riot_id'].str.strip() != "")
-                            label_to_riot = dict(zip(all_df.loc[has_riot, 'display_label'], all_df.loc[has_riot, 'riot_id'].str.strip().str.lower()))
-                            riot_to_label = {v: k for k, v in label_to_riot.items()}
-                            player_lookup = {row.id: {'label': row.display_label, 'riot_id': str(row.riot_id).strip().lower() if pd.notna(row.riot_id) and str(row.riot_id).strip() else None} for row in all_df.itertuples()}
-                        else:
-                            global_list, global_map, label_to_riot, riot_to_label, player_lookup = [], {}, {}, {}, {}
+                        rosters, global_list, global_map, label_to_riot, riot_to_label, player_lookup, label_by_name = get_player_lookups()
+
+                        all_map_stats = get_map_stats_rows(m_id, map_idx)
+                        # Split once by team instead of masking the frame inside the team loop
+                        stats_by_team = dict(tuple(all_map_stats.groupby('team_id')))
 
-                        conn_p = get_conn()
-                        all_map_stats = pd.read_sql("SELECT * FROM match_stats_map WHERE match_id=? AND map_index=?", conn_p, params=(int(m['id']), map_idx))
-                        conn_p.close()
+                        # Session lookups shared by both teams; the re-apply counter also versions the widget keys
+                        sug = st.session_state.get(ocr_key, {})
+                        force_cnt = st.session_state.get(fa_key, 0)
 
                         all_teams_entries = [] # To store (team_id, entries)
 
                         for team_key, team_id, team_name in [("t1", t1_id_val, m['t1_name']), ("t2", t2_id_val, m['t2_name'])]:
                             st.write(f"#### {team_name} Scoreboard")
-                            roster_df = all_df[all_df['default_team_id'] == team_id].sort_values('name')
-                            roster_list = roster_df['display_label'].tolist() if not roster_df.empty else []
-                            roster_map = dict(zip(roster_list, roster_df['id']))
+                            roster_list, roster_map = rosters.get(team_id, ([], {}))
                             
-                            existing = all_map_stats[all_map_stats['team_id'] == team_id]
-                            sug = st.session_state.get(f"ocr_{m['id']}_{map_idx}", {})
+                            existing = stats_by_team.get(team_id, all_map_stats.iloc[:0])
                             our_team_num = 1 if team_key == "t1" else 2
-                            force_apply = st.session_state.get(f"force_apply_{m['id']}_{map_idx}", False)
                             
                             rows = []
-                            if not existing.empty and not force_apply:
-                                for r in existing.itertuples():
-                                    pname = player_lookup.get(r.player_id, {}).get('label', "")
-                                    rid = player_lookup.get(r.player_id, {}).get('riot_id')
-                                    sfname = player_lookup.get(r.subbed_for_id, {}).get('label', "")
-                                    acs, k, d, a = int(r.acs or 0), int(r.kills or 0), int(r.deaths or 0), int(r.assists or 0)
-                                    agent = r.agent or (agents_list[0] if agents_list else "")
+                            if not existing.empty and not force_cnt:
+                                # Walk plain column lists; no per-row namedtuple, one player_lookup probe per id
+                                empty_p = {}
+                                default_agent = agents_list[0] if agents_list else ""
+                                default_sf = roster_list[0] if roster_list else ""
+                                cols_ex = [existing[c].tolist() for c in ('player_id', 'subbed_for_id', 'is_sub', 'agent', 'acs', 'kills', 'deaths', 'assists')]
+                                for pid, sfid, sub_flag, agent, acs, k, d, a in zip(*cols_ex):
+                                    p_info = player_lookup.get(pid, empty_p)
+                                    rid = p_info.get('riot_id')
+                                    sfname = player_lookup.get(sfid, empty_p).get('label', "")
+                                    acs, k, d, a = int(acs or 0), int(k or 0), int(d or 0), int(a or 0)
+                                    agent = agent or default_agent
                                     if rid and rid in sug and acs == 0 and k == 0:
                                         s = sug[rid]; acs, k, d, a = s['acs'], s['k'], s['d'], s['a']; agent = s.get('agent') or agent
-                                    rows.append({'player': pname, 'is_sub': bool(r.is_sub), 'subbed_for': sfname or (roster_list[0] if roster_list else ""), 'agent': agent, 'acs': acs, 'k': k, 'd': d, 'a': a})
+                                    rows.append({'player': p_info.get('label', ""), 'is_sub': bool(sub_flag), 'subbed_for': sfname or default_sf, 'agent': agent, 'acs': acs, 'k': k, 'd': d, 'a': a})
                             else:
                                 team_sug_rids = [rid for rid, s in sug.items() if s.get('team_num') == our_team_num]
                                 json_roster_matches, json_subs = [], []
+                                roster_set = set(roster_list)
                                 for rid in team_sug_rids:
                                     s = sug[rid]; l_rid = rid.lower(); db_label = riot_to_label.get(l_rid)
                                     if not db_label and s.get('name'):
-                                        matched_name = s.get('name')
-                                        for label in global_list:
-                                            if label == matched_name or label.startswith(matched_name + " ("): db_label = label; break
-                                    if db_label and db_label in roster_list: json_roster_matches.append((rid, db_label, s))
+                                        db_label = label_by_name.get(s.get('name'))
+                                    if db_label and db_label in roster_set: json_roster_matches.append((rid, db_label, s))
                                     else: json_subs.append((rid, db_label, s))
                                 
-                                used_roster = [m[1] for m in json_roster_matches]
+                                used_roster = {mx[1] for mx in json_roster_matches}
                                 missing_roster = [l for l in roster_list if l not in used_roster]
                                 for rid, label, s in json_roster_matches:
                                     rows.append({'player': label, 'is_sub': False, 'subbed_for': label, 'agent': s.get('agent') or (agents_list[0] if agents_list else ""), 'acs': s['acs'], 'k': s['k'], 'd': s['d'], 'a': s['a']})
@@ -3448,33 +3974,47 @@ elif page == "Admin Panel":
                                     rows.append({'player': l, 'is_sub': False, 'subbed_for': l, 'agent': agents_list[0] if agents_list else "", 'acs': 0, 'k': 0, 'd': 0, 'a': 0})
 
                             # Render team table
-                            h1,h2,h3,h4,h5,h6,h7,h8,h9 = st.columns([2,1.2,2,2,1,1,1,1,0.8])
-                            h1.write("Player"); h2.write("Sub?"); h3.write("Subbing For"); h4.write("Agent"); h5.write("ACS"); h6.write("K"); h7.write("D"); h8.write("A"); h9.write("Conf")
-                            
-                            team_entries = []
-                            force_cnt = st.session_state.get(f"force_apply_{m['id']}_{map_idx}", 0)
-                            for i, rowd in enumerate(rows):
-                                c1,c2,c3,c4,c5,c6,c7,c8,c9 = st.columns([2,1.2,2,2,1,1,1,1,0.8])
-                                p_idx = global_list.index(rowd['player']) if rowd['player'] in global_list else len(global_list)
-                                input_key = f"uni_{m['id']}_{map_idx}_{team_key}_{i}_{force_cnt}"
-                                if sug: input_key += f"_{hash(str(sug))}"
-                                
-                                psel = c1.selectbox(f"P_{input_key}", global_list + [""], index=p_idx, label_visibility="collapsed")
-                                rid_psel = label_to_riot.get(psel)
-                                is_sub = c2.checkbox(f"S_{input_key}", value=rowd['is_sub'], label_visibility="collapsed")
-                                sf_sel = c3.selectbox(f"SF_{input_key}", roster_list + [""], index=(roster_list.index(rowd['subbed_for']) if rowd['subbed_for'] in roster_list else 0), label_visibility="collapsed")
-                                ag_sel = c4.selectbox(f"Ag_{input_key}", agents_list + [""], index=(agents_list.index(rowd['agent']) if rowd['agent'] in agents_list else 0), label_visibility="collapsed")
-                                
-                                cur_s = sug.get(rid_psel, {}) if rid_psel else {}
-                                v_acs = cur_s.get('acs', rowd['acs']); v_k = cur_s.get('k', rowd['k']); v_d = cur_s.get('d', rowd['d']); v_a = cur_s.get('a', rowd['a'])
-                                
-                                acs = c5.number_input(f"ACS_{input_key}_{rid_psel}", min_value=0, value=int(v_acs), label_visibility="collapsed")
-                                k = c6.number_input(f"K_{input_key}_{rid_psel}", min_value=0, value=int(v_k), label_visibility="collapsed")
-                                d = c7.number_input(f"D_{input_key}_{rid_psel}", min_value=0, value=int(v_d), label_visibility="collapsed")
-                                a = c8.number_input(f"A_{input_key}_{rid_psel}", min_value=0, value=int(v_a), label_visibility="collapsed")
-                                c9.write(cur_s.get('conf', '-'))
-                                
-                                team_entries.append({'player_id': global_map.get(psel), 'is_sub': int(is_sub), 'subbed_for_id': roster_map.get(sf_sel), 'agent': ag_sel or None, 'acs': int(acs), 'kills': int(k), 'deaths': int(d), 'assists': int(a)})
+                            # One grid per team instead of nine widgets per row; suggestions for the listed player pre-fill the stats
+                            key_prefix = f"uni_{m_id}_{map_idx}_{team_key}_"
+                            default_agent = agents_list[0] if agents_list else ""
+                            default_sf = roster_list[0] if roster_list else ""
+                            for rowd in rows:
+                                rid_p = label_to_riot.get(rowd['player'])
+                                cur_s = sug.get(rid_p, {}) if rid_p else {}
+                                if rowd['player'] not in global_map: rowd['player'] = None
+                                if rowd['subbed_for'] not in roster_map: rowd['subbed_for'] = default_sf or None
+                                if rowd['agent'] not in agents_list: rowd['agent'] = default_agent or None
+                                for c in ('acs', 'k', 'd', 'a'): rowd[c] = int(cur_s.get(c, rowd[c]))
+                                rowd['conf'] = str(cur_s.get('conf', '-'))
+                            sb_df = pd.DataFrame(rows, columns=['player', 'is_sub', 'subbed_for', 'agent', 'acs', 'k', 'd', 'a', 'conf'])
+                            edited = st.data_editor(
+                                sb_df,
+                                hide_index=True,
+                                num_rows="fixed",
+                                use_container_width=True,
+                                column_config={
+                                    "player": st.column_config.SelectboxColumn("Player", options=global_list, required=False, width="medium"),
+                                    "is_sub": st.column_config.CheckboxColumn("Sub?"),
+                                    "subbed_for": st.column_config.SelectboxColumn("Subbing For", options=roster_list, required=False, width="medium"),
+                                    "agent": st.column_config.SelectboxColumn("Agent", options=agents_list, required=False),
+                                    "acs": st.column_config.NumberColumn("ACS", min_value=0, step=1),
+                                    "k": st.column_config.NumberColumn("K", min_value=0, step=1),
+                                    "d": st.column_config.NumberColumn("D", min_value=0, step=1),
+                                    "a": st.column_config.NumberColumn("A", min_value=0, step=1),
+                                    "conf": st.column_config.TextColumn("Conf", disabled=True),
+                                },
+                                key=f"{key_prefix}{force_cnt}"
+                            )
+                            # Cleared cells come back as NaN; labels go back to None so the lookups and the NULL agent behave
+                            nums = edited[['acs', 'k', 'd', 'a']].apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
+                            labels = edited[['player', 'subbed_for', 'agent']].astype(object)
+                            labels = labels.where(labels.notna(), None)
+                            team_entries = [
+                                {'player_id': global_map.get(psel), 'is_sub': int(bool(is_sub)), 'subbed_for_id': roster_map.get(sf_sel), 'agent': ag_sel or None, 'acs': acs, 'kills': k, 'deaths': d, 'assists': a}
+                                for psel, is_sub, sf_sel, ag_sel, acs, k, d, a in zip(
+                                    labels['player'].tolist(), edited['is_sub'].fillna(False).tolist(), labels['subbed_for'].tolist(), labels['agent'].tolist(),
+                                    nums['acs'].tolist(), nums['k'].tolist(), nums['d'].tolist(), nums['a'].tolist())
+                            ]
                             
                             all_teams_entries.append((team_id, team_entries))
                             st.divider()
@@ -3485,49 +4025,61 @@ elif page == "Admin Panel":
                             wid = t1_id_val if winner_input == m['t1_name'] else (t2_id_val if winner_input == m['t2_name'] else None)
                             
                             # 2. Save everything in one transaction
-                            conn_s = get_conn()
-                            try:
-                                # A. Save Map Info
-                                # Use DELETE + INSERT for maximum compatibility and to avoid ON CONFLICT issues
-                                conn_s.execute("DELETE FROM match_maps WHERE match_id=? AND map_index=?", (int(m['id']), map_idx))
-                                conn_s.execute("""
-                                    INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                """, (int(m['id']), map_idx, map_name_input, int(t1r_input), int(t2r_input), wid, int(is_forfeit_input)))
-
-                                # B. Save Stats for both teams
-                                for t_id, t_entries in all_teams_entries:
-                                    conn_s.execute("DELETE FROM match_stats_map WHERE match_id=? AND map_index=? AND team_id=?", (int(m['id']), map_idx, t_id))
-                                    for e in t_entries:
-                                        if e['player_id']:
-                                            conn_s.execute("""
-                                                INSERT INTO match_stats_map (match_id, map_index, team_id, player_id, is_sub, subbed_for_id, agent, acs, kills, deaths, assists)
-                                                VALUES (?,?,?,?,?,?,?,?,?,?,?)
-                                            """, (int(m['id']), map_idx, t_id, e['player_id'], e['is_sub'], e['subbed_for_id'], e['agent'], e['acs'], e['kills'], e['deaths'], e['assists']))
+                            with DB_WRITE_LOCK:
+                                conn_s = get_conn()
+                                try:
+                                    # Take the write lock up front so the map and its scoreboard land atomically
+                                    conn_s.execute("BEGIN IMMEDIATE")
+                                    # A. Save Map Info
+                                    # ux_match_maps_mm makes (match_id, map_index) an upsert key
+                                    conn_s.execute("""
+                                        INSERT INTO match_maps (match_id, map_index, map_name, team1_rounds, team2_rounds, winner_id, is_forfeit)
+                                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                                        ON CONFLICT(match_id, map_index) DO UPDATE SET
+                                            map_name=excluded.map_name,
+                                            team1_rounds=excluded.team1_rounds,
+                                            team2_rounds=excluded.team2_rounds,
+                                            winner_id=excluded.winner_id,
+                                            is_forfeit=excluded.is_forfeit
+                                    """, (m_id, map_idx, map_name_input, int(t1r_input), int(t2r_input), wid, int(is_forfeit_input)))
+
+                                    # B. Save Stats for both teams
+                                    # Lineups can change between saves, so stale player rows are cleared rather than upserted
+                                    conn_s.executemany("DELETE FROM match_stats_map WHERE match_id=? AND map_index=? AND team_id=?",
+                                                       [(m_id, map_idx, t_id) for t_id, _ in all_teams_entries])
+                                    stat_rows = [
+                                        (m_id, map_idx, t_id, e['player_id'], e['is_sub'], e['subbed_for_id'], e['agent'], e['acs'], e['kills'], e['deaths'], e['assists'])
+                                        for t_id, t_entries in all_teams_entries for e in t_entries if e['player_id']
+                                    ]
+                                    conn_s.executemany("""
+                                        INSERT INTO match_stats_map (match_id, map_index, team_id, player_id, is_sub, subbed_for_id, agent, acs, kills, deaths, assists)
+                                        VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                                    """, stat_rows)
                                 
-                                # C. Recalculate Match Totals
-                                maps_df_final = pd.read_sql("SELECT team1_rounds, team2_rounds, winner_id FROM match_maps WHERE match_id=?", conn_s, params=(int(m['id']),))
-                                final_s1 = len(maps_df_final[maps_df_final['winner_id'] == t1_id_val])
-                                final_s2 = len(maps_df_final[maps_df_final['winner_id'] == t2_id_val])
-                                final_winner = t1_id_val if final_s1 > final_s2 else (t2_id_val if final_s2 > final_s1 else None)
-                                played_cnt = len(maps_df_final[(maps_df_final['team1_rounds'] + maps_df_final['team2_rounds']) > 0])
+                                    # C. Recalculate Match Totals
+                                    final_s1, final_s2, played_cnt = conn_s.execute("""
+                                        SELECT COALESCE(SUM(winner_id=?), 0), COALESCE(SUM(winner_id=?), 0),
+                                               COALESCE(SUM((team1_rounds + team2_rounds) > 0), 0)
+                                        FROM match_maps WHERE match_id=?
+                                    """, (t1_id_val, t2_id_val, m_id)).fetchone()
+                                    final_winner = t1_id_val if final_s1 > final_s2 else (t2_id_val if final_s2 > final_s1 else None)
                                 
-                                conn_s.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status='completed', maps_played=? WHERE id=?", 
-                                             (final_s1, final_s2, final_winner, played_cnt, int(m['id'])))
+                                    conn_s.execute("UPDATE matches SET score_t1=?, score_t2=?, winner_id=?, status='completed', maps_played=? WHERE id=?", 
+                                                 (final_s1, final_s2, final_winner, played_cnt, m_id))
                                 
-                                conn_s.commit()
-                                st.cache_data.clear()
-                                st.success(f"Successfully saved Map {map_idx+1} and updated match totals!")
-                                st.rerun()
-                            except Exception as e:
-                                conn_s.rollback()
-                                st.error(f"Error saving: {e}")
-                            finally:
-                                conn_s.close()
+                                    conn_s.commit()
+                                    clear_query_caches()
+                                    st.success(f"Successfully saved Map {map_idx+1} and updated match totals!")
+                                    st.rerun()
+                                except Exception as e:
+                                    conn_s.rollback()
+                                    st.error(f"Error saving: {e}")
+                                finally:
+                                    conn_s.close()
 
         st.divider()
         st.subheader("Players Admin")
-        players_df = get_all_players_directory(format_names=False)
+        players_df = get_players_admin_frame()
         teams_list = get_teams_list()
         
         team_names = teams_list['name'].tolist() if not teams_list.empty else []
@@ -3546,96 +4098,94 @@ elif page == "Admin Panel":
                 tmn_new = st.selectbox("Team", [""] + team_names, index=0)
                 add_ok = st.form_submit_button("Create Player")
                 if add_ok and nm_new:
-                    conn_add = get_conn()
-                    # Check for duplicates
+                    # Check for duplicates against the cached players snapshot (cleared on every player write)
                     rid_clean = rid_new.strip() if rid_new else ""
                     nm_clean = nm_new.strip()
+                    all_df = get_all_players()
+                    rid_owner, name_set = {}, set()
+                    if not all_df.empty:
+                        for n, r in zip(all_df['name'].tolist(), all_df['riot_id'].tolist()):
+                            if isinstance(r, str):
+                                rid_owner.setdefault(r.lower(), n)
+                            if isinstance(n, str):
+                                name_set.add(n.lower())
                     
                     can_add = True
-                    if rid_clean:
-                        existing_rid = pd.read_sql("SELECT name FROM players WHERE LOWER(riot_id) = ?", conn_add, params=(rid_clean.lower(),))
-                        if not existing_rid.empty:
-                            st.error(f"Error: A player ('{existing_rid.iloc[0]['name']}') already has Riot ID '{rid_clean}'.")
-                            conn_add.close()
-                            can_add = False
-                    
-                    if can_add:
-                        existing_name = pd.read_sql("SELECT id FROM players WHERE LOWER(name) = ?", conn_add, params=(nm_clean.lower(),))
-                        if not existing_name.empty:
-                            st.error(f"Error: A player named '{nm_clean}' already exists.")
-                            conn_add.close()
-                            can_add = False
+                    if rid_clean and rid_clean.lower() in rid_owner:
+                        st.error(f"Error: A player ('{rid_owner[rid_clean.lower()]}') already has Riot ID '{rid_clean}'.")
+                        can_add = False
+                    elif nm_clean.lower() in name_set:
+                        st.error(f"Error: A player named '{nm_clean}' already exists.")
+                        can_add = False
 
                     if can_add:
                         dtid_new = team_map.get(tmn_new) if tmn_new else None
-                        conn_add.execute("INSERT INTO players (name, riot_id, rank, default_team_id) VALUES (?, ?, ?, ?)", (nm_clean, rid_clean, rk_new, dtid_new))
-                        conn_add.commit()
-                        conn_add.close()
-                        st.success("Player added")
-                        st.rerun()
+                        try:
+                            with pooled_write_conn() as conn_add:
+                                conn_add.execute("INSERT INTO players (name, riot_id, rank, default_team_id) VALUES (?, ?, ?, ?)", (nm_clean, rid_clean, rk_new, dtid_new))
+                        except sqlite3.IntegrityError as e:
+                            st.error(f"Error: duplicate player name or Riot ID ({e}).")
+                        else:
+                            clear_query_caches()
+                            st.success("Player added")
+                            st.rerun()
             
             if st.button("🔍 Cleanup Duplicate Players", help="Merge players with exact same Riot ID or case-insensitive name"):
-                conn_clean = get_conn()
                 try:
-                    players = pd.read_sql("SELECT id, name, riot_id FROM players", conn_clean)
-                    players['name_lower'] = players['name'].str.lower().str.strip()
-                    players['riot_lower'] = players['riot_id'].str.lower().str.strip().fillna("")
+                    # Shared pooled connection; the with-block commits the merge or rolls it back
+                    with pooled_write_conn() as conn_clean:
+                        players = pd.read_sql("SELECT id, name, riot_id FROM players", conn_clean)
+                        # int64 ids: tolist() below already yields Python ints for the dicts and executemany tuples
+                        players['id'] = players['id'].astype(np.int64)
+                        players['name_lower'] = players['name'].str.lower().str.strip()
+                        players['riot_lower'] = players['riot_id'].str.lower().str.strip().fillna("")
                     
-                    merged_count = 0
-                    # 1. Exact Riot ID duplicates
-                    riot_dupes = players[players['riot_lower'] != ""][players.duplicated('riot_lower', keep=False)]
-                    for rid, group in riot_dupes.groupby('riot_lower'):
-                        group = group.sort_values('id')
-                        keep_id = group.iloc[0]['id']
-                        remove_ids = group.iloc[1:]['id'].tolist()
-                        for rid_to_rem in remove_ids:
-                            conn_clean.execute("UPDATE match_stats_map SET player_id = ? WHERE player_id = ?", (int(keep_id), int(rid_to_rem)))
-                            conn_clean.execute("UPDATE match_stats_map SET subbed_for_id = ? WHERE subbed_for_id = ?", (int(keep_id), int(rid_to_rem)))
-                            conn_clean.execute("UPDATE match_stats SET player_id = ? WHERE player_id = ?", (int(keep_id), int(rid_to_rem)))
-                            conn_clean.execute("UPDATE match_stats SET subbed_for_id = ? WHERE subbed_for_id = ?", (int(keep_id), int(rid_to_rem)))
-                            conn_clean.execute("DELETE FROM players WHERE id = ?", (int(rid_to_rem),))
-                            merged_count += 1
+                        # Union-find over both duplicate kinds; the smallest id in each set is the one kept
+                        parent = {x: x for x in players['id'].tolist()}
+                        def find(x):
+                            while parent[x] != x:
+                                parent[x] = parent[parent[x]]
+                                x = parent[x]
+                            return x
+                        # 1. Exact Riot ID duplicates, 2. case-insensitive Name duplicates
+                        riot_dupes = players[players['riot_lower'] != ""][players.duplicated('riot_lower', keep=False)]
+                        name_dupes = players[players.duplicated('name_lower', keep=False)]
+                        for dupes, key in ((riot_dupes, 'riot_lower'), (name_dupes, 'name_lower')):
+                            for _, ids in dupes.groupby(key)['id']:
+                                ids = ids.tolist()
+                                for other in ids[1:]:
+                                    ra, rb = find(ids[0]), find(other)
+                                    if ra != rb:
+                                        parent[max(ra, rb)] = min(ra, rb)
+                        # old id -> kept id, resolved up front so the merge runs as a handful of bulk statements
+                        remap = {pid: find(pid) for pid in parent if find(pid) != pid}
+                        merged_count = len(remap)
                     
-                    # 2. Case-insensitive Name duplicates (only if Riot ID matches or one is empty)
-                    name_dupes = players[players.duplicated('name_lower', keep=False)]
-                    for name, group in name_dupes.groupby('name_lower'):
-                        group = group.sort_values('id')
-                        keep_id = group.iloc[0]['id']
-                        remove_ids = group.iloc[1:]['id'].tolist()
-                        for rid_to_rem in remove_ids:
-                            # Re-verify it still exists (might have been deleted by Riot ID check)
-                            exists = conn_clean.execute("SELECT id FROM players WHERE id=?", (int(rid_to_rem),)).fetchone()
-                            if exists:
-                                conn_clean.execute("UPDATE match_stats_map SET player_id = ? WHERE player_id = ?", (int(keep_id), int(rid_to_rem)))
-                                conn_clean.execute("UPDATE match_stats_map SET subbed_for_id = ? WHERE subbed_for_id = ?", (int(keep_id), int(rid_to_rem)))
-                                conn_clean.execute("UPDATE match_stats SET player_id = ? WHERE player_id = ?", (int(keep_id), int(rid_to_rem)))
-                                conn_clean.execute("UPDATE match_stats SET subbed_for_id = ? WHERE subbed_for_id = ?", (int(keep_id), int(rid_to_rem)))
-                                conn_clean.execute("DELETE FROM players WHERE id = ?", (int(rid_to_rem),))
-                                merged_count += 1
-                    
-                    conn_clean.commit()
+                        if remap:
+                            pairs = [(keep_id, old_id) for old_id, keep_id in remap.items()]
+                            conn_clean.execute("BEGIN IMMEDIATE")
+                            conn_clean.executemany("UPDATE match_stats_map SET player_id = ? WHERE player_id = ?", pairs)
+                            conn_clean.executemany("UPDATE match_stats_map SET subbed_for_id = ? WHERE subbed_for_id = ?", pairs)
+                            conn_clean.executemany("UPDATE match_stats SET player_id = ? WHERE player_id = ?", pairs)
+                            conn_clean.executemany("UPDATE match_stats SET subbed_for_id = ? WHERE subbed_for_id = ?", pairs)
+                            conn_clean.execute(f"DELETE FROM players WHERE id IN ({','.join('?' * len(remap))})", list(remap))
+
                     if merged_count > 0:
-                        st.cache_data.clear() # Clear cache to show merged players
+                        clear_query_caches() # Clear cache to show merged players
                         st.success(f"Successfully merged {merged_count} duplicate records.")
                         st.rerun()
                     else:
                         st.info("No duplicates found to merge.")
                 except Exception as e:
                     st.error(f"Cleanup error: {e}")
-                finally:
-                    conn_clean.close()
 
             st.markdown("---")
             st.subheader("Delete Player")
             with st.form("delete_player_admin"):
-                # Fetch all players for the dropdown
-                p_list_df = get_all_players()
+                # Labels and label -> id come prebuilt (vectorized) with the scoreboard lookups
+                p_options = get_player_lookups()[2]
                 
-                if not p_list_df.empty:
-                    # Vectorized player options creation
-                    p_list_df['display'] = p_list_df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-                    
-                    p_options = dict(zip(p_list_df['display'], p_list_df['id']))
+                if p_options:
                     p_to_del_name = st.selectbox("Select Player to Delete", options=list(p_options.keys()))
                     p_to_del_id = p_options[p_to_del_name]
                     
@@ -3646,27 +4196,14 @@ elif page == "Admin Panel":
                         if not confirm_del:
                             st.warning("Please confirm the deletion.")
                         else:
-                            conn_exec = get_conn()
                             try:
-                                 # Clean up references in match_stats_map and match_stats
-                                 # For player_id, we delete the stats because they belong to the deleted player
-                                 conn_exec.execute("DELETE FROM match_stats_map WHERE player_id = ?", (int(p_to_del_id),))
-                                 conn_exec.execute("DELETE FROM match_stats WHERE player_id = ?", (int(p_to_del_id),))
-                                 
-                                 # For subbed_for_id, we only set it to NULL to keep the stats of the sub
-                                 conn_exec.execute("UPDATE match_stats_map SET subbed_for_id = NULL WHERE subbed_for_id = ?", (int(p_to_del_id),))
-                                 conn_exec.execute("UPDATE match_stats SET subbed_for_id = NULL WHERE subbed_for_id = ?", (int(p_to_del_id),))
-                                 
-                                 # Delete the player
-                                 conn_exec.execute("DELETE FROM players WHERE id = ?", (int(p_to_del_id),))
-                                 conn_exec.commit()
-                                 st.cache_data.clear() # CRITICAL: Clear cache to update UI
+                                 with pooled_write_conn() as conn_exec:
+                                     _purge_players(conn_exec, [p_to_del_id])
+                                 clear_query_caches() # CRITICAL: Clear cache to update UI
                                  st.success(f"Player '{p_to_del_name}' deleted.")
                                  st.rerun()
                             except Exception as e:
                                 st.error(f"Deletion error: {e}")
-                            finally:
-                                conn_exec.close()
                 else:
                     st.info("No players found to delete.")
         cfa, cfb, cfc = st.columns([2,2,2])
@@ -3682,9 +4219,10 @@ elif page == "Admin Panel":
         if q:
             s = q.lower()
             fdf = fdf[
-                fdf['name'].str.lower().fillna("").str.contains(s) | 
-                fdf['riot_id'].str.lower().fillna("").str.contains(s)
+                fdf['_name_lc'].str.contains(s, regex=False) | 
+                fdf['_riot_lc'].str.contains(s, regex=False)
             ]
+        fdf = fdf.drop(columns=['_name_lc', '_riot_lc'])
         edited = st.data_editor(
             fdf,
             num_rows=("dynamic" if user_role in ['admin', 'dev'] else "fixed"),
@@ -3697,17 +4235,18 @@ elif page == "Admin Panel":
             key="player_editor_main"
         )
         if st.button("Save Players"):
-            conn_up = get_conn()
-            # Get current state to check for duplicates
-            current_players = pd.read_sql("SELECT id, name, riot_id FROM players", conn_up)
-            current_players['name_lower'] = current_players['name'].str.lower().str.strip()
-            current_players['riot_lower'] = current_players['riot_id'].str.lower().str.strip().fillna("")
+            # Current state for the duplicate check: the page's players frame already carries the normalized keys
+            current_players = players_df[['id', '_name_lc', '_riot_lc']].rename(columns={'_name_lc': 'name_lower', '_riot_lc': 'riot_lower'})
+            
+            # Normalize the edited names / riot ids once; the checks and the write tuples all read these
+            nm_clean = edited['name'].fillna('').astype(str).str.strip()
+            rid_clean = edited['riot_id'].fillna('').astype(str).str.strip()
+            nm_lower = nm_clean.str.lower()
+            rid_lower = rid_clean.str.lower()
             
             # Vectorized duplicate check
             error_found = False
             if not edited.empty:
-                nm_lower = edited['name'].str.lower().str.strip()
-                rid_lower = edited['riot_id'].str.lower().str.strip().fillna("")
                 
                 # 1. Check internal duplicates in 'edited'
                 if nm_lower.duplicated().any():
@@ -3720,66 +4259,60 @@ elif page == "Admin Panel":
                     error_found = True
                 
                 if not error_found:
-                    # 2. Check duplicates against 'current_players'
-                    # We check each row in 'edited' against 'current_players' (excluding the same ID)
-                    for row in edited.itertuples():
-                        pid = getattr(row, 'id', None)
-                        nm = str(row.name).strip()
-                        rid = str(row.riot_id).strip() if pd.notna(row.riot_id) else ""
-                        
-                        nm_l = nm.lower()
-                        rid_l = rid.lower()
-                        
-                        # Find potential conflicts
-                        others = current_players[current_players['id'] != pid] if pd.notna(pid) else current_players
-                        
-                        if nm_l in others['name_lower'].values:
-                            st.error(f"Error: Player name '{nm}' already exists in the database. Changes not saved.")
-                            error_found = True
-                            break
-                        
-                        if rid_l and rid_l in others['riot_lower'].values:
-                            st.error(f"Error: Riot ID '{rid}' already exists in the database. Changes not saved.")
-                            error_found = True
-                            break
+                    # 2. Check duplicates against 'current_players' (excluding the same ID) with two hash joins
+                    ed = pd.DataFrame({
+                        'id': edited['id'].to_numpy(),
+                        'nm_l': nm_lower.to_numpy(),
+                        'rid_l': rid_lower.to_numpy(),
+                        'pos': np.arange(len(edited)),
+                    })
+                    name_conf = ed.merge(current_players[['id', 'name_lower']].rename(columns={'id': 'db_id', 'name_lower': 'nm_l'}), on='nm_l')
+                    name_conf = name_conf[name_conf['id'].isna() | (name_conf['id'] != name_conf['db_id'])]
+                    rid_conf = ed[ed['rid_l'] != ''].merge(current_players[['id', 'riot_lower']].rename(columns={'id': 'db_id', 'riot_lower': 'rid_l'}), on='rid_l')
+                    rid_conf = rid_conf[rid_conf['id'].isna() | (rid_conf['id'] != rid_conf['db_id'])]
+                    # Report the first offending row, name before Riot ID, as the row-by-row check did
+                    name_pos = name_conf['pos'].min() if not name_conf.empty else len(ed)
+                    rid_pos = rid_conf['pos'].min() if not rid_conf.empty else len(ed)
+                    if name_pos < len(ed) and name_pos <= rid_pos:
+                        st.error(f"Error: Player name '{nm_clean.iloc[name_pos]}' already exists in the database. Changes not saved.")
+                        error_found = True
+                    elif rid_pos < len(ed):
+                        st.error(f"Error: Riot ID '{rid_clean.iloc[rid_pos]}' already exists in the database. Changes not saved.")
+                        error_found = True
             
             if not error_found:
-                # Identify deleted players
-                original_ids = set(fdf['id'].dropna().astype(int).tolist())
-                edited_ids = set(edited['id'].dropna().astype(int).tolist())
-                deleted_ids = original_ids - edited_ids
+                # Identify deleted players: ids shown in the editor that are no longer in its rows
+                original_ids = fdf['id'].dropna().to_numpy(np.int64)
+                edited_ids = edited['id'].dropna().to_numpy(np.int64)
+                deleted_ids = np.setdiff1d(original_ids, edited_ids, assume_unique=True).tolist()
                 
-                if deleted_ids:
-                    for pid in deleted_ids:
-                         # For player_id, we delete the stats because they belong to the deleted player
-                         conn_up.execute("DELETE FROM match_stats_map WHERE player_id = ?", (pid,))
-                         conn_up.execute("DELETE FROM match_stats WHERE player_id = ?", (pid,))
-                         
-                         # For subbed_for_id, we only set it to NULL to keep the stats of the sub
-                         conn_up.execute("UPDATE match_stats_map SET subbed_for_id = NULL WHERE subbed_for_id = ?", (pid,))
-                         conn_up.execute("UPDATE match_stats SET subbed_for_id = NULL WHERE subbed_for_id = ?", (pid,))
-                         
-                         # Delete the player
-                         conn_up.execute("DELETE FROM players WHERE id = ?", (pid,))
-
-                for row in edited.itertuples():
-                    pid = getattr(row, 'id', None)
-                    nm = str(row.name).strip()
-                    rid = str(row.riot_id).strip() if pd.notna(row.riot_id) else ""
-                    rk = getattr(row, 'rank', "Unranked") or "Unranked"
-                    tmn = getattr(row, 'team', None)
-                    dtid = team_map.get(tmn) if pd.notna(tmn) else None
-                    
+                # Column-wise cleanup, then one executemany each for updates and new rows
+                nms = nm_clean.tolist()
+                rids = rid_clean.tolist()
+                rks = edited['rank'].fillna('').replace('', 'Unranked').tolist()
+                # Unknown / blank teams map to NaN, which goes back to None for a NULL default_team_id
+                dtids = edited['team'].map(team_map).astype('Int64').astype(object)
+                dtids = dtids.where(dtids.notna(), None).tolist()
+                pids = edited['id'].tolist()
+                upd_rows, ins_rows = [], []
+                for pid, nm, rid, rk, dtid in zip(pids, nms, rids, rks, dtids):
                     if pd.isna(pid):
-                        if user_role in ['admin', 'dev']:
-                            conn_up.execute("INSERT INTO players (name, riot_id, rank, default_team_id) VALUES (?, ?, ?, ?)", (nm, rid, rk, dtid))
+                        ins_rows.append((nm, rid, rk, dtid))
                     else:
-                        conn_up.execute("UPDATE players SET name=?, riot_id=?, rank=?, default_team_id=? WHERE id=?", (nm, rid, rk, dtid, int(pid)))
-                conn_up.commit()
-                st.cache_data.clear() # Clear cache to show player changes immediately
-                st.success("Players saved")
-                st.rerun()
-            conn_up.close()
+                        upd_rows.append((nm, rid, rk, dtid, int(pid)))
+                try:
+                    with pooled_write_conn() as conn_up:
+                        _purge_players(conn_up, deleted_ids)
+                        conn_up.executemany("UPDATE players SET name=?, riot_id=?, rank=?, default_team_id=? WHERE id=?", upd_rows)
+                        if ins_rows and user_role in ['admin', 'dev']:
+                            conn_up.executemany("INSERT INTO players (name, riot_id, rank, default_team_id) VALUES (?, ?, ?, ?)", ins_rows)
+                except sqlite3.IntegrityError as e:
+                    # The unique name / riot id indexes catch anything that slipped past the checks above (e.g. a concurrent save)
+                    st.error(f"Error: duplicate player name or Riot ID ({e}). Changes not saved.")
+                else:
+                    clear_query_caches() # Clear cache to show player changes immediately
+                    st.success("Players saved")
+                    st.rerun()
 
         st.divider()
         st.subheader("Schedule Manager")
@@ -3789,28 +4322,27 @@ elif page == "Admin Panel":
         gnames = sorted([x for x in teams_df['group_name'].dropna().unique().tolist()])
         gsel = st.selectbox("Group", gnames + [""] , index=(0 if gnames else 0))
         tnames = teams_df['name'].tolist()
+        name_to_id = dict(zip(teams_df['name'].astype(str), teams_df['id'].astype(int)))
         t1 = st.selectbox("Team 1", tnames)
         t2 = st.selectbox("Team 2", tnames, index=(1 if len(tnames)>1 else 0))
         fmt = st.selectbox("Format", ["BO1","BO3","BO5"], index=1)
         if st.button("Add Match"):
-            conn_ins = get_conn()
-            id1 = int(teams_df[teams_df['name'] == t1].iloc[0]['id'])
-            id2 = int(teams_df[teams_df['name'] == t2].iloc[0]['id'])
-            conn_ins.execute("INSERT INTO matches (week, group_name, status, format, team1_id, team2_id, score_t1, score_t2, maps_played, match_type) VALUES (?, ?, 'scheduled', ?, ?, ?, 0, 0, 0, 'regular')", (int(w), gsel or None, fmt, id1, id2))
-            conn_ins.commit()
-            conn_ins.close()
+            id1 = name_to_id[t1]
+            id2 = name_to_id[t2]
+            add_matches([(int(w), gsel or None, fmt, id1, id2)])
+            clear_query_caches() # New match belongs in the cached week / schedule views
             st.success("Match added")
             st.rerun()
 
 elif page == "Substitutions Log":
-    import pandas as pd
-    import plotly.express as px
     st.markdown('<h1 class="main-header">SUBSTITUTIONS LOG</h1>', unsafe_allow_html=True)
     
     df = get_substitutions_log()
     if df.empty:
         st.info("No substitutions recorded.")
     else:
+        # Subs per team, most first; feeds both the metric card and the bar chart
+        team_counts = df['team'].value_counts()
         # Summary Metrics
         m1, m2 = st.columns(2)
         with m1:
@@ -3819,7 +4351,7 @@ elif page == "Substitutions Log":
 <div style="font-size: 2.5rem; font-family: 'Orbitron'; color: var(--primary-blue); margin: 10px 0;">{len(df)}</div>
 </div>""", unsafe_allow_html=True)
         with m2:
-            top_team = df.groupby('team').size().idxmax() if not df.empty else "N/A"
+            top_team = team_counts.index[0] if not team_counts.empty else "N/A"
             st.markdown(f"""<div class="custom-card" style="text-align: center;">
 <div style="color: var(--text-dim); font-size: 0.8rem; text-transform: uppercase; letter-spacing: 1px;">Most Active Team</div>
 <div style="font-size: 1.5rem; font-family: 'Orbitron'; color: var(--primary-red); margin: 10px 0;">{html.escape(str(top_team))}</div>
@@ -3830,14 +4362,14 @@ elif page == "Substitutions Log":
         # Charts Section
         c1, c2 = st.columns(2)
         with c1:
-            tcount = df.groupby('team').size().reset_index(name='subs').sort_values('subs', ascending=False)
+            tcount = team_counts.rename_axis('team').reset_index(name='subs')
             fig_sub_team = px.bar(tcount, x='team', y='subs', title="Subs by Team",
                                   color_discrete_sequence=['#3FD1FF'], labels={'team': 'Team', 'subs': 'Substitutions'})
             st.plotly_chart(apply_plotly_theme(fig_sub_team), use_container_width=True)
         
         with c2:
             if 'week' in df.columns:
-                wcount = df.groupby('week').size().reset_index(name='subs')
+                wcount = df['week'].value_counts().sort_index().rename_axis('week').reset_index(name='subs')
                 fig_sub_week = px.line(wcount, x='week', y='subs', title="Subs per Week", markers=True,
                                        color_discrete_sequence=['#FF4655'], labels={'week': 'Week', 'subs': 'Substitutions'})
                 st.plotly_chart(apply_plotly_theme(fig_sub_week), use_container_width=True)
@@ -3847,20 +4379,18 @@ elif page == "Substitutions Log":
         st.dataframe(df, use_container_width=True, hide_index=True)
 
 elif page == "Player Profile":
-    import pandas as pd
     players_df = get_all_players()
     
     st.markdown('<h1 class="main-header">PLAYER PROFILE</h1>', unsafe_allow_html=True)
     
     if not players_df.empty:
-        players_df = players_df.copy()
-        players_df['display_label'] = players_df.apply(lambda r: f"{r['name']} ({r['riot_id']})" if r['riot_id'] and str(r['riot_id']).strip() else r['name'], axis=1)
-        
-        opts = players_df['display_label'].tolist()
+        opts = _fmt_with_riot(players_df['name'], players_df['riot_id']).tolist()
+        # Built once per render; reversed so a repeated label keeps its first row, as the mask lookup did
+        label_to_id = dict(zip(reversed(opts), reversed(players_df['id'].astype(int).tolist())))
         sel = st.selectbox("Select a Player", opts)
         
         if sel:
-            pid = int(players_df[players_df['display_label'] == sel].iloc[0]['id'])
+            pid = label_to_id[sel]
             prof = get_player_profile(pid)
             
             if prof:
@@ -3907,39 +4437,27 @@ elif page == "Player Profile":
             
             cmp_df = pd.DataFrame({
                 'Metric': ['ACS','Kills/Match','Deaths/Match','Assists/Match'],
-                'Player': [prof['avg_acs'], prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)],
+                'Player': [prof['avg_acs'], prof['kpg'], prof['dpg'], prof['apg']],
                 'Rank Avg': [prof['sr_avg_acs'], prof['sr_k'], prof['sr_d'], prof['sr_a']],
                 'League Avg': [prof['lg_avg_acs'], prof['lg_k'], prof['lg_d'], prof['lg_a']],
             })
             
-            # Plotly Bar Chart for comparison with dual axis
-            import plotly.graph_objects as go
-            from plotly.subplots import make_subplots
-            fig_cmp = make_subplots(specs=[[{"secondary_y": True}]])
-            
-            # ACS (Primary Y-Axis)
-            fig_cmp.add_trace(go.Bar(name='Player ACS', x=['ACS'], y=[prof['avg_acs']], marker_color='#3FD1FF'), secondary_y=False)
-            fig_cmp.add_trace(go.Bar(name='Rank Avg ACS', x=['ACS'], y=[prof['sr_avg_acs']], marker_color='#FF4655', opacity=0.7), secondary_y=False)
-            fig_cmp.add_trace(go.Bar(name='League Avg ACS', x=['ACS'], y=[prof['lg_avg_acs']], marker_color='#ECE8E1', opacity=0.5), secondary_y=False)
-            
-            # Per-Match Stats (Secondary Y-Axis)
-            other_metrics = ['Kills/Match', 'Deaths/Match', 'Assists/Match']
-            player_others = [prof['total_kills']/max(prof['games'],1), prof['total_deaths']/max(prof['games'],1), prof['total_assists']/max(prof['games'],1)]
-            rank_others = [prof['sr_k'], prof['sr_d'], prof['sr_a']]
-            league_others = [prof['lg_k'], prof['lg_d'], prof['lg_a']]
-            
-            fig_cmp.add_trace(go.Bar(name='Player Stats', x=other_metrics, y=player_others, marker_color='#3FD1FF', showlegend=False), secondary_y=True)
-            fig_cmp.add_trace(go.Bar(name='Rank Avg Stats', x=other_metrics, y=rank_others, marker_color='#FF4655', opacity=0.7, showlegend=False), secondary_y=True)
-            fig_cmp.add_trace(go.Bar(name='League Avg Stats', x=other_metrics, y=league_others, marker_color='#ECE8E1', opacity=0.5, showlegend=False), secondary_y=True)
-            
+            # One long frame and one px.bar; ACS and per-match K/D/A sit in separate facets with their own y-axes
+            bench_df = cmp_df.melt(id_vars='Metric', var_name='Source', value_name='Value')
+            bench_df['Axis'] = bench_df['Metric'].where(bench_df['Metric'] == 'ACS', 'K/D/A Per Match')
+            fig_cmp = px.bar(
+                bench_df, x='Metric', y='Value', color='Source', barmode='group', facet_col='Axis',
+                category_orders={'Axis': ['ACS', 'K/D/A Per Match']},
+                color_discrete_map={'Player': '#3FD1FF', 'Rank Avg': '#FF4655', 'League Avg': '#ECE8E1'},
+            )
+            fig_cmp.update_xaxes(matches=None, title_text=None)
+            fig_cmp.update_yaxes(matches=None, showticklabels=True, title_text=None)
+            fig_cmp.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
             fig_cmp.update_layout(
-                barmode='group', 
                 height=400,
-                title_text="Performance vs Benchmarks (ACS on Left, Others on Right)",
+                title_text="Performance vs Benchmarks",
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
             )
-            fig_cmp.update_yaxes(title_text="Average Combat Score (ACS)", secondary_y=False)
-            fig_cmp.update_yaxes(title_text="K/D/A Per Match", secondary_y=True)
             
             st.plotly_chart(apply_plotly_theme(fig_cmp), use_container_width=True)
             